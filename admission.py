@@ -0,0 +1,256 @@
+"""
+Admission control and graceful degradation for ChristopherGPT
+Three pieces keep latency bounded when the server or OpenAI is overloaded:
+
+- Deadline: every request gets a time budget when it arrives. Each stage
+  reads it (see deadline_scope): queueing waits at most the time left,
+  retrieval refuses to start once it has passed, and OpenAI calls get only
+  the remaining time as their timeout, with no retries past it.
+- AdmissionController: at most `max_in_flight` requests are answered at
+  once. A bounded queue holds the overflow for a short time, and anything
+  beyond it is turned away at once instead of piling up on Flask threads.
+- CircuitBreaker: watches the outcome and latency of recent OpenAI calls.
+  When too many fail or are too slow, it opens and requests get the
+  template answer without waiting on OpenAI. After a cooldown, one probe
+  call is let through, and a success closes the breaker again.
+
+Usage:
+    admission.acquire(deadline)       # raises Overloaded when full
+    try:
+        with deadline_scope(deadline):
+            bot.get_response(question)
+    finally:
+        admission.release()
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Deadline of the request being answered; None when no deadline_scope() is active
+_current_deadline = contextvars.ContextVar('christophergpt_deadline', default=None)
+
+
+class Overloaded(Exception):
+    """The request was not admitted: the queue is full or the wait ran out"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before a stage could start"""
+
+
+class Deadline:
+    def __init__(self, seconds):
+        """
+        Args:
+            seconds (float): Time budget from now
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage):
+        """Raise DeadlineExceeded if the deadline has passed before `stage` starts"""
+        if self.expired():
+            raise DeadlineExceeded(f"Request deadline of {self.seconds:.1f}s passed before {stage}")
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Make `deadline` the current request's deadline for code run inside the block"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline():
+    """Deadline of the current request, or None outside deadline_scope()"""
+    return _current_deadline.get()
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight=64, max_queue=128, queue_timeout=2.0):
+        """
+        Args:
+            max_in_flight (int): Requests answered at once
+            max_queue (int): Requests waiting for a slot before new ones are rejected
+            queue_timeout (float): Longest wait for a slot in seconds (less if
+                the request's deadline is closer)
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline=None):
+        """
+        Take an in-flight slot, waiting in the queue if all are taken
+
+        Args:
+            deadline (Deadline): The request's deadline, bounds the wait
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            Overloaded: If the queue is full or no slot freed up in time
+        """
+        started = time.monotonic()
+        with self._condition:
+            # Waiting requests go first, so a newcomer only skips the queue when it is empty
+            if self.in_flight < self.max_in_flight and not self.waiting:
+                self.in_flight += 1
+                self.admitted += 1
+                return 0.0
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(f"Server busy: {self.in_flight} requests in flight and {self.waiting} queued")
+            wait = self.queue_timeout if deadline is None else min(self.queue_timeout, deadline.remaining())
+            give_up_at = started + wait
+            self.waiting += 1
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        raise Overloaded(f"Server busy: no free slot within {wait:.1f}s")
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+        return time.monotonic() - started
+
+    def release(self):
+        """Give back a slot taken by acquire()"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out
+        }
+
+
+class CircuitBreaker:
+    def __init__(self, window=50, min_calls=10, failure_rate=0.5, slow_call_seconds=5.0,
+                 slow_call_rate=0.5, cooldown=15.0):
+        """
+        Args:
+            window (int): Recent calls the rates are computed over
+            min_calls (int): Calls needed in the window before the breaker can open
+            failure_rate (float): Fraction of failed calls that opens the breaker
+            slow_call_seconds (float): Calls taking at least this long count as slow
+            slow_call_rate (float): Fraction of slow calls that opens the breaker
+            cooldown (float): Seconds the breaker stays open before a probe call
+        """
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._calls = deque(maxlen=window)  # (failed, slow) per recent call
+        self._probe_started = None  # set while a half-open probe call is running
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Whether a call may go ahead; callers that get True must report it with record()
+
+        Returns:
+            bool: False while the breaker is open, or half-open with a probe running
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_started = None
+                print("🔌 OpenAI circuit half-open, sending a probe call")
+            # A probe that never reported back (e.g. it failed before the call) is replaced after a cooldown
+            if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.cooldown):
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success, seconds):
+        """
+        Report the outcome of an allowed call
+
+        Args:
+            success (bool): Whether the call returned an answer
+            seconds (float): How long it took
+        """
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if success and not slow:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    print("✅ OpenAI circuit closed")
+                else:
+                    self._open()
+                return
+            if self.state == OPEN:
+                return  # a call from before the breaker opened
+            self._calls.append((not success, slow))
+            calls = len(self._calls)
+            if calls < self.min_calls:
+                return
+            failed = sum(failed for failed, _ in self._calls)
+            slow_calls = sum(slow for _, slow in self._calls)
+            if failed / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                self._open()
+
+    def _open(self):
+        """Called with the lock held"""
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._probe_started = None
+        self._calls.clear()
+        print(f"⚠️  OpenAI circuit open, answering from templates for {self.cooldown:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            calls = len(self._calls)
+            return {
+                'state': self.state,
+                'recent_calls': calls,
+                'failure_rate': round(sum(failed for failed, _ in self._calls) / calls, 4) if calls else 0.0,
+                'slow_call_rate': round(sum(slow for _, slow in self._calls) / calls, 4) if calls else 0.0,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,344 @@
+"""
+Precomputed answers for frequent questions
+An offline job reads a question log, groups paraphrases by embedding
+similarity, keeps the most frequent groups and answers one representative
+question per group through ChristopherGPT.get_responses. The answers are
+saved as an answer index. At serve time a question whose nearest indexed
+phrasing is similar enough gets the stored answer without retrieval or an
+LLM call.
+
+Answers are only valid for the facts and personality they were generated
+from, so the index records a fingerprint of both and is dropped as soon as
+the served facts change.
+
+Index layout (one directory):
+    header.json     format version, fingerprint, model, top_k, answer method
+    questions.npy   L2-normalized float32 embedding of every indexed phrasing
+    entries.json    answers with their facts, and the phrasing -> answer mapping
+
+Usage:
+    python answer_index.py questions.txt
+    python answer_index.py chat_log.jsonl --field message --min-count 3 --max-answers 500
+    python answer_index.py chat_log.jsonl --persona ada
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import Counter
+
+import numpy as np
+
+from cache import normalize_question
+from vector_search import normalize_rows, search
+
+FORMAT_VERSION = 1
+HEADER_FILE = 'header.json'
+QUESTIONS_FILE = 'questions.npy'
+ENTRIES_FILE = 'entries.json'
+QUESTION_FIELDS = ('message', 'question', 'text')
+
+
+class AnswerIndex:
+    def __init__(self, embeddings, entry_ids, phrasings, entries, header):
+        """
+        Args:
+            embeddings (np.ndarray): Normalized float32 embedding per indexed phrasing
+            entry_ids (np.ndarray): Entry each phrasing row answers with
+            phrasings (list): Question text of each row
+            entries (list): {'question', 'answer', 'method', 'relevant_facts', 'count'} per answer
+            header (dict): fingerprint, model_name, top_k, method, ...
+        """
+        self.embeddings = embeddings
+        self.entry_ids = entry_ids
+        self.phrasings = phrasings
+        self.entries = entries
+        self.header = header
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def fingerprint(self):
+        return self.header['fingerprint']
+
+    @property
+    def top_k(self):
+        return self.header['top_k']
+
+    @property
+    def method(self):
+        return self.header['method']
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, question_embedding, threshold):
+        """
+        Nearest indexed phrasing of a question
+
+        Args:
+            question_embedding (np.ndarray): Unit-length question embedding
+            threshold (float): Minimum cosine similarity for a hit
+
+        Returns:
+            tuple: (entry, similarity, matched phrasing), or None on a miss
+        """
+        if not len(self.phrasings):
+            self.misses += 1
+            return None
+        indices, scores = search(self.embeddings, question_embedding, 1)
+        if scores[0] < threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        row = int(indices[0])
+        return self.entries[int(self.entry_ids[row])], float(scores[0]), self.phrasings[row]
+
+    def stats(self):
+        """Counters in the same shape as the caches' stats, plus what the index holds"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'phrasings': len(self.phrasings),
+            'method': self.method,
+            'top_k': self.top_k,
+            'created_at': self.header['created_at'],
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': 0,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def save(self, path):
+        """Write the index atomically, like EmbeddingStore.save"""
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, QUESTIONS_FILE), self.embeddings)
+        with open(os.path.join(tmp_path, ENTRIES_FILE), 'w', encoding='utf-8') as f:
+            json.dump({
+                'entries': self.entries,
+                'rows': [{'entry': int(entry), 'question': question}
+                         for entry, question in zip(self.entry_ids, self.phrasings)]
+            }, f)
+        with open(os.path.join(tmp_path, HEADER_FILE), 'w') as f:
+            json.dump({**self.header, 'format_version': FORMAT_VERSION}, f, indent=2)
+
+        old_path = path + '.old'
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index from disk
+
+        Returns:
+            AnswerIndex: The index, or None if there is none at path
+        """
+        header_path = os.path.join(path, HEADER_FILE)
+        if not os.path.exists(header_path):
+            return None
+        with open(header_path) as f:
+            header = json.load(f)
+        if header.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported answer index version: {header.get('format_version')}")
+        with open(os.path.join(path, ENTRIES_FILE), encoding='utf-8') as f:
+            data = json.load(f)
+        embeddings = np.load(os.path.join(path, QUESTIONS_FILE))
+        entry_ids = np.array([row['entry'] for row in data['rows']], dtype=np.int32)
+        phrasings = [row['question'] for row in data['rows']]
+        return cls(embeddings, entry_ids, phrasings, data['entries'], header)
+
+
+def read_questions(path, field=None):
+    """
+    Yield the questions of a log: JSONL objects (the `field` key, or the first
+    of message/question/text) or strings, otherwise one question per line
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] in '{"':
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    yield line
+                    continue
+                if isinstance(record, dict):
+                    keys = (field,) if field else QUESTION_FIELDS
+                    record = next((record[key] for key in keys if record.get(key)), None)
+                if isinstance(record, str) and record.strip():
+                    yield record.strip()
+            else:
+                yield line
+
+
+def cluster_questions(questions, encode, threshold=0.88, min_count=2, max_clusters=1000, batch_size=256):
+    """
+    Group paraphrases of frequent questions
+
+    Identical questions (after normalization) are counted first. Distinct
+    questions are then visited from most to least frequent, and each one
+    joins the most similar existing group at or above the threshold or
+    starts a new group. The most frequent phrasing leads each group.
+
+    Args:
+        questions (Iterable): Question texts, repeats included
+        encode (callable): Maps a list of texts to unit-length embeddings
+        threshold (float): Cosine similarity needed to join a group
+        min_count (int): Groups asked fewer times in total are dropped
+        max_clusters (int): Most frequent groups kept
+        batch_size (int): Questions encoded per call
+
+    Returns:
+        list: {'question', 'count', 'phrasings': [(text, count, embedding)]}, most frequent first
+    """
+    counts = Counter()
+    texts = {}
+    for question in questions:
+        key = normalize_question(question)
+        if key:
+            counts[key] += 1
+            texts.setdefault(key, question)
+    distinct = [key for key, _ in counts.most_common()]
+
+    clusters = []
+    leaders = None
+    for start in range(0, len(distinct), batch_size):
+        batch = distinct[start:start + batch_size]
+        embeddings = encode([texts[key] for key in batch])
+        for key, embedding in zip(batch, embeddings):
+            best = -1
+            if clusters:
+                scores = leaders[:len(clusters)] @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] < threshold:
+                    best = -1
+            if best < 0:
+                if leaders is None or len(clusters) == len(leaders):
+                    grown = np.empty((max(64, 2 * len(clusters)), len(embedding)), dtype=np.float32)
+                    if leaders is not None:
+                        grown[:len(clusters)] = leaders[:len(clusters)]
+                    leaders = grown
+                leaders[len(clusters)] = embedding
+                clusters.append({'question': texts[key], 'count': 0, 'phrasings': []})
+                best = len(clusters) - 1
+            clusters[best]['count'] += counts[key]
+            clusters[best]['phrasings'].append((texts[key], counts[key], embedding))
+
+    frequent = [cluster for cluster in clusters if cluster['count'] >= min_count]
+    frequent.sort(key=lambda cluster: cluster['count'], reverse=True)
+    return frequent[:max_clusters]
+
+
+def build_answer_index(bot, questions, top_k=3, use_openai=True, threshold=0.88, min_count=2,
+                       max_answers=1000, max_phrasings=20, batch_size=32):
+    """
+    Cluster a question log and answer the frequent questions
+
+    Args:
+        bot (ChristopherGPT): Answers the questions; its own answer index must be off
+        questions (Iterable): Question texts, repeats included
+        top_k (int): Facts retrieved per answer (requests must use the same top_k to hit)
+        use_openai (bool): Generate answers with OpenAI when available
+        threshold (float): Cosine similarity for two questions to share an answer
+        min_count (int): Minimum times a question group was asked
+        max_answers (int): Most frequent question groups answered
+        max_phrasings (int): Phrasings indexed per group (the most frequent ones)
+        batch_size (int): Questions per get_responses call
+
+    Returns:
+        AnswerIndex: The index, ready to save
+    """
+    def encode(texts):
+        return normalize_rows(bot.embedder.model.encode(texts))
+
+    clusters = cluster_questions(questions, encode, threshold, min_count, max_answers)
+    print(f"📚 {len(clusters)} frequent question groups to answer")
+
+    # Template answers given because OpenAI failed are left out; those questions are answered live
+    method = 'openai' if use_openai and bot.openai_available else 'basic'
+    answered = []
+    skipped = 0
+    for start in range(0, len(clusters), batch_size):
+        batch = clusters[start:start + batch_size]
+        responses = bot.get_responses([cluster['question'] for cluster in batch], use_openai=use_openai, top_k=top_k)
+        for cluster, response in zip(batch, responses):
+            if response['method'] != method or response.get('degraded'):
+                skipped += 1
+                continue
+            answered.append((cluster, {
+                'question': cluster['question'],
+                'answer': response['answer'],
+                'method': response['method'],
+                'relevant_facts': response['relevant_facts'],
+                'count': cluster['count']
+            }))
+        print(f"   answered {len(answered)}/{len(clusters)}" + (f" ({skipped} degraded, skipped)" if skipped else ""))
+
+    entries = [entry for _, entry in answered]
+    rows = [
+        (entry_id, text, embedding)
+        for entry_id, (cluster, _) in enumerate(answered)
+        for text, _, embedding in cluster['phrasings'][:max_phrasings]
+    ]
+    dimension = bot.embedder.model.get_sentence_embedding_dimension()
+    header = {
+        'fingerprint': bot.answer_index_fingerprint(),
+        'model_name': bot.embedder.model_name,
+        'persona': bot.persona.name,
+        'top_k': top_k,
+        'method': method,
+        'threshold': threshold,
+        'created_at': time.time()
+    }
+    return AnswerIndex(
+        np.array([embedding for _, _, embedding in rows], dtype=np.float32).reshape(len(rows), dimension),
+        np.array([entry_id for entry_id, _, _ in rows], dtype=np.int32),
+        [text for _, text, _ in rows],
+        entries,
+        header
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help="question log: JSONL (one request per line) or plain text (one question per line)")
+    parser.add_argument('--field', default=None, help="JSON key holding the question (default: message/question/text)")
+    parser.add_argument('--persona', default=None, help="persona to answer as (default: Christopher)")
+    parser.add_argument('--personas-dir', default=os.getenv('PERSONAS_DIR', 'personas'))
+    parser.add_argument('--output', default=None, help="index directory (default: the persona's answer index path)")
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=0.88, help="similarity for questions to share an answer")
+    parser.add_argument('--min-count', type=int, default=2)
+    parser.add_argument('--max-answers', type=int, default=1000)
+    parser.add_argument('--basic', action='store_true', help="template answers only, no OpenAI")
+    args = parser.parse_args()
+
+    # Imported here so the index can be read without loading the chatbot
+    from christophergpt import ChristopherGPT
+    from personas import find_persona
+
+    persona = None
+    if args.persona:
+        persona = find_persona(args.personas_dir, args.persona)
+        if persona is None:
+            raise SystemExit(f"Unknown persona '{args.persona}' in {args.personas_dir}")
+    bot = ChristopherGPT(persona=persona)
+    bot.answer_index = None  # answer from the facts, not from a previous index
+
+    started = time.perf_counter()
+    index = build_answer_index(bot, read_questions(args.log, args.field), args.top_k, not args.basic,
+                               args.threshold, args.min_count, args.max_answers)
+    output = args.output or bot.persona.answer_index_path
+    index.save(output)
+    print(f"✅ Saved {len(index)} answers ({len(index.phrasings)} phrasings) to {output} "
+          f"in {time.perf_counter() - started:.1f}s")
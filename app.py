@@ -3,15 +3,274 @@ Web interface for ChristopherGPT
 Flask web application for localhost server
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+from admission import AdmissionController, Deadline, DeadlineExceeded, Overloaded, deadline_scope
 from christophergpt import ChristopherGPT
+from metrics import METRICS, labelled, trace
+from persona_registry import PersonaRegistry
+from request_log import RequestLogWriter, request_record
+import atexit
+import hmac
+import json
 import os
+import threading
+import time
 
 app = Flask(__name__)
 
-# Initialize ChristopherGPT
+# ChristopherGPT is built in a background thread so the server can bind its
+# port and answer health checks while the embedding model loads
 print("Starting ChristopherGPT web server...")
-bot = ChristopherGPT()
+bot = None
+registry = None  # serves other personas next to bot, see /api/<persona>/chat
+bot_state = {
+    'readiness': 'loading',
+    'error': None,
+    'started_at': time.time(),
+    'ready_seconds': None
+}
+
+def load_bot():
+    """Construct ChristopherGPT, warm it up and mark the server ready"""
+    global bot, registry
+    started = time.perf_counter()
+    try:
+        instance = ChristopherGPT()
+        instance.warm_up()
+        registry = PersonaRegistry(
+            instance,
+            personas_dir=os.getenv('PERSONAS_DIR', 'personas'),
+            memory_budget_mb=float(os.getenv('PERSONA_MEMORY_BUDGET_MB', '1024'))
+        )
+        bot = instance
+        bot_state['ready_seconds'] = round(time.perf_counter() - started, 2)
+        bot_state['readiness'] = 'ready'
+        print(f"✅ ChristopherGPT warmed up in {bot_state['ready_seconds']}s")
+    except Exception as e:
+        bot_state['readiness'] = 'error'
+        bot_state['error'] = str(e)
+        print(f"❌ ChristopherGPT failed to load: {e}")
+
+bot_loader = threading.Thread(target=load_bot, name="bot-loader", daemon=True)
+bot_loader.start()
+
+# One JSON line per answered question, written off the request path (REQUEST_LOG= disables it)
+request_log = None
+if os.getenv('REQUEST_LOG', 'logs/requests.jsonl'):
+    request_log = RequestLogWriter(
+        os.getenv('REQUEST_LOG', 'logs/requests.jsonl'),
+        max_bytes=int(float(os.getenv('REQUEST_LOG_MAX_MB', '50')) * 1024 * 1024),
+        backups=int(os.getenv('REQUEST_LOG_BACKUPS', '5'))
+    )
+    atexit.register(request_log.close)
+
+# Chat requests get a deadline on arrival and wait in a short queue for one of
+# a bounded number of slots; beyond that they get 503 (ADMISSION_MAX_IN_FLIGHT=0 disables the limit)
+CHAT_ENDPOINTS = {'chat', 'chat_async', 'chat_stream', 'chat_batch'}
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+REQUEST_DEADLINE_MS = float(os.getenv('REQUEST_DEADLINE_MS', '20000'))
+admission = None
+if int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '64')) > 0:
+    admission = AdmissionController(
+        max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '64')),
+        max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '128')),
+        queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', '2000')) / 1000
+    )
+
+# Background fact reloads triggered through /api/admin/reload
+reload_lock = threading.Lock()
+reload_state = {
+    'running': False,
+    'source': None,
+    'error': None,
+    'finished_at': None,
+    'seconds': None
+}
+
+def run_reload(source):
+    """Build and swap in a new fact snapshot while requests keep being served"""
+    started = time.perf_counter()
+    try:
+        if source == 'answers':
+            if not bot.load_answer_index():
+                raise ValueError("No answer index matching the current facts")
+        else:
+            stats = bot.reload_facts(from_store=(source == 'store'))
+            print(f"✅ Facts reloaded from {source}: snapshot v{stats['version']} with {stats['facts']} facts")
+        reload_state['error'] = None
+    except Exception as e:
+        reload_state['error'] = str(e)
+        print(f"❌ Fact reload failed: {e}")
+    finally:
+        reload_state['seconds'] = round(time.perf_counter() - started, 2)
+        reload_state['finished_at'] = time.time()
+        reload_state['running'] = False
+
+# Requests carrying this header get a per-stage timing breakdown in the JSON response
+DEBUG_TIMING_HEADER = 'X-Debug-Timing'
+REQUEST_METRIC = 'christophergpt_request_duration_seconds'
+ADMISSION_WAIT_METRIC = 'christophergpt_admission_wait_seconds'
+METRICS.describe(REQUEST_METRIC, "Time to produce a response, per endpoint (streams: until headers are sent)")
+METRICS.describe(ADMISSION_WAIT_METRIC, "Time chat requests spent queued for an in-flight slot")
+METRICS.describe('christophergpt_requests_total', "HTTP requests handled, per endpoint and status code")
+
+def collect_bot_metrics():
+    """Readiness, and fact count and cache counters per loaded persona, read fresh on every /api/metrics scrape"""
+    yield ('christophergpt_ready', 'gauge', "1 once ChristopherGPT has finished loading",
+           {}, 1 if bot is not None else 0)
+    if bot is None:
+        return
+    for name, persona_bot in registry.loaded():
+        persona = {'persona': name}
+        yield ('christophergpt_facts', 'gauge', "Facts currently searchable",
+               persona, len(persona_bot.embedder.facts) if persona_bot.embedder.facts else 0)
+        yield ('christophergpt_persona_memory_bytes', 'gauge', "Approximate memory held by a persona's facts",
+               persona, persona_bot.embedder.memory_usage())
+        snapshot = persona_bot.embedder.snapshot_stats()
+        yield ('christophergpt_snapshot_version', 'gauge', "Version of the fact snapshot being served",
+               persona, snapshot['version'])
+        yield ('christophergpt_snapshots_draining', 'gauge', "Replaced snapshots still finishing in-flight queries",
+               persona, len(snapshot['draining']))
+        for cache, stats in persona_bot.cache_stats().items():
+            labels = {**persona, 'cache': cache}
+            yield ('christophergpt_cache_hits_total', 'counter', "Cache hits", labels, stats['hits'])
+            yield ('christophergpt_cache_misses_total', 'counter', "Cache misses", labels, stats['misses'])
+            yield ('christophergpt_cache_evictions_total', 'counter', "Cache evictions", labels, stats['evictions'])
+            yield ('christophergpt_cache_entries', 'gauge', "Entries currently cached", labels, stats['size'])
+        yield ('christophergpt_sessions_active', 'gauge', "Conversation sessions currently held in memory",
+               persona, len(persona_bot.sessions))
+    yield ('christophergpt_persona_memory_budget_bytes', 'gauge', "Memory budget for loaded personas",
+           {}, registry.memory_budget)
+    yield ('christophergpt_persona_loads_total', 'counter', "Personas loaded on demand",
+           {}, registry.loads)
+    yield ('christophergpt_persona_evictions_total', 'counter', "Personas unloaded to stay within the memory budget",
+           {}, registry.evictions)
+    if request_log is not None:
+        log_stats = request_log.stats()
+        yield ('christophergpt_request_log_written_total', 'counter', "Request log records written",
+               {}, log_stats['written'])
+        yield ('christophergpt_request_log_dropped_total', 'counter', "Request log records dropped because the writer fell behind",
+               {}, log_stats['dropped'])
+    if bot.async_llm:
+        yield ('christophergpt_openai_in_flight', 'gauge', "Async OpenAI completions in flight",
+               {}, bot.async_llm.in_flight)
+    if admission is not None:
+        admission_stats = admission.stats()
+        yield ('christophergpt_requests_in_flight', 'gauge', "Chat requests being answered",
+               {}, admission_stats['in_flight'])
+        yield ('christophergpt_requests_queued', 'gauge', "Chat requests waiting for an in-flight slot",
+               {}, admission_stats['waiting'])
+        yield ('christophergpt_requests_rejected_total', 'counter', "Chat requests turned away with 503",
+               {'reason': 'queue_full'}, admission_stats['rejected'])
+        yield ('christophergpt_requests_rejected_total', 'counter', "Chat requests turned away with 503",
+               {'reason': 'queue_timeout'}, admission_stats['timed_out'])
+    breaker = bot.circuit_breaker.stats()
+    yield ('christophergpt_openai_circuit_open', 'gauge', "1 while the OpenAI circuit breaker is open or half-open",
+           {}, 0 if breaker['state'] == 'closed' else 1)
+    yield ('christophergpt_openai_circuit_opened_total', 'counter', "Times the OpenAI circuit breaker opened",
+           {}, breaker['times_opened'])
+
+METRICS.add_collector(collect_bot_metrics)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    labels = {'endpoint': request.endpoint or 'unknown'}
+    if 'persona' in g:
+        labels['persona'] = g.persona
+    METRICS.observe(REQUEST_METRIC, time.perf_counter() - g.request_started, **labels)
+    METRICS.inc('christophergpt_requests_total', status=response.status_code, **labels)
+    return response
+
+def timings_requested():
+    return request.headers.get(DEBUG_TIMING_HEADER, '').lower() in ('1', 'true', 'yes')
+
+def request_timings(timings):
+    """Stage breakdown of this request plus its total so far, in milliseconds"""
+    return {**timings, 'total_ms': round((time.perf_counter() - g.request_started) * 1000, 3)}
+
+@app.before_request
+def require_ready_bot():
+    """Answer API calls with 503 until ChristopherGPT has finished loading"""
+    if request.path.startswith('/api/') and request.path not in ('/api/status', '/api/metrics') and bot is None:
+        return jsonify({
+            'error': 'ChristopherGPT is still starting up, please retry shortly',
+            'readiness': bot_state['readiness'],
+            'success': False
+        }), 503
+
+@app.before_request
+def admit_request():
+    """
+    Give a chat request its deadline (REQUEST_DEADLINE_MS, or less if the client
+    sends X-Request-Deadline-Ms) and an in-flight slot; 503 when none frees up in time
+    """
+    if request.endpoint not in CHAT_ENDPOINTS:
+        return
+    deadline_ms = REQUEST_DEADLINE_MS
+    try:
+        deadline_ms = min(deadline_ms, float(request.headers.get(DEADLINE_HEADER, deadline_ms)))
+    except ValueError:
+        pass
+    g.deadline = Deadline(deadline_ms / 1000)
+    if admission is None:
+        return
+    try:
+        wait = admission.acquire(g.deadline)
+    except Overloaded as e:
+        return jsonify({'error': str(e), 'success': False}), 503, {'Retry-After': '1'}
+    g.admitted = True
+    METRICS.observe(ADMISSION_WAIT_METRIC, wait)
+
+@app.teardown_request
+def release_admission(error=None):
+    """Free the request's slot; a stream takes its slot over and frees it when it is closed"""
+    if g.pop('admitted', False):
+        admission.release()
+
+def request_data():
+    """JSON object body of the request, or None if it is missing or not an object"""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+def invalid_body():
+    return jsonify({'error': 'Request body must be a JSON object', 'success': False}), 400
+
+def persona_bot(persona):
+    """
+    ChristopherGPT instance for a persona named in the URL (the default one if
+    None), loading it on first use; None if there is no such persona
+    """
+    target = registry.get(persona)
+    if target is not None:
+        g.persona = target.persona.name
+    return target
+
+def log_request(endpoint, data, response, timings):
+    """Queue a request log record; never blocks on disk"""
+    if request_log is not None:
+        request_log.log(request_record(endpoint, data, response, timings, g.get('persona')))
+
+def unknown_persona(persona):
+    return jsonify({'error': f"Unknown persona '{persona}'", 'success': False}), 404
+
+def chat_payload(response):
+    """JSON body returned for a single chat response"""
+    payload = {
+        'answer': response['answer'],
+        'method': response['method'],
+        'relevant_facts': [fact['fact'] for fact in response['relevant_facts']],
+        'cache': response['cache'],
+        'prompt': response['prompt'],
+        'degraded': response.get('degraded'),
+        'success': True
+    }
+    if 'session_id' in response:
+        payload['session_id'] = response['session_id']
+    return payload
 
 @app.route('/')
 def index():
@@ -19,36 +278,332 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/chat', methods=['POST'])
-def chat():
-    """API endpoint for chat messages"""
+@app.route('/api/<persona>/chat', methods=['POST'])
+def chat(persona=None):
+    """API endpoint for chat messages, to the default persona unless one is named"""
     try:
-        data = request.get_json()
+        target = persona_bot(persona)
+        if target is None:
+            return unknown_persona(persona)
+        data = request_data()
+        if data is None:
+            return invalid_body()
         question = data.get('message', '').strip()
         
         if not question:
             return jsonify({'error': 'No message provided'}), 400
         
         # Get response from ChristopherGPT
-        response = bot.get_response(question)
+        with labelled(persona=g.persona), trace() as timings, deadline_scope(g.deadline):
+            response = target.get_response(question, filters=data.get('filters'),
+                                        session_id=data.get('session_id'))
         
-        return jsonify({
-            'answer': response['answer'],
-            'method': response['method'],
-            'relevant_facts': [fact['fact'] for fact in response['relevant_facts']],
+        log_request('chat', data, response, request_timings(timings))
+        payload = chat_payload(response)
+        if timings_requested():
+            payload['timings'] = request_timings(timings)
+        return jsonify(payload)
+        
+    except DeadlineExceeded as e:
+        return jsonify({'error': str(e), 'success': False}), 504
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
+@app.route('/api/chat/async', methods=['POST'])
+@app.route('/api/<persona>/chat/async', methods=['POST'])
+async def chat_async(persona=None):
+    """Async API endpoint for chat messages, using the shared async OpenAI client"""
+    try:
+        target = persona_bot(persona)
+        if target is None:
+            return unknown_persona(persona)
+        data = request_data()
+        if data is None:
+            return invalid_body()
+        question = data.get('message', '').strip()
+        
+        if not question:
+            return jsonify({'error': 'No message provided'}), 400
+        
+        with labelled(persona=g.persona), trace() as timings, deadline_scope(g.deadline):
+            response = await target.aget_response(question, filters=data.get('filters'),
+                                               session_id=data.get('session_id'))
+        
+        log_request('chat_async', data, response, request_timings(timings))
+        payload = chat_payload(response)
+        if timings_requested():
+            payload['timings'] = request_timings(timings)
+        return jsonify(payload)
+        
+    except DeadlineExceeded as e:
+        return jsonify({'error': str(e), 'success': False}), 504
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+@app.route('/api/<persona>/chat/stream', methods=['POST'])
+def chat_stream(persona=None):
+    """Streaming API endpoint: answer tokens are sent as Server-Sent Events"""
+    started = time.perf_counter()
+    target = persona_bot(persona)
+    if target is None:
+        return unknown_persona(persona)
+    persona_name = g.persona
+    data = request_data()
+    if data is None:
+        return invalid_body()
+    question = data.get('message')
+    filters = data.get('filters')
+    session_id = data.get('session_id')
+    include_stages = timings_requested()
+    deadline = g.deadline
+    
+    if not isinstance(question, str) or not question.strip():
+        return jsonify({'error': 'No message provided'}), 400
+    question = question.strip()
+    
+    # The stream takes over the request's slot. It is freed when the stream
+    # ends, or when the server closes the response (e.g. the client
+    # disconnected before the generator ever ran)
+    slot = {'held': g.pop('admitted', False)}
+    
+    def release_slot():
+        if slot['held']:
+            slot['held'] = False
+            admission.release()
+    
+    def generate():
+        first_token_at = None
+        meta = None
+        try:
+            with labelled(persona=persona_name), trace() as stages, deadline_scope(deadline):
+                for event in target.stream_response(question, filters=filters, session_id=session_id):
+                    if event['type'] == 'meta':
+                        meta = event
+                        yield sse_event('meta', {
+                            'method': event['method'],
+                            'relevant_facts': [fact['fact'] for fact in event['relevant_facts']]
+                        })
+                    elif event['type'] == 'token':
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        yield sse_event('token', {'text': event['text']})
+                    elif event['type'] == 'done':
+                        finished = time.perf_counter()
+                        timings = {
+                            'ttfb_ms': round(((first_token_at or finished) - started) * 1000, 1),
+                            'total_ms': round((finished - started) * 1000, 1)
+                        }
+                        log_request('chat_stream', data, {**meta, **event}, {**stages, **timings})
+                        if include_stages:
+                            timings['stages'] = dict(stages)
+                        print(f"⏱️  /api/chat/stream ttfb={timings['ttfb_ms']}ms total={timings['total_ms']}ms")
+                        done = {'answer': event['answer'], 'cache': event['cache'], 'prompt': event['prompt'],
+                                'degraded': event['degraded']}
+                        if 'session_id' in event:
+                            done['session_id'] = event['session_id']
+                        yield sse_event('done', {**done, **timings})
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+        finally:
+            release_slot()
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(release_slot)
+    return response
+
+@app.route('/api/chat/batch', methods=['POST'])
+@app.route('/api/<persona>/chat/batch', methods=['POST'])
+def chat_batch(persona=None):
+    """API endpoint for answering many messages in one request"""
+    try:
+        target = persona_bot(persona)
+        if target is None:
+            return unknown_persona(persona)
+        data = request_data()
+        if data is None:
+            return invalid_body()
+        messages = data.get('messages', [])
+        
+        if not isinstance(messages, list) or not messages:
+            return jsonify({'error': 'No messages provided'}), 400
+        
+        questions = [str(message).strip() for message in messages]
+        if not all(questions):
+            return jsonify({'error': 'Messages must not be empty'}), 400
+        
+        # Retrieve facts for every question in one batched pass
+        with labelled(persona=g.persona), trace() as timings, deadline_scope(g.deadline):
+            responses = target.get_responses(questions, filters=data.get('filters'))
+        
+        batch_timings = request_timings(timings)
+        for question, response in zip(questions, responses):
+            log_request('chat_batch', {**data, 'message': question}, response, batch_timings)
+        
+        payload = {
+            'responses': [
+                {
+                    'answer': response['answer'],
+                    'method': response['method'],
+                    'relevant_facts': [fact['fact'] for fact in response['relevant_facts']],
+                    'degraded': response.get('degraded')
+                }
+                for response in responses
+            ],
             'success': True
-        })
+        }
+        if timings_requested():
+            payload['timings'] = request_timings(timings)
+        return jsonify(payload)
         
+    except DeadlineExceeded as e:
+        return jsonify({'error': str(e), 'success': False}), 504
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
+@app.route('/api/sessions', methods=['POST'])
+@app.route('/api/<persona>/sessions', methods=['POST'])
+def create_session(persona=None):
+    """Start a conversation; pass the returned session_id with each chat message"""
+    target = persona_bot(persona)
+    if target is None:
+        return unknown_persona(persona)
+    session = target.sessions.create()
+    return jsonify({**session.info(), 'success': True}), 201
+
+@app.route('/api/sessions/<session_id>', methods=['GET'])
+@app.route('/api/<persona>/sessions/<session_id>', methods=['GET'])
+def get_session(session_id, persona=None):
+    """Turn counts and summary state of a conversation"""
+    target = persona_bot(persona)
+    if target is None:
+        return unknown_persona(persona)
+    session = target.sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session', 'success': False}), 404
+    return jsonify({**session.info(), 'success': True})
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+@app.route('/api/<persona>/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id, persona=None):
+    """End a conversation and free its memory"""
+    target = persona_bot(persona)
+    if target is None:
+        return unknown_persona(persona)
+    if not target.sessions.delete(session_id):
+        return jsonify({'error': 'Unknown or expired session', 'success': False}), 404
+    return jsonify({'success': True})
+
+def admin_authorized():
+    """ADMIN_TOKEN must be sent as X-Admin-Token; without one, only local requests are allowed"""
+    token = os.environ.get('ADMIN_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+@app.route('/api/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Rebuild the facts in the background and hot-swap them in without a restart
+    
+    Body (optional): {"source": "facts"} re-reads personal_data.py (default),
+    {"source": "store"} loads the on-disk embedding store as-is,
+    {"source": "answers"} loads a freshly built answer index.
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden', 'success': False}), 403
+    
+    data = request.get_json(silent=True) or {}
+    source = data.get('source', 'facts')
+    if source not in ('facts', 'store', 'answers'):
+        return jsonify({'error': "source must be 'facts', 'store' or 'answers'", 'success': False}), 400
+    
+    with reload_lock:
+        if reload_state['running']:
+            return jsonify({'error': 'A reload is already running', 'success': False}), 409
+        reload_state['running'] = True
+        reload_state['source'] = source
+    threading.Thread(target=run_reload, args=(source,), name="fact-reload", daemon=True).start()
+    
+    return jsonify({
+        'success': True,
+        'reloading': True,
+        'source': source,
+        'serving_version': bot.embedder.version
+    }), 202
+
+@app.route('/api/personas')
+def personas():
+    """Available and loaded personas, and their memory use against the budget"""
+    return jsonify({**registry.stats(), 'success': True})
+
+@app.route('/api/metrics')
+def metrics():
+    """Prometheus scrape endpoint: stage latencies, token usage, cache and request counters"""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+def serving_mode():
+    """
+    'overloaded' while chat requests queue for a slot, 'degraded' while the OpenAI
+    circuit breaker keeps requests on template answers, 'basic' without OpenAI,
+    otherwise 'normal'
+    """
+    if admission is not None and admission.waiting:
+        return 'overloaded'
+    if not bot.openai_available:
+        return 'basic'
+    if bot.circuit_breaker.state != 'closed':
+        return 'degraded'
+    return 'normal'
+
 @app.route('/api/status')
 def status():
     """API endpoint to check system status"""
+    if bot is None:
+        return jsonify({
+            'status': 'running',
+            'readiness': bot_state['readiness'],
+            'error': bot_state['error'],
+            'uptime_seconds': round(time.time() - bot_state['started_at'], 2),
+            'openai_available': False,
+            'embeddings_loaded': False
+        })
+    
     return jsonify({
         'status': 'running',
+        'readiness': bot_state['readiness'],
+        'ready_seconds': bot_state['ready_seconds'],
+        'mode': serving_mode(),
         'openai_available': bot.openai_available,
         'embeddings_loaded': bot.embedder.embeddings is not None,
-        'total_facts': len(bot.embedder.facts) if bot.embedder.facts else 0
+        'total_facts': len(bot.embedder.facts) if bot.embedder.facts else 0,
+        'categories': bot.embedder.categories(),
+        'snapshot': {**bot.embedder.snapshot_stats(), 'reload': reload_state},
+        'cache': bot.cache_stats(),
+        'sessions': bot.sessions.stats(),
+        'personas': registry.stats(),
+        'request_log': request_log.stats() if request_log else None,
+        'admission': {
+            **(admission.stats() if admission else {}),
+            'deadline_ms': REQUEST_DEADLINE_MS
+        },
+        'circuit_breaker': bot.circuit_breaker.stats(),
+        'openai_async': bot.async_llm.stats() if bot.async_llm else None,
+        'embedding_service': bot.embedder.encoder_stats()
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,173 @@
+"""
+Asynchronous OpenAI client for ChristopherGPT
+Runs one AsyncOpenAI client with a pooled HTTP connection on a dedicated
+event loop thread, so every caller (Flask async views, asyncio eval jobs,
+plain threads) shares the same keep-alive connections and concurrency limit.
+"""
+
+import asyncio
+import random
+import threading
+
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+
+from metrics import record_token_usage
+
+
+def is_retryable(error):
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying"""
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, APIConnectionError)  # includes APITimeoutError
+
+
+class AsyncChatClient:
+    def __init__(self, api_key, base_url=None, model="gpt-3.5-turbo", timeout=20.0,
+                 max_concurrency=32, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 max_connections=100):
+        """
+        Args:
+            api_key (str): OpenAI API key
+            base_url (str): API base URL, e.g. a local stub server
+            model (str): Chat model name
+            timeout (float): Default per-call timeout in seconds
+            max_concurrency (int): Maximum completions in flight at once
+            max_retries (int): Retries on 429/5xx/connection errors
+            backoff_base (float): First backoff ceiling in seconds, doubled per attempt
+            backoff_max (float): Upper bound for a single backoff
+            max_connections (int): Size of the shared HTTP connection pool
+        """
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.in_flight = 0
+        self.retries = 0
+        self.failures = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="openai-async", daemon=True)
+        self._thread.start()
+
+        async def _create_client():
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections),
+                timeout=timeout
+            )
+            # Retries are handled here so they share the semaphore and jittered backoff
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client,
+                                 max_retries=0, timeout=timeout)
+            return client, asyncio.Semaphore(max_concurrency)
+
+        self._client, self._semaphore = self._run(_create_client()).result()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential backoff, honoring Retry-After when the server sends it"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(self.backoff_max, float(retry_after)))
+            except ValueError:
+                pass
+        return delay
+
+    async def _complete(self, messages, timeout, deadline=None, **params):
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                for attempt in range(self.max_retries + 1):
+                    attempt_timeout = timeout or self.timeout
+                    if deadline is not None:
+                        if deadline.expired():
+                            self.failures += 1
+                            raise TimeoutError("Request deadline passed before the OpenAI call")
+                        attempt_timeout = min(attempt_timeout, deadline.remaining())
+                    try:
+                        response = await self._client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            timeout=attempt_timeout,
+                            **params
+                        )
+                        record_token_usage(response.usage)
+                        return response.choices[0].message.content.strip()
+                    except Exception as e:
+                        delay = self._backoff(attempt, e) if is_retryable(e) else None
+                        # No retry that could not finish before the deadline
+                        if (attempt == self.max_retries or delay is None
+                                or (deadline is not None and deadline.remaining() <= delay)):
+                            self.failures += 1
+                            raise
+                        self.retries += 1
+                        await asyncio.sleep(delay)
+            finally:
+                self.in_flight -= 1
+
+    async def complete(self, messages, timeout=None, deadline=None, **params):
+        """
+        Run a chat completion on the shared loop and await it from any event loop
+
+        Args:
+            messages (list): Chat messages
+            timeout (float): Per-call timeout in seconds, defaults to self.timeout
+            deadline (admission.Deadline): Request deadline; caps every attempt's
+                timeout and stops retries that would run past it
+            **params: Extra completion parameters (max_tokens, temperature, ...)
+
+        Returns:
+            str: The assistant's reply
+        """
+        return await asyncio.wrap_future(self._run(self._complete(messages, timeout, deadline, **params)))
+
+    def complete_sync(self, messages, timeout=None, deadline=None, **params):
+        """Blocking variant of complete() for code that is not running an event loop"""
+        return self._run(self._complete(messages, timeout, deadline, **params)).result()
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'retries': self.retries,
+            'failures': self.failures
+        }
+
+    def close(self):
+        """Close pooled connections and stop the loop thread"""
+        self._run(self._client.close()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from openai_stub import start_stub_server
+
+    # Fire concurrent completions at a local stub that injects latency and 429s
+    num_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    stub, stub_config, url = start_stub_server(latency_ms=300, jitter_ms=100, rate_limit=0.1)
+    client = AsyncChatClient(api_key="stub", base_url=url, max_concurrency=64, backoff_base=0.05)
+
+    async def main():
+        messages = [{"role": "user", "content": "What are Christopher's hobbies?"}]
+        return await asyncio.gather(*(client.complete(messages) for _ in range(num_requests)),
+                                    return_exceptions=True)
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    errors = sum(isinstance(result, Exception) for result in results)
+
+    print(f"{num_requests} completions in {elapsed:.2f}s ({num_requests / elapsed:.1f} req/s)")
+    print(f"stub requests: {stub_config.requests}, retries: {client.retries}, errors: {errors}")
+    client.close()
+    stub.shutdown()
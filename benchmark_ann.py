@@ -0,0 +1,85 @@
+"""
+Recall vs latency benchmark for the approximate (IVF) index
+Measures recall@k of IVFIndex against exact brute-force search for a range
+of nprobe values on a synthetic clustered corpus
+"""
+
+import sys
+import time
+import numpy as np
+from vector_index import BruteForceIndex, IVFIndex
+from vector_search import normalize_rows
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+TOP_K = 10
+
+
+def make_clustered_corpus(num_facts, num_topics=1000, dimension=DIMENSION, seed=0):
+    """Facts scattered around topic centers, closer to real sentence embeddings than pure noise"""
+    rng = np.random.default_rng(seed)
+    topics = normalize_rows(rng.standard_normal((num_topics, dimension), dtype=np.float32))
+    assignments = rng.integers(0, num_topics, num_facts)
+    noise = rng.standard_normal((num_facts, dimension), dtype=np.float32) * 0.05
+    return normalize_rows(topics[assignments] + noise)
+
+
+def make_queries(corpus, num_queries, seed=1):
+    """Queries are perturbed copies of random facts"""
+    rng = np.random.default_rng(seed)
+    picks = corpus[rng.choice(corpus.shape[0], num_queries, replace=False)]
+    noise = rng.standard_normal(picks.shape, dtype=np.float32) * 0.05
+    return normalize_rows(picks + noise)
+
+
+def measure(index, queries, **search_params):
+    """Run every query, returning result indices and per-query latency in ms"""
+    results = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        indices, _ = index.search(query, TOP_K, **search_params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(indices)
+    return results, np.array(latencies)
+
+
+def recall_at_k(approximate, exact):
+    """Fraction of the exact top-k that the approximate search also returned"""
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approximate, exact))
+    return hits / sum(len(e) for e in exact)
+
+
+def run_benchmark(num_facts, num_queries=200):
+    corpus = make_clustered_corpus(num_facts)
+    queries = make_queries(corpus, num_queries)
+
+    exact_index = BruteForceIndex(corpus)
+    exact_results, exact_latencies = measure(exact_index, queries)
+
+    start = time.perf_counter()
+    ivf_index = IVFIndex.build(corpus)
+    build_seconds = time.perf_counter() - start
+
+    print("=" * 66)
+    print(f"ANN BENCHMARK ({num_facts} facts, {ivf_index.n_lists} lists, "
+          f"recall@{TOP_K}, build {build_seconds:.1f}s)")
+    print("=" * 66)
+    print(f"{'backend':>12} | {'recall':>7} | {'p50 ms':>8} | {'p99 ms':>8} | {'speedup':>7}")
+    print("-" * 66)
+    exact_p50 = np.percentile(exact_latencies, 50)
+    print(f"{'exact':>12} | {1.0:>7.3f} | {exact_p50:>8.3f} | "
+          f"{np.percentile(exact_latencies, 99):>8.3f} | {1.0:>6.1f}x")
+
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        if nprobe > ivf_index.n_lists:
+            break
+        results, latencies = measure(ivf_index, queries, nprobe=nprobe)
+        p50 = np.percentile(latencies, 50)
+        print(f"{f'ivf/{nprobe}':>12} | {recall_at_k(results, exact_results):>7.3f} | {p50:>8.3f} | "
+              f"{np.percentile(latencies, 99):>8.3f} | {exact_p50 / p50:>6.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        run_benchmark(size)
@@ -0,0 +1,107 @@
+"""
+Load test for micro-batched question encoding
+Many threads encode one question each, either calling the model directly
+(the old per-request path) or going through BatchingEncoder / a running
+embedding service. Reports throughput and latency percentiles.
+
+Usage:
+    python benchmark_embedding_service.py                  # real MiniLM model
+    python benchmark_embedding_service.py --simulated      # cost model, no torch needed
+    python benchmark_embedding_service.py --address 127.0.0.1:6100
+"""
+
+import argparse
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from embedding_service import BatchingEncoder, RemoteEncoder
+
+QUESTIONS = [
+    "What are Christopher's hobbies?",
+    "Does Christopher like sports?",
+    "What does Christopher do for fun?",
+    "Is Christopher interested in business?",
+    "What watch brand is Christopher interested in?",
+    "What are Christopher's career goals?",
+]
+
+
+class SimulatedModel:
+    """Stand-in whose encode cost is a fixed per-call overhead plus a per-item cost,
+    with forward passes serialized like they are on one model copy"""
+
+    def __init__(self, call_ms=8.0, item_ms=0.4, dimension=384):
+        self.call_ms = call_ms
+        self.item_ms = item_ms
+        self.dimension = dimension
+        self.max_seq_length = 256
+        self._lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        with self._lock:
+            time.sleep((self.call_ms + self.item_ms * len(texts)) / 1000)
+        # Deterministic pseudo-random vector per text, so searches return stable results
+        return np.vstack([
+            np.random.default_rng(zlib.crc32(text.encode('utf-8'))).standard_normal(self.dimension, dtype=np.float32)
+            for text in texts
+        ]) if texts else np.empty((0, self.dimension), dtype=np.float32)
+
+
+def run_load(encoder, concurrency, num_requests):
+    """Encode num_requests single questions from `concurrency` threads"""
+    latencies = []
+
+    def one_request(i):
+        start = time.perf_counter()
+        encoder.encode([QUESTIONS[i % len(QUESTIONS)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one_request, range(num_requests)))
+    elapsed = time.perf_counter() - start
+    return num_requests / elapsed, np.array(latencies)
+
+
+def report(label, throughput, latencies):
+    print(f"{label:>22} | {throughput:>9.1f} | {np.percentile(latencies, 50):>8.2f} | "
+          f"{np.percentile(latencies, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--simulated', action='store_true', help="use a cost model instead of MiniLM")
+    parser.add_argument('--address', help="also load-test a running embedding service")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--window-ms', type=float, default=3.0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    if args.simulated:
+        model = SimulatedModel()
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer('all-MiniLM-L6-v2')
+    batching = BatchingEncoder(model, window_ms=args.window_ms)
+    remote = RemoteEncoder(args.address) if args.address else None
+
+    print("=" * 56)
+    print(f"EMBEDDING LOAD TEST ({args.requests} requests, window {args.window_ms}ms)")
+    print("=" * 56)
+    print(f"{'mode':>22} | {'req/s':>9} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 56)
+    for concurrency in args.concurrency:
+        report(f"direct x{concurrency}", *run_load(model, concurrency, args.requests))
+        report(f"micro-batched x{concurrency}", *run_load(batching, concurrency, args.requests))
+        if remote:
+            report(f"service x{concurrency}", *run_load(remote, concurrency, args.requests))
+    print(f"\nbatcher stats: {batching.stats()}")
@@ -0,0 +1,45 @@
+"""
+Memory, latency and accuracy benchmark for quantized fact storage
+Compares float16 and int8 (per-dimension scale) indexes against exact
+float32 search on a synthetic clustered corpus, with and without exact
+re-scoring of the candidates
+"""
+
+import sys
+import numpy as np
+from benchmark_ann import TOP_K, make_clustered_corpus, make_queries, measure, recall_at_k
+from vector_index import BruteForceIndex, Float16Index, Int8Index
+
+
+def run_benchmark(num_facts, num_queries=200, rescore_factors=(0, 4, 10)):
+    corpus = make_clustered_corpus(num_facts)
+    queries = make_queries(corpus, num_queries)
+
+    exact_index = BruteForceIndex(corpus)
+    exact_results, exact_latencies = measure(exact_index, queries)
+    exact_p50 = np.percentile(exact_latencies, 50)
+
+    print("=" * 78)
+    print(f"QUANTIZATION BENCHMARK ({num_facts} facts, top-{TOP_K} agreement with float32)")
+    print("=" * 78)
+    print(f"{'backend':>14} | {'MiB':>8} | {'agree':>6} | {'p50 ms':>8} | {'p99 ms':>8} | {'vs f32':>6}")
+    print("-" * 78)
+    print(f"{'float32':>14} | {corpus.nbytes / 2**20:>8.1f} | {1.0:>6.3f} | {exact_p50:>8.3f} | "
+          f"{np.percentile(exact_latencies, 99):>8.3f} | {1.0:>5.1f}x")
+
+    for index_cls in (Float16Index, Int8Index):
+        index = index_cls.build(corpus)
+        for rescore_factor in rescore_factors:
+            results, latencies = measure(index, queries, rescore_factor=rescore_factor)
+            p50 = np.percentile(latencies, 50)
+            label = f"{index.kind}/r{rescore_factor}" if rescore_factor else f"{index.kind}/raw"
+            print(f"{label:>14} | {index.nbytes / 2**20:>8.1f} | {recall_at_k(results, exact_results):>6.3f} | "
+                  f"{p50:>8.3f} | {np.percentile(latencies, 99):>8.3f} | {exact_p50 / p50:>5.1f}x")
+    print("(MiB is the matrix scanned per query; re-scoring reads only "
+          "top_k * factor float32 rows)\n")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        run_benchmark(size)
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark for fact retrieval latency
+Compares the previous per-query normalize + full argsort path with the
+pre-normalized dot product + argpartition path used by ChristopherEmbeddings
+"""
+
+import sys
+import time
+from functools import partial
+import numpy as np
+from vector_search import normalize_rows, search, search_batch
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+TOP_K = 3
+
+
+def make_corpus(num_facts, dimension=DIMENSION, seed=0):
+    """Generate a random fact matrix the same shape as real MiniLM embeddings"""
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((num_facts, dimension), dtype=np.float32)
+
+
+def legacy_search(raw_matrix, query, top_k):
+    """The old path: re-normalize the whole corpus per query, then argsort every score"""
+    matrix_norms = np.linalg.norm(raw_matrix, axis=1)
+    scores = (raw_matrix @ query) / (matrix_norms * np.linalg.norm(query))
+    indices = np.argsort(scores)[::-1][:top_k]
+    return indices, scores[indices]
+
+
+def time_queries(fn, queries):
+    """Return per-query latencies in milliseconds"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def run_benchmark(sizes, num_queries=20):
+    """Benchmark both search paths for each corpus size"""
+    print("=" * 70)
+    print(f"RETRIEVAL BENCHMARK (dim={DIMENSION}, top_k={TOP_K}, queries={num_queries})")
+    print("=" * 70)
+    print(f"{'facts':>10} | {'legacy p50 ms':>14} | {'new p50 ms':>11} | {'new p95 ms':>11} | {'speedup':>7}")
+    print("-" * 70)
+
+    rng = np.random.default_rng(1)
+    for size in sizes:
+        raw = make_corpus(size)
+        normalized = normalize_rows(raw)
+        queries = rng.standard_normal((num_queries, DIMENSION), dtype=np.float32)
+        normalized_queries = normalize_rows(queries)
+
+        # Sanity check: both paths must agree on the results
+        legacy_top, _ = legacy_search(raw, queries[0], TOP_K)
+        new_top, _ = search(normalized, normalized_queries[0], TOP_K)
+        assert list(legacy_top) == list(new_top), "search paths disagree"
+
+        legacy = time_queries(partial(legacy_search, raw, top_k=TOP_K), queries)
+        new = time_queries(partial(search, normalized, top_k=TOP_K), normalized_queries)
+
+        legacy_p50 = np.percentile(legacy, 50)
+        new_p50 = np.percentile(new, 50)
+        print(f"{size:>10} | {legacy_p50:>14.3f} | {new_p50:>11.3f} | "
+              f"{np.percentile(new, 95):>11.3f} | {legacy_p50 / new_p50:>6.1f}x")
+
+        del raw, normalized
+
+
+def run_batch_benchmark(num_facts=100_000, num_queries=512):
+    """Compare one-at-a-time search with batched matrix-multiply search"""
+    rng = np.random.default_rng(2)
+    normalized = normalize_rows(make_corpus(num_facts))
+    queries = normalize_rows(rng.standard_normal((num_queries, DIMENSION), dtype=np.float32))
+
+    start = time.perf_counter()
+    for query in queries:
+        search(normalized, query, TOP_K)
+    looped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    search_batch(normalized, queries, TOP_K)
+    batched = time.perf_counter() - start
+
+    print()
+    print(f"BATCH SEARCH ({num_queries} questions x {num_facts} facts)")
+    print("-" * 70)
+    print(f"one at a time: {num_queries / looped:>10.0f} questions/sec")
+    print(f"batched:       {num_queries / batched:>10.0f} questions/sec ({looped / batched:.1f}x)")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    run_benchmark(sizes)
+    run_batch_benchmark()
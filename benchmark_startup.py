@@ -0,0 +1,77 @@
+"""
+Startup-time measurement for the ChristopherGPT web server
+Launches app.py in a subprocess and reports how long it takes until the
+port answers /api/status and until the server reports it is ready
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import():
+    """Seconds spent importing app.py (before: included model load and embedding sync)"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import app, os; os._exit(0)'],
+                   check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def measure_server(timeout=300):
+    """Seconds until /api/status responds, and until it reports readiness=ready"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG='false')
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'app.py'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    first_response = None
+    ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                print(f"❌ Server exited with code {server.returncode}")
+                break
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/status', timeout=1) as response:
+                    status = json.load(response)
+                if first_response is None:
+                    first_response = time.perf_counter() - start
+                if status.get('readiness', 'ready') == 'ready':
+                    ready = time.perf_counter() - start
+                    break
+                if status.get('readiness') == 'error':
+                    print(f"❌ Server failed to load: {status.get('error')}")
+                    break
+            except OSError:
+                pass
+            time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return first_response, ready
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print("=" * 60)
+    print("STARTUP BENCHMARK")
+    print("=" * 60)
+    for run in range(1, runs + 1):
+        import_seconds = measure_import()
+        first_response, ready = measure_server()
+        print(f"run {run}: import app {import_seconds:.2f}s | "
+              f"/api/status answering {first_response or float('nan'):.2f}s | "
+              f"ready {ready or float('nan'):.2f}s")
@@ -0,0 +1,377 @@
+"""
+Benchmark suite for ChristopherGPT
+Generates a synthetic fact corpus of configurable size and measures:
+    encode   fact encoding throughput
+    search   find_relevant_facts latency percentiles
+    store    embedding store save / load time
+    chat     /api/chat throughput and latency under concurrent load, with
+             OpenAI replaced by the local stub (configurable latency)
+
+Results are written as JSON. Given a baseline file from an earlier run, any
+metric that got worse by more than the tolerance fails the run (exit code 1).
+
+Usage:
+    python benchmark_suite.py --facts 20000 --output baseline.json
+    python benchmark_suite.py --facts 20000 --output new.json --baseline baseline.json --tolerance 0.2
+    python benchmark_suite.py --simulated --only search store   # cost model, no torch needed
+"""
+
+import argparse
+import json
+import os
+import platform
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmark_embedding_service import SimulatedModel
+from embedding_store import FactMetadata
+from embeddings import ChristopherEmbeddings
+from personal_data import FACT_SECTIONS
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SECTIONS = ('encode', 'search', 'store', 'chat')
+
+VERBS = ["enjoys", "is learning", "has experience with", "wants to explore", "writes about",
+         "is curious about", "teaches friends", "builds projects with", "reads about", "talks about"]
+TOPICS = ["Python", "Rust", "machine learning", "startups", "chess", "photography", "hiking",
+          "databases", "compilers", "robotics", "watches", "cooking", "jazz", "marketing",
+          "distributed systems", "web design", "statistics", "running", "public speaking", "finance"]
+DETAILS = ["on weekends", "at university", "with classmates", "in the evenings", "for fun",
+           "every summer", "as a side project", "since high school", "with his family", "online"]
+QUESTION_STARTS = ["Does Christopher", "What does Christopher think about", "Is Christopher into",
+                   "How often does Christopher do", "Tell me whether Christopher likes"]
+
+
+def make_fact_records(num_facts, seed=0):
+    """Synthetic fact records spread over the personal_data categories"""
+    rng = np.random.default_rng(seed)
+    categories = list(FACT_SECTIONS)
+    picks = rng.integers(0, [len(VERBS), len(TOPICS), len(DETAILS), len(categories)], size=(num_facts, 4))
+    return [
+        {
+            'fact': f"Christopher {VERBS[v]} {TOPICS[t]} {DETAILS[d]} (note {i})",
+            'category': categories[c],
+            'source': 'synthetic',
+            'timestamp': 1_700_000_000 + i
+        }
+        for i, (v, t, d, c) in enumerate(picks)
+    ]
+
+
+def make_questions(num_questions, seed=1):
+    """Distinct synthetic questions, so caches do not hide retrieval cost"""
+    rng = np.random.default_rng(seed)
+    return [
+        f"{QUESTION_STARTS[rng.integers(len(QUESTION_STARTS))]} "
+        f"{TOPICS[rng.integers(len(TOPICS))]} {DETAILS[rng.integers(len(DETAILS))]} #{i}?"
+        for i in range(num_questions)
+    ]
+
+
+def summarize(latencies_ms):
+    latencies_ms = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        'mean_ms': round(float(latencies_ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3)
+    }
+
+
+def load_model(simulated):
+    if simulated:
+        return SimulatedModel()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+
+def bench_encode(model, facts, batch_size=64):
+    """Facts encoded per second in one bulk encode call"""
+    start = time.perf_counter()
+    embeddings = model.encode(facts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return embeddings, {'facts_per_second': round(len(facts) / elapsed, 1), 'seconds': round(elapsed, 3)}
+
+
+def bench_store(embedder, embeddings, records):
+    """Time to write the store, memory-map it, and have the embedder ready to search"""
+    facts = [record['fact'] for record in records]
+    start = time.perf_counter()
+    embedder.store.save(embeddings, facts, embedder.model_name, embedder.model_fingerprint(),
+                        metadata=FactMetadata.from_records(records))
+    save_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embedder.store.load()
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embedder.load_embeddings()
+    ready_seconds = time.perf_counter() - start
+
+    return {
+        'save_seconds': round(save_seconds, 4),
+        'load_seconds': round(load_seconds, 4),
+        'ready_seconds': round(ready_seconds, 4)
+    }
+
+
+def bench_search(embedder, questions, top_k=3):
+    """Latency of find_relevant_facts, question encoding included, caches cold"""
+    for question in questions[:10]:
+        embedder.find_relevant_facts(question, top_k)
+    embedder.question_cache.clear()
+    embedder.fact_cache.clear()
+
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        embedder.find_relevant_facts(question, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'queries': len(questions), **summarize(latencies)}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(server, port, timeout=300):
+    """Poll /api/status until the bot has loaded"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"app.py exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/status', timeout=1) as response:
+                status = json.load(response)
+            if status.get('readiness', 'ready') == 'ready':
+                return
+            if status.get('readiness') == 'error':
+                raise RuntimeError(f"Server failed to load: {status.get('error')}")
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError("app.py did not become ready in time")
+
+
+def post_chat(port, question):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}/api/chat',
+        data=json.dumps({'message': question}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.load(response)
+
+
+def bench_chat(args, workdir):
+    """
+    Concurrent /api/chat load against app.py running in a subprocess
+
+    OpenAI is the local stub. With --simulated, the server encodes through an
+    in-process embedding service backed by the cost model.
+    """
+    from openai_stub import start_stub_server
+
+    stub, stub_config, base_url = start_stub_server(latency_ms=args.stub_latency,
+                                                     jitter_ms=args.stub_latency * 0.1)
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG='false', OPENAI_API_KEY='stub',
+               OPENAI_BASE_URL=base_url, SEMANTIC_CACHE_THRESHOLD='2')  # threshold > 1: no semantic hits
+
+    if args.simulated:
+        from embedding_service import AUTHKEY_ENV, EmbeddingServer
+        authkey = secrets.token_hex(16)
+        service = EmbeddingServer(('127.0.0.1', 0), authkey=authkey, model=SimulatedModel())
+        threading.Thread(target=service.serve_forever, daemon=True).start()
+        host, service_port = service.listener.address
+        env['EMBEDDING_SERVICE'] = f'{host}:{service_port}'
+        env[AUTHKEY_ENV] = authkey
+
+    # Run from an empty directory so the benchmark never touches the real store
+    server = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, 'app.py')], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(server, port)
+        for question in make_questions(5, seed=3):
+            post_chat(port, question)  # warm-up
+
+        latencies = []
+        failures = {'errors': 0, 'fallbacks': 0}
+        lock = threading.Lock()
+
+        def one_request(question):
+            start = time.perf_counter()
+            try:
+                payload = post_chat(port, question)
+            except OSError:
+                with lock:
+                    failures['errors'] += 1
+                return
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+                if payload.get('method') != 'openai':
+                    failures['fallbacks'] += 1
+
+        questions = make_questions(args.chat_requests, seed=2)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(one_request, questions))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+        stub.shutdown()
+
+    return {
+        'requests_per_second': round(len(questions) / elapsed, 2),
+        **(summarize(latencies) if latencies else {}),
+        **failures
+    }
+
+
+def run_suite(args):
+    metrics = {}
+    sections = set(args.only or SECTIONS)
+
+    with tempfile.TemporaryDirectory(prefix='christophergpt-bench-') as workdir:
+        if sections & {'encode', 'search', 'store'}:
+            model = load_model(args.simulated)
+            records = make_fact_records(args.facts)
+            facts = [record['fact'] for record in records]
+
+            print(f"📏 Encoding {len(facts)} synthetic facts...")
+            embeddings, encode_metrics = bench_encode(model, facts)
+            if 'encode' in sections:
+                metrics['encode'] = encode_metrics
+
+            embedder = ChristopherEmbeddings(
+                store_path=os.path.join(workdir, 'store'),
+                index_type=args.index,
+                retrieval_mode=args.retrieval_mode
+            )
+            embedder._model = model  # reuse the loaded (or simulated) encoder
+            store_metrics = bench_store(embedder, embeddings, records)
+            if 'store' in sections:
+                metrics['store'] = store_metrics
+            if 'search' in sections:
+                print(f"🔎 Running {args.queries} find_relevant_facts queries...")
+                metrics['search'] = bench_search(embedder, make_questions(args.queries))
+
+        if 'chat' in sections:
+            print(f"💬 Sending {args.chat_requests} /api/chat requests ({args.concurrency} concurrent)...")
+            chat_dir = os.path.join(workdir, 'chat')
+            os.makedirs(chat_dir)
+            metrics['chat'] = bench_chat(args, chat_dir)
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'facts': args.facts,
+            'queries': args.queries,
+            'index': args.index,
+            'retrieval_mode': args.retrieval_mode,
+            'chat_requests': args.chat_requests,
+            'concurrency': args.concurrency,
+            'stub_latency_ms': args.stub_latency,
+            'simulated': args.simulated,
+            'sections': sorted(sections)
+        },
+        'metrics': metrics
+    }
+
+
+def _flatten(metrics):
+    return {
+        f'{section}.{name}': value
+        for section, values in metrics.items()
+        for name, value in values.items()
+        if isinstance(value, (int, float))
+    }
+
+
+def compare(results, baseline, tolerance, noise_floor_ms=1.0):
+    """
+    Compare metrics against a baseline run
+
+    Throughputs (*_per_second) must not drop, and latencies and durations
+    (*_ms, *_seconds) must not rise, by more than `tolerance` (a fraction).
+    Timing changes smaller than noise_floor_ms never count, so millisecond
+    measurements do not flap. Error counts must not exceed the baseline.
+
+    Returns:
+        list: (metric, baseline value, current value, relative change) of regressions
+    """
+    if results['config'] != baseline['config']:
+        print(f"⚠️  Baseline was run with a different configuration: {baseline['config']}")
+    current, previous = _flatten(results['metrics']), _flatten(baseline['metrics'])
+    regressions = []
+    print(f"{'metric':>28} | {'baseline':>10} | {'current':>10} | {'change':>8}")
+    print("-" * 66)
+    for name in sorted(current.keys() & previous.keys()):
+        old, new = previous[name], current[name]
+        change = (new - old) / old if old else 0.0
+        if name.endswith('_per_second'):
+            regressed = change < -tolerance
+        elif name.endswith(('_ms', '_seconds')):
+            delta_ms = (new - old) * (1 if name.endswith('_ms') else 1000)
+            regressed = change > tolerance and delta_ms > noise_floor_ms
+        elif name.endswith(('errors', 'fallbacks')):
+            regressed = new > old
+        else:
+            continue
+        print(f"{name:>28} | {old:>10.3f} | {new:>10.3f} | {change:>+7.1%}{'  ❌' if regressed else ''}")
+        if regressed:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facts', type=int, default=10_000, help="synthetic corpus size")
+    parser.add_argument('--queries', type=int, default=500, help="find_relevant_facts calls to time")
+    parser.add_argument('--index', default='exact', help="search backend (exact, ivf, float16, int8)")
+    parser.add_argument('--retrieval-mode', default='dense', choices=['dense', 'hybrid'])
+    parser.add_argument('--chat-requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--stub-latency', type=float, default=200, help="stub OpenAI latency in ms")
+    parser.add_argument('--simulated', action='store_true', help="use a cost model instead of MiniLM")
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, help="run only these sections")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--baseline', help="results JSON of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    print(json.dumps(results['metrics'], indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print("✅ No regressions")
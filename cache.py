@@ -0,0 +1,199 @@
+"""
+Caching helpers for ChristopherGPT
+Bounded, thread-safe caches used to skip repeated question encoding,
+similarity search and OpenAI round trips
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+def normalize_question(question):
+    """Canonical form of a question used as a cache key (case, spacing, trailing punctuation)"""
+    return ' '.join(question.lower().split()).rstrip(' ?!.')
+
+
+def filter_key(filters):
+    """Hashable, order-independent form of a fact filter dict for cache keys"""
+    if not filters:
+        return ()
+    return tuple(sorted(
+        (name, tuple(value) if isinstance(value, (list, tuple)) else value)
+        for name, value in filters.items()
+    ))
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=None):
+        """
+        Least-recently-used cache with an optional time-to-live
+
+        Args:
+            maxsize (int): Maximum number of entries kept
+            ttl (float): Seconds an entry stays valid, None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it recently used, or default on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (hit/miss counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters for monitoring, e.g. on /api/status"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class SemanticAnswerCache:
+    def __init__(self, maxsize=512, threshold=0.92, ttl=None):
+        """
+        Answer cache keyed by question-embedding similarity
+
+        A new question reuses a stored answer when its embedding is at least
+        `threshold` cosine-similar to a previously answered question and the
+        retrieval step picked the same set of facts.
+
+        Args:
+            maxsize (int): Maximum number of answered questions kept
+            threshold (float): Minimum cosine similarity for a hit
+            ttl (float): Seconds an entry stays valid, None for no expiry
+        """
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vectors = None  # allocated on first add, once the dimension is known
+        self._entries = [None] * maxsize  # slot -> entry dict
+        self._last_used = np.full(maxsize, -np.inf)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_similarities = deque(maxlen=1000)
+
+    def lookup(self, embedding, fact_ids, key=None):
+        """
+        Find a stored answer for a similar question with the same facts
+
+        Args:
+            embedding (np.ndarray): Unit-length question embedding
+            fact_ids (Iterable): Hashable ids of the facts retrieved for the question,
+                stable across snapshots (e.g. row id plus content hash)
+            key (hashable): Extra context that must match, e.g. the personality
+
+        Returns:
+            dict: {'answer', 'similarity', 'question'} on a hit, otherwise None
+        """
+        fact_ids = frozenset(fact_ids)
+        now = time.monotonic()
+        with self._lock:
+            if self._size:
+                scores = self._vectors[:self._size] @ embedding
+                candidates = np.flatnonzero(scores >= self.threshold)
+                for slot in candidates[np.argsort(scores[candidates])[::-1]]:
+                    entry = self._entries[slot]
+                    if entry['expires_at'] is not None and entry['expires_at'] <= now:
+                        self._last_used[slot] = -np.inf  # reuse this slot first
+                        continue
+                    if entry['fact_ids'] == fact_ids and entry['key'] == key:
+                        similarity = float(scores[slot])
+                        self._last_used[slot] = now
+                        self.hits += 1
+                        self._hit_similarities.append(similarity)
+                        return {'answer': entry['answer'], 'similarity': similarity,
+                                'question': entry['question']}
+            self.misses += 1
+            return None
+
+    def add(self, embedding, fact_ids, answer, question=None, key=None):
+        """Store an answer, replacing the least recently used entry when full"""
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.maxsize, embedding.shape[0]), dtype=np.float32)
+            if self._size < self.maxsize:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._vectors[slot] = embedding
+            self._entries[slot] = {
+                'answer': answer,
+                'fact_ids': frozenset(fact_ids),
+                'key': key,
+                'question': question,
+                'expires_at': now + self.ttl if self.ttl is not None else None
+            }
+            self._last_used[slot] = now
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries = [None] * self.maxsize
+            self._last_used[:] = -np.inf
+            self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def stats(self):
+        """Counters plus the similarity of recent hits, for tuning the threshold"""
+        lookups = self.hits + self.misses
+        similarities = list(self._hit_similarities)
+        return {
+            'size': self._size,
+            'maxsize': self.maxsize,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'hit_similarity_min': round(min(similarities), 4) if similarities else None,
+            'hit_similarity_mean': round(sum(similarities) / len(similarities), 4) if similarities else None
+        }
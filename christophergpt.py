@@ -3,41 +3,197 @@ ChristopherGPT - AI assistant trained on Christopher's personal data
 Main class for the conversational AI system
 """
 
+import asyncio
+import hashlib
+import json
 import os
-from openai import OpenAI
+import time
+from admission import CircuitBreaker, current_deadline
+from answer_index import AnswerIndex
+from cache import LRUCache, SemanticAnswerCache, normalize_question
 from embeddings import ChristopherEmbeddings
-from personal_data import get_personality_traits
+from metrics import DEGRADED_METRIC, METRICS, OPENAI_ERRORS_METRIC, PROMPT_TOKENS_METRIC, record_token_usage, span
+from personas import Persona
+from prompt_builder import PromptBuilder, TokenCounter
+from sessions import SessionStore
 
 class ChristopherGPT:
-    def __init__(self):
-        """Initialize ChristopherGPT with embeddings and optional OpenAI integration"""
-        print("🤖 Initializing ChristopherGPT...")
+    COMPLETION_PARAMS = {"max_tokens": 200, "temperature": 0.7}
+    
+    def __init__(self, answer_cache_size=1024, answer_cache_ttl=3600, semantic_cache_threshold=None,
+                 persona=None, encoder=None, openai_clients=None, circuit_breaker=None):
+        """
+        Initialize ChristopherGPT with embeddings and optional OpenAI integration
+        
+        Args:
+            answer_cache_size (int): Maximum number of OpenAI answers kept in memory
+            answer_cache_ttl (float): Seconds a cached answer stays valid
+            semantic_cache_threshold (float): Question similarity needed to reuse an
+                answer to a paraphrase, defaults to SEMANTIC_CACHE_THRESHOLD or 0.92
+            persona (Persona): Who to answer as, defaults to Christopher from personal_data.py
+            encoder: Loaded embedding model to share instead of loading another
+            openai_clients (tuple): (OpenAI client, AsyncChatClient) to share instead
+                of creating new ones; (None, None) when OpenAI is unavailable
+            circuit_breaker (CircuitBreaker): Breaker guarding those clients, shared
+                along with them
+        """
+        self.persona = persona or Persona()
+        print(f"🤖 Initializing ChristopherGPT ({self.persona.name})...")
+        
+        # (question, fact ids, personality) -> OpenAI answer; cleared when facts change
+        self.answer_cache = LRUCache(answer_cache_size, answer_cache_ttl)
         
-        # Initialize embeddings system
-        self.embedder = ChristopherEmbeddings()
+        # Paraphrases of answered questions that retrieve the same facts reuse the answer
+        if semantic_cache_threshold is None:
+            semantic_cache_threshold = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92'))
+        self.semantic_cache = SemanticAnswerCache(answer_cache_size, semantic_cache_threshold, answer_cache_ttl)
         
-        # Try to load existing embeddings, create if they don't exist
-        if not self.embedder.load_embeddings():
-            print("Creating new embeddings...")
-            self.embedder.create_embeddings()
-            self.embedder.save_embeddings()
+        # Initialize embeddings system (search backend and dense/hybrid retrieval from the environment)
+        self.embedder = ChristopherEmbeddings(
+            index_type=os.getenv('EMBEDDING_INDEX', 'exact'),
+            encoder_address=os.getenv('EMBEDDING_SERVICE') or None,
+            batch_window_ms=float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '0')),
+            retrieval_mode=os.getenv('RETRIEVAL_MODE', 'dense'),
+            lexical_prefilter=int(os.getenv('LEXICAL_PREFILTER', '0')),
+            store_path=self.persona.store_path,
+            model=encoder,
+            fact_source=self.persona.fact_records,
+            legacy_embeddings_file=self.persona.legacy_embeddings_file
+        )
+        
+        self.embedder.add_change_listener(self.answer_cache.clear)
+        self.embedder.add_change_listener(self.semantic_cache.clear)
+        
+        # Load stored embeddings, re-encoding only facts that were added or changed
+        self._sync_facts()
+        
+        # Optionally hot-swap facts committed to the store by other processes (e.g. ingest.py)
+        watch_interval = float(os.getenv('STORE_WATCH_INTERVAL', '0'))
+        if watch_interval > 0:
+            self.embedder.watch_store(watch_interval)
         
         # Initialize OpenAI if API key is available
+        self.openai_model = "gpt-3.5-turbo"
+        self.openai_timeout = float(os.getenv('OPENAI_TIMEOUT', '20'))
         self.openai_client = None
         self.openai_available = False
-        self._setup_openai()
+        if openai_clients is None:
+            self._setup_openai()
+        else:
+            self.openai_client, self.async_llm = openai_clients
+            self.openai_available = self.openai_client is not None
+        
+        # Template answers instead of waiting on OpenAI while it fails or is slow, or
+        # when the request's deadline leaves too little time for a completion
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            window=int(os.getenv('CIRCUIT_WINDOW', '50')),
+            min_calls=int(os.getenv('CIRCUIT_MIN_CALLS', '10')),
+            failure_rate=float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5')),
+            slow_call_seconds=float(os.getenv('CIRCUIT_SLOW_CALL_MS', '5000')) / 1000,
+            slow_call_rate=float(os.getenv('CIRCUIT_SLOW_CALL_RATE', '0.5')),
+            cooldown=float(os.getenv('CIRCUIT_COOLDOWN', '15'))
+        )
+        self.openai_min_budget = float(os.getenv('OPENAI_MIN_BUDGET_MS', '500')) / 1000
+        
+        # Prompt size limits; the persona block is rebuilt only when the personality changes
+        self.token_counter = TokenCounter(self.openai_model)
+        self.prompt_fact_token_budget = int(os.getenv('PROMPT_FACT_TOKEN_BUDGET', '300'))
+        self.prompt_min_similarity = float(os.getenv('PROMPT_MIN_SIMILARITY', '0.2'))
+        self.prompt_history_token_budget = int(os.getenv('PROMPT_HISTORY_TOKEN_BUDGET', '400'))
         
         # Get personality traits
-        self.personality = get_personality_traits()
+        self._set_personality(self.persona.personality_traits())
+        
+        # Multi-turn conversations, bounded per session and in total
+        self.session_context_weight = float(os.getenv('SESSION_CONTEXT_WEIGHT', '0.3'))
+        use_llm_summaries = os.getenv('SESSION_SUMMARIZER') == 'openai' and self.openai_available
+        self.sessions = SessionStore(
+            max_sessions=int(os.getenv('SESSION_MAX', '10000')),
+            idle_ttl=float(os.getenv('SESSION_IDLE_TTL', '1800')),
+            max_turns=int(os.getenv('SESSION_MAX_TURNS', '6')),
+            max_tokens=int(os.getenv('SESSION_MAX_TOKENS', '600')),
+            counter=self.token_counter,
+            summarizer=self._summarize_turns if use_llm_summaries else None
+        )
+        
+        # Precomputed answers to frequent questions (see answer_index.py), dropped when the facts change
+        self.answer_index = None
+        self.answer_index_threshold = float(os.getenv('ANSWER_INDEX_THRESHOLD', '0.9'))
+        self.load_answer_index()
+        self.embedder.add_change_listener(self._validate_answer_index)
         
         print("✅ ChristopherGPT ready!")
     
+    def _set_personality(self, personality):
+        self.personality = personality
+        self._personality_key = hashlib.sha1(
+            json.dumps(personality, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        self.prompt_builder = PromptBuilder(
+            personality,
+            fact_token_budget=self.prompt_fact_token_budget,
+            min_similarity=self.prompt_min_similarity,
+            history_token_budget=self.prompt_history_token_budget,
+            counter=self.token_counter,
+            name=self.persona.display_name,
+            system_message=self.persona.system_message
+        )
+    
+    def _sync_facts(self):
+        """Sync the persona's facts into its store, or load the store as-is if it defines none"""
+        records = self.persona.fact_records()
+        if records is not None:
+            self.embedder.sync_embeddings(records)
+        elif not self.embedder.load_embeddings():
+            raise ValueError(f"Persona '{self.persona.name}' has no facts and no embedding store at {self.embedder.store.path}")
+    
+    def reload_facts(self, from_store=False):
+        """
+        Update the facts being answered from without restarting
+        
+        By default the persona is re-read (personal_data.py is re-imported), so
+        edits to its facts and personality take effect, and only new or changed
+        facts are encoded.
+        With from_store the on-disk store (e.g. one filled by ingest.py) is
+        swapped in as-is. Queries keep using the previous snapshot until the
+        new one is ready.
+        
+        Args:
+            from_store (bool): Load the store instead of syncing the persona's facts
+            
+        Returns:
+            dict: Stats of the snapshot now being served
+        """
+        if from_store:
+            if not self.embedder.load_embeddings():
+                raise ValueError(f"No usable embedding store at {self.embedder.store.path}")
+        else:
+            self.persona.reload()
+            self._sync_facts()
+            self._set_personality(self.persona.personality_traits())
+            self._validate_answer_index()
+        return self.embedder.snapshot_stats()
+    
     def _setup_openai(self):
-        """Setup OpenAI client if API key is available"""
+        """Setup OpenAI clients (sync and shared async) if API key is available"""
         api_key = os.getenv('OPENAI_API_KEY')
+        base_url = os.getenv('OPENAI_BASE_URL') or None
+        timeout = self.openai_timeout
+        self.async_llm = None
         if api_key:
             try:
-                self.openai_client = OpenAI(api_key=api_key)
+                # Deferred imports: the OpenAI SDK is only needed when a key is configured
+                from openai import OpenAI
+                from async_llm import AsyncChatClient
+                
+                self.openai_client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
+                self.async_llm = AsyncChatClient(
+                    api_key=api_key,
+                    base_url=base_url,
+                    model=self.openai_model,
+                    timeout=timeout,
+                    max_concurrency=int(os.getenv('OPENAI_MAX_CONCURRENCY', '32'))
+                )
                 self.openai_available = True
                 print("✅ OpenAI API configured")
             except Exception as e:
@@ -45,7 +201,85 @@ class ChristopherGPT:
         else:
             print("⚠️  OpenAI API key not found in environment variables")
     
-    def get_response(self, question, use_openai=True, top_k=3):
+    def answer_index_fingerprint(self):
+        """Identity of what answers depend on: the served facts and the personality"""
+        return hashlib.sha1(
+            f"{self.embedder.fact_fingerprint()}:{self._personality_key}".encode('utf-8')
+        ).hexdigest()
+    
+    def load_answer_index(self, path=None):
+        """
+        Serve precomputed answers from an index built by answer_index.py
+        
+        Args:
+            path (str): Index directory, defaults to the persona's answer_index_path
+            
+        Returns:
+            bool: Whether the index matches the current facts and was loaded
+        """
+        path = path or self.persona.answer_index_path
+        index = AnswerIndex.load(path)
+        if index is None:
+            return False
+        if index.fingerprint != self.answer_index_fingerprint():
+            print(f"⚠️  Answer index at {path} was built for different facts, ignoring it")
+            return False
+        self.answer_index = index
+        print(f"✅ Answer index loaded: {len(index)} precomputed answers")
+        return True
+    
+    def _validate_answer_index(self):
+        """Drop the answer index once the facts or personality it was built from change"""
+        index = self.answer_index
+        if index is not None and index.fingerprint != self.answer_index_fingerprint():
+            self.answer_index = None
+            print("♻️  Facts changed, precomputed answers invalidated")
+    
+    def _precomputed_response(self, question, use_openai, top_k, filters, session, question_embedding=None):
+        """
+        Response from the answer index if the question is close enough to an answered one
+        
+        Only requests shaped like the ones the index was built with can hit: no
+        filters, the same top_k and answer method, and no earlier conversation.
+        
+        Returns:
+            dict: Response with answer and metadata, or None on a miss
+        """
+        index = self.answer_index
+        if index is None or filters or top_k != index.top_k:
+            return None
+        method = "openai" if (use_openai and self.openai_available) else "basic"
+        if method != index.method or (session is not None and self._has_history(session.history())):
+            return None
+        with span('answer_index'):
+            if question_embedding is None:
+                question_embedding = self.embedder.embed_question(question)
+            hit = index.lookup(question_embedding, self.answer_index_threshold)
+        if hit is None:
+            return None
+        entry, similarity, matched_question = hit
+        return {
+            "answer": entry['answer'],
+            "relevant_facts": entry['relevant_facts'],
+            "method": entry['method'],
+            "cache": {
+                "type": "precomputed",
+                "similarity": round(similarity, 4),
+                "matched_question": matched_question
+            },
+            "prompt": None,
+            "degraded": entry.get('degraded')
+        }
+    
+    def warm_up(self):
+        """Run one dummy encode and search so the first user request does not pay for it"""
+        self.embedder.warm_up()
+    
+    def close(self):
+        """Stop background work; in-flight requests finish on the current snapshot"""
+        self.embedder.stop_watching()
+    
+    def get_response(self, question, use_openai=True, top_k=3, filters=None, session_id=None):
         """
         Get a response to a question about Christopher
         
@@ -53,64 +287,493 @@ class ChristopherGPT:
             question (str): The user's question
             use_openai (bool): Whether to use OpenAI for response generation
             top_k (int): Number of relevant facts to consider
+            filters (dict): Restrict retrieval, e.g. {"category": "Skills and Experience"}
+            session_id (str): Conversation to continue (started if unknown); None
+                answers the question on its own
             
         Returns:
             dict: Response with answer and metadata
+            
+        Raises:
+            DeadlineExceeded: If the request's deadline passed before retrieval
+        """
+        self._check_deadline('retrieval')
+        session, context = self._session_context(session_id)
+        
+        response = self._precomputed_response(question, use_openai, top_k, filters, session)
+        if response is None:
+            # Get relevant facts
+            with span('retrieval'):
+                relevant_facts = self.embedder.find_relevant_facts(question, top_k=top_k, filters=filters, **context)
+            
+            response = self._build_response(question, relevant_facts, use_openai, session)
+        self._record_turn(session, question, response)
+        return response
+    
+    def _session_context(self, session_id):
+        """
+        Session for a request and the retrieval arguments that bias it toward
+        the conversation so far
+        
+        Returns:
+            tuple: (session or None, find_relevant_facts keyword arguments)
+        """
+        if session_id is None:
+            return None, {}
+        session = self.sessions.create(session_id)
+        if session.embedding is None:
+            return session, {}
+        return session, {'context_embedding': session.embedding, 'context_weight': self.session_context_weight}
+    
+    def _record_turn(self, session, question, response):
+        """Add a finished question/answer to its session, if any"""
+        if session is None:
+            return
+        self.sessions.record_turn(session, question, response['answer'], self.embedder.embed_question(question))
+        response['session_id'] = session.id
+    
+    def _summarize_turns(self, summary, turns):
+        """Condense turns leaving a session's window (and the previous summary) with OpenAI"""
+        name = self.persona.display_name
+        transcript = "".join(f"User: {turn['question']}\n{name}: {turn['answer']}\n" for turn in turns)
+        if summary:
+            transcript = f"Summary so far: {summary}\n{transcript}"
+        response = self.openai_client.chat.completions.create(
+            model=self.openai_model,
+            messages=[
+                {"role": "system", "content": f"Summarize this conversation with {name} in at most three sentences, keeping the topics the user asked about."},
+                {"role": "user", "content": transcript}
+            ],
+            max_tokens=120,
+            temperature=0.2
+        )
+        record_token_usage(response.usage)
+        return "Earlier in this conversation: " + response.choices[0].message.content.strip()
+    
+    def get_responses(self, questions, use_openai=True, top_k=3, filters=None):
+        """
+        Get responses to many questions, retrieving facts for all of them in one batch
+        
+        Args:
+            questions (list): The users' questions
+            use_openai (bool): Whether to use OpenAI for response generation
+            top_k (int): Number of relevant facts to consider per question
+            filters (dict): Restrict retrieval for every question
+            
+        Returns:
+            list: One response dict per question, in input order
+        """
+        self._check_deadline('retrieval')
+        responses = [None] * len(questions)
+        if self.answer_index is not None:
+            embeddings = self.embedder.embed_questions(questions)
+            responses = [
+                self._precomputed_response(question, use_openai, top_k, filters, None, embedding)
+                for question, embedding in zip(questions, embeddings)
+            ]
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if not pending:
+            return responses
+        
+        with span('retrieval'):
+            all_relevant_facts = self.embedder.find_relevant_facts_batch(
+                [questions[i] for i in pending], top_k=top_k, filters=filters
+            )
+        
+        for i, relevant_facts in zip(pending, all_relevant_facts):
+            responses[i] = self._build_response(questions[i], relevant_facts, use_openai)
+        return responses
+    
+    async def aget_response(self, question, use_openai=True, top_k=3, timeout=None, filters=None, session_id=None):
+        """
+        Async version of get_response
+        
+        Retrieval runs in a worker thread and the OpenAI call goes through the
+        shared AsyncChatClient (pooled connections, bounded concurrency, retries
+        with jittered backoff), so the event loop is never blocked.
+        
+        Args:
+            question (str): The user's question
+            use_openai (bool): Whether to use OpenAI for response generation
+            top_k (int): Number of relevant facts to consider
+            timeout (float): Per-call OpenAI timeout in seconds
+            filters (dict): Restrict retrieval, see get_response
+            session_id (str): Conversation to continue, see get_response
+            
+        Returns:
+            dict: Response with answer and metadata
+        """
+        self._check_deadline('retrieval')
+        session, context = self._session_context(session_id)
+        if self.answer_index is not None:
+            response = await asyncio.to_thread(
+                self._precomputed_response, question, use_openai, top_k, filters, session
+            )
+            if response is not None:
+                self._record_turn(session, question, response)
+                return response
+        
+        with span('retrieval'):
+            relevant_facts = await asyncio.to_thread(
+                self.embedder.find_relevant_facts, question, top_k, filters, **context
+            )
+        
+        if not (use_openai and self.openai_available):
+            response = self._build_response(question, relevant_facts, False, session)
+            self._record_turn(session, question, response)
+            return response
+        
+        history = session.history() if session else None
+        prompt_info = None
+        degraded = None
+        with span('answer_cache'):
+            answer, cache_info = self._lookup_cached_answer(question, relevant_facts, history)
+        if answer is None:
+            _, degraded = self._llm_budget()
+        if answer is None and degraded is None:
+            started = time.perf_counter()
+            try:
+                with span('prompt_build'):
+                    messages, prompt_info = self._build_openai_messages(question, relevant_facts, history)
+                started = time.perf_counter()
+                with span('openai'):
+                    answer = await self.async_llm.complete(messages, timeout=timeout, deadline=current_deadline(),
+                                                           **self.COMPLETION_PARAMS)
+                self.circuit_breaker.record(True, time.perf_counter() - started)
+                self._store_answer(question, relevant_facts, answer, history)
+            except Exception as e:
+                self.circuit_breaker.record(False, time.perf_counter() - started)
+                print(f"❌ OpenAI API error: {e}")
+                METRICS.inc(OPENAI_ERRORS_METRIC)
+                degraded = 'openai_error'
+        if degraded is not None:
+            answer = self._degraded_response(question, relevant_facts, degraded)
+            prompt_info = None
+        
+        response = {
+            "answer": answer,
+            "relevant_facts": relevant_facts,
+            "method": "basic" if degraded else "openai",
+            "cache": cache_info,
+            "prompt": prompt_info,
+            "degraded": degraded
+        }
+        self._record_turn(session, question, response)
+        return response
+    
+    def stream_response(self, question, use_openai=True, top_k=3, filters=None, session_id=None):
         """
-        # Get relevant facts
-        relevant_facts = self.embedder.find_relevant_facts(question, top_k=top_k)
+        Stream a response to a question as it is generated
         
+        Yields event dicts in order:
+            {"type": "meta", "relevant_facts": [...], "method": ...}
+            {"type": "token", "text": ...}  (one or more)
+            {"type": "done", "answer": ..., "cache": ..., "prompt": ..., "degraded": ..., "session_id": ...}
+        
+        Args:
+            question (str): The user's question
+            use_openai (bool): Whether to use OpenAI for response generation
+            top_k (int): Number of relevant facts to consider
+            filters (dict): Restrict retrieval, see get_response
+            session_id (str): Conversation to continue, see get_response
+        """
+        self._check_deadline('retrieval')
+        session, context = self._session_context(session_id)
+        precomputed = self._precomputed_response(question, use_openai, top_k, filters, session)
+        if precomputed is not None:
+            yield {"type": "meta", "relevant_facts": precomputed['relevant_facts'], "method": precomputed['method']}
+            yield {"type": "token", "text": precomputed['answer']}
+            done = {"type": "done", "answer": precomputed['answer'], "cache": precomputed['cache'], "prompt": None,
+                    "degraded": None}
+            self._record_turn(session, question, done)
+            yield done
+            return
+        
+        with span('retrieval'):
+            relevant_facts = self.embedder.find_relevant_facts(question, top_k=top_k, filters=filters, **context)
+        use_openai = use_openai and self.openai_available
+        
+        # Cache and breaker are checked first so the meta event names the method actually used
+        answer = None
+        cache_info = None
+        prompt_info = None
+        degraded = None
+        timeout = None
+        if use_openai:
+            history = session.history() if session else None
+            with span('answer_cache'):
+                answer, cache_info = self._lookup_cached_answer(question, relevant_facts, history)
+            if answer is None:
+                timeout, degraded = self._llm_budget()
+        
+        yield {
+            "type": "meta",
+            "relevant_facts": relevant_facts,
+            "method": "openai" if use_openai and not degraded else "basic"
+        }
+        
+        if answer is not None:
+            yield {"type": "token", "text": answer}
+        elif use_openai and not degraded:
+            answer, prompt_info, degraded = yield from self._stream_openai_response(
+                question, relevant_facts, history, timeout
+            )
+        elif degraded:
+            answer = yield from self._stream_text(self._degraded_response(question, relevant_facts, degraded))
+        else:
+            answer = yield from self._stream_text(self._generate_basic_response(question, relevant_facts))
+        
+        done = {"type": "done", "answer": answer, "cache": cache_info, "prompt": prompt_info, "degraded": degraded}
+        self._record_turn(session, question, done)
+        yield done
+    
+    def _stream_openai_response(self, question, relevant_facts, history=None, timeout=None):
+        """
+        Yield token events from a streamed completion
+        
+        A stream that fails after tokens were sent keeps the partial answer,
+        marked degraded and never cached.
+        
+        Returns:
+            tuple: (full answer, prompt info, None or 'openai_error' if the stream failed)
+        """
+        parts = []
+        prompt_info = None
+        started = time.perf_counter()
+        opened_seconds = None
+        try:
+            with span('prompt_build'):
+                messages, prompt_info = self._build_openai_messages(question, relevant_facts, history)
+            # Only the time until the stream opens is recorded; tokens arrive after that
+            started = time.perf_counter()
+            with span('openai'):
+                stream = self._openai_client_within(timeout).chat.completions.create(
+                    model=self.openai_model,
+                    messages=messages,
+                    stream=True,
+                    **self.COMPLETION_PARAMS
+                )
+            opened_seconds = time.perf_counter() - started
+            for chunk in stream:
+                record_token_usage(getattr(chunk, 'usage', None))  # only sent when the server includes usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    yield {"type": "token", "text": text}
+        except Exception as e:
+            # One record per stream: latency is the time to open, failure covers the whole stream
+            if opened_seconds is None:
+                opened_seconds = time.perf_counter() - started
+            self.circuit_breaker.record(False, opened_seconds)
+            print(f"❌ OpenAI API error: {e}")
+            METRICS.inc(OPENAI_ERRORS_METRIC)
+            if not parts:
+                # Nothing was sent yet, so the template answer can still be streamed instead
+                answer = yield from self._stream_text(
+                    self._degraded_response(question, relevant_facts, 'openai_error')
+                )
+                return answer, None, 'openai_error'
+            METRICS.inc(DEGRADED_METRIC, reason='openai_error')
+            return "".join(parts).strip(), prompt_info, 'openai_error'
+        
+        self.circuit_breaker.record(True, opened_seconds)
+        answer = "".join(parts).strip()
+        if answer:
+            self._store_answer(question, relevant_facts, answer, history)
+        return answer, prompt_info, None
+    
+    def _stream_text(self, text):
+        """Yield an already-complete answer line by line; returns the text"""
+        for line in text.splitlines(keepends=True):
+            yield {"type": "token", "text": line}
+        return text
+    
+    def _build_response(self, question, relevant_facts, use_openai, session=None):
+        """Generate the answer for already-retrieved facts and wrap it with metadata"""
+        cache_info = None
+        prompt_info = None
+        degraded = None
         if use_openai and self.openai_available:
-            answer = self._generate_openai_response(question, relevant_facts)
+            history = session.history() if session else None
+            answer, cache_info, prompt_info, degraded = self._generate_openai_response(question, relevant_facts, history)
         else:
-            answer = self._generate_basic_response(question, relevant_facts)
+            with span('basic_answer'):
+                answer = self._generate_basic_response(question, relevant_facts)
         
         return {
             "answer": answer,
             "relevant_facts": relevant_facts,
-            "method": "openai" if (use_openai and self.openai_available) else "basic"
+            "method": "openai" if (use_openai and self.openai_available and not degraded) else "basic",
+            "cache": cache_info,
+            "prompt": prompt_info,
+            "degraded": degraded
         }
     
-    def _generate_openai_response(self, question, relevant_facts):
-        """Generate response using OpenAI API"""
+    def cache_stats(self):
+        """Hit/miss counters for every cache layer"""
+        stats = self.embedder.cache_stats()
+        stats['answers'] = self.answer_cache.stats()
+        stats['semantic_answers'] = self.semantic_cache.stats()
+        if self.answer_index is not None:
+            stats['precomputed_answers'] = self.answer_index.stats()
+        return stats
+    
+    @staticmethod
+    def _fact_ids(relevant_facts):
+        """
+        Identity of the facts an answer was built from: row ids plus a hash of
+        each fact's text, since rows are renumbered across snapshots and a
+        request still on a replaced snapshot may store its answer after the swap
+        """
+        return tuple(
+            (fact['index'], hashlib.blake2b(fact['fact'].encode('utf-8'), digest_size=8).digest())
+            for fact in relevant_facts
+        )
+    
+    def _answer_cache_key(self, question, relevant_facts):
+        return (normalize_question(question), self._fact_ids(relevant_facts), self._personality_key)
+    
+    @staticmethod
+    def _has_history(history):
+        return bool(history and (history['turns'] or history['summary']))
+    
+    def _lookup_cached_answer(self, question, relevant_facts, history=None):
+        """
+        Look for a stored answer: exact question match first, then a paraphrase
+        
+        Answers within a conversation depend on the earlier turns, so they are
+        neither looked up nor stored.
+        
+        Returns:
+            tuple: (answer, cache_info) or (None, None) on a miss
+        """
+        if self._has_history(history):
+            return None, None
+        cached_answer = self.answer_cache.get(self._answer_cache_key(question, relevant_facts))
+        if cached_answer is not None:
+            return cached_answer, {"type": "exact"}
+        
+        hit = self.semantic_cache.lookup(self.embedder.embed_question(question), self._fact_ids(relevant_facts),
+                                         self._personality_key)
+        if hit is not None:
+            return hit['answer'], {
+                "type": "semantic",
+                "similarity": round(hit['similarity'], 4),
+                "matched_question": hit['question']
+            }
+        return None, None
+    
+    def _store_answer(self, question, relevant_facts, answer, history=None):
+        if self._has_history(history):
+            return
+        self.answer_cache.put(self._answer_cache_key(question, relevant_facts), answer)
+        self.semantic_cache.add(
+            self.embedder.embed_question(question),
+            self._fact_ids(relevant_facts),
+            answer,
+            question=question,
+            key=self._personality_key
+        )
+    
+    def _build_openai_messages(self, question, relevant_facts, history=None):
+        """
+        Build the chat messages sent to OpenAI for a question, its facts and
+        the earlier turns of its conversation
+        
+        Returns:
+            tuple: (messages, prompt info with the local prompt token count and facts used)
+        """
+        messages, prompt_info = self.prompt_builder.build(question, relevant_facts, history)
+        METRICS.observe(PROMPT_TOKENS_METRIC, prompt_info['prompt_tokens'])
+        return messages, prompt_info
+    
+    def _generate_openai_response(self, question, relevant_facts, history=None):
+        """
+        Generate response using OpenAI API, reusing a cached answer when possible
+        
+        Returns:
+            tuple: (answer, cache_info, prompt_info, degraded) where cache_info
+                describes a cache hit or is None, prompt_info is None when no prompt
+                was sent, and degraded is None or why the template answer was used
+        """
+        with span('answer_cache'):
+            cached_answer, cache_info = self._lookup_cached_answer(question, relevant_facts, history)
+        if cached_answer is not None:
+            return cached_answer, cache_info, None, None
+        
+        timeout, degraded = self._llm_budget()
+        if degraded:
+            return self._degraded_response(question, relevant_facts, degraded), None, None, degraded
+        
         try:
-            # Prepare context from relevant facts
-            context = "Here's what I know about Christopher:\n\n"
-            for fact in relevant_facts:
-                context += f"- {fact['fact']}\n"
-            
-            # Create the prompt
-            personality_info = f"""
-You are Christopher, responding as yourself. Your personality is {self.personality['tone']}.
-Your communication style is {self.personality['communication_style']}.
-Your main interests include: {', '.join(self.personality['interests'])}.
-You value: {', '.join(self.personality['values'])}.
-Your goals include: {', '.join(self.personality['goals'])}.
-
-Based on the context below, answer the question as Christopher would, in first person.
-Keep responses natural, personal, and engaging. Don't mention that you're an AI or that this is from a database.
-
-Context about Christopher:
-{context}
-
-Question: {question}
-
-Response as Christopher:"""
-
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are Christopher, a computer science and business student passionate about AI and technology. Respond as Christopher would, in first person, based on the provided context."},
-                    {"role": "user", "content": personality_info}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
+            with span('prompt_build'):
+                messages, prompt_info = self._build_openai_messages(question, relevant_facts, history)
+            with span('openai'):
+                response = self._timed_llm_call(lambda: self._openai_client_within(timeout).chat.completions.create(
+                    model=self.openai_model,
+                    messages=messages,
+                    **self.COMPLETION_PARAMS
+                ))
+            record_token_usage(response.usage)
             
-            return response.choices[0].message.content.strip()
+            answer = response.choices[0].message.content.strip()
+            self._store_answer(question, relevant_facts, answer, history)
+            return answer, None, prompt_info, None
             
         except Exception as e:
             print(f"❌ OpenAI API error: {e}")
+            METRICS.inc(OPENAI_ERRORS_METRIC)
+            return self._degraded_response(question, relevant_facts, 'openai_error'), None, None, 'openai_error'
+    
+    @staticmethod
+    def _check_deadline(stage):
+        """Raise DeadlineExceeded if the current request's deadline has passed"""
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(stage)
+    
+    def _llm_budget(self):
+        """
+        Whether the current request may call OpenAI, and for how long
+        
+        Returns:
+            tuple: (timeout, None) to go ahead, with the seconds left before the
+                request's deadline (None without a deadline), or (None, reason) to
+                answer from the template: 'deadline' or 'circuit_open'
+        """
+        deadline = current_deadline()
+        timeout = None
+        if deadline is not None:
+            timeout = deadline.remaining()
+            if timeout < self.openai_min_budget:
+                return None, 'deadline'
+        if not self.circuit_breaker.allow():
+            return None, 'circuit_open'
+        return timeout, None
+    
+    def _openai_client_within(self, timeout):
+        """The sync OpenAI client, limited to `timeout` seconds without retries when a deadline applies"""
+        if timeout is None:
+            return self.openai_client
+        return self.openai_client.with_options(timeout=min(timeout, self.openai_timeout), max_retries=0)
+    
+    def _timed_llm_call(self, call):
+        """Run an OpenAI call and report its outcome and latency to the circuit breaker"""
+        started = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            self.circuit_breaker.record(False, time.perf_counter() - started)
+            raise
+        self.circuit_breaker.record(True, time.perf_counter() - started)
+        return result
+    
+    def _degraded_response(self, question, relevant_facts, reason):
+        """Template answer given in place of an OpenAI one, counted by reason"""
+        METRICS.inc(DEGRADED_METRIC, reason=reason)
+        with span('basic_answer'):
             return self._generate_basic_response(question, relevant_facts)
     
     def _generate_basic_response(self, question, relevant_facts):
@@ -135,6 +798,8 @@ Response as Christopher:"""
         print("Ask me anything about Christopher! Type 'quit' to exit.")
         print()
         
+        session_id = self.sessions.create().id
+        
         while True:
             try:
                 question = input("You: ").strip()
@@ -147,7 +812,7 @@ Response as Christopher:"""
                     continue
                 
                 print("🤖 ChristopherGPT: ", end="")
-                response = self.get_response(question)
+                response = self.get_response(question, session_id=session_id)
                 print(response['answer'])
                 print()
                 
@@ -0,0 +1,282 @@
+"""
+Embedding service for ChristopherGPT
+Collects concurrent encode requests into micro-batches so many request
+threads share one forward pass instead of each running a batch of one.
+
+Two ways to use it:
+    BatchingEncoder   in-process: wraps the SentenceTransformer of one worker
+    EmbeddingServer   standalone process that owns the only model copy; web
+                      workers talk to it through RemoteEncoder
+
+Connections exchange pickles, so anyone who passes the handshake can run
+code in the service. There is no default key: server and clients must share
+EMBEDDING_SERVICE_AUTHKEY.
+
+Usage:
+    export EMBEDDING_SERVICE_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    python embedding_service.py --address 127.0.0.1:6100 --window-ms 3
+    EMBEDDING_SERVICE=127.0.0.1:6100 gunicorn -w 4 app:app
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+AUTHKEY_ENV = 'EMBEDDING_SERVICE_AUTHKEY'
+
+
+def resolve_authkey(authkey=None):
+    """
+    The handshake key: `authkey` if given, else EMBEDDING_SERVICE_AUTHKEY
+
+    Raises:
+        ValueError: If neither is set
+    """
+    if authkey is None:
+        authkey = os.getenv(AUTHKEY_ENV)
+    if not authkey:
+        raise ValueError(f"{AUTHKEY_ENV} must be set: the embedding service unpickles what its clients send, "
+                         "so it needs a secret shared by the server and its clients")
+    return authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+
+
+def parse_address(address):
+    """'host:port' -> (host, port) tuple; anything else is treated as a Unix socket path"""
+    if isinstance(address, tuple):
+        return address
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+class MicroBatcher:
+    def __init__(self, encode_fn, max_batch_size=32, window_ms=3.0):
+        """
+        Args:
+            encode_fn (callable): Encodes a list of texts into a 2D array
+            max_batch_size (int): Largest number of texts encoded together
+            window_ms (float): How long the first queued text waits for company
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = {}  # batch size -> number of batches
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """Queue one text; the returned Future resolves to its embedding row"""
+        future = Future()
+        self._queue.put((text, future))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return future
+
+    def encode(self, texts):
+        """Encode texts through the batcher, blocking until all rows are ready"""
+        futures = [self.submit(text) for text in texts]
+        return np.vstack([future.result() for future in futures])
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = self.encode_fn(texts)
+                for (_, future), embedding in zip(batch, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+
+    def stats(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+            'window_ms': self.window * 1000,
+            'max_batch_size': self.max_batch_size
+        }
+
+
+class BatchingEncoder:
+    def __init__(self, model, max_batch_size=32, window_ms=3.0):
+        """
+        Drop-in wrapper around a SentenceTransformer that micro-batches small
+        encode calls (questions) and passes large ones (fact lists) straight through
+
+        Args:
+            model: A loaded SentenceTransformer
+            max_batch_size (int): Largest micro-batch
+            window_ms (float): Micro-batch collection window
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.batcher = MicroBatcher(model.encode, max_batch_size, window_ms)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self.encode([texts], **kwargs)[0]
+        if kwargs or len(texts) >= self.max_batch_size:
+            return self.model.encode(texts, **kwargs)
+        return self.batcher.encode(texts)
+
+    def stats(self):
+        return self.batcher.stats()
+
+
+class RemoteEncoder:
+    def __init__(self, address, authkey=None):
+        """
+        Client for an EmbeddingServer; quacks like a SentenceTransformer
+
+        Args:
+            address (str): 'host:port' or Unix socket path of the server
+            authkey (bytes): Shared secret for the connection handshake, defaults
+                to EMBEDDING_SERVICE_AUTHKEY
+
+        Raises:
+            ValueError: If no key is given or set
+        """
+        self.address = parse_address(address)
+        self.authkey = resolve_authkey(authkey)
+        self._local = threading.local()  # one connection per thread
+        info = self._request('info')
+        self.model_name = info['model_name']
+        self.max_seq_length = info['max_seq_length']
+        self._dimension = info['dimension']
+
+    def _request(self, *message):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = Client(self.address, authkey=self.authkey)
+        try:
+            connection.send(message)
+            status, payload = connection.recv()
+        except (EOFError, OSError):
+            self._local.connection = None
+            raise
+        if status == 'error':
+            raise RuntimeError(f"Embedding service error: {payload}")
+        return payload
+
+    def get_sentence_embedding_dimension(self):
+        return self._dimension
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        return self._request('encode', list(texts))
+
+    def stats(self):
+        return self._request('stats')
+
+
+class EmbeddingServer:
+    def __init__(self, address, model_name='all-MiniLM-L6-v2', max_batch_size=32, window_ms=3.0,
+                 authkey=None, model=None):
+        """
+        Process that owns the only SentenceTransformer and serves micro-batched encodes
+
+        Args:
+            address (str): 'host:port' or Unix socket path to listen on
+            model_name (str): Sentence transformer model to load
+            max_batch_size (int): Largest micro-batch
+            window_ms (float): Micro-batch collection window
+            authkey (bytes): Shared secret clients must present, defaults to
+                EMBEDDING_SERVICE_AUTHKEY
+            model: Already loaded encoder to serve instead of loading model_name
+                (e.g. a cost model in benchmarks)
+
+        Raises:
+            ValueError: If no key is given or set
+        """
+        authkey = resolve_authkey(authkey)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"Loading embedding model {model_name}...")
+            model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.model = model
+        self.encoder = BatchingEncoder(self.model, max_batch_size, window_ms)
+        # The default backlog of 1 stalls bursts of new per-thread client connections
+        self.listener = Listener(parse_address(address), backlog=128, authkey=authkey)
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    command, *args = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if command == 'encode':
+                        payload = np.asarray(self.encoder.encode(args[0]), dtype=np.float32)
+                    elif command == 'info':
+                        payload = {
+                            'model_name': self.model_name,
+                            'dimension': self.model.get_sentence_embedding_dimension(),
+                            'max_seq_length': self.model.max_seq_length
+                        }
+                    elif command == 'stats':
+                        payload = self.encoder.stats()
+                    else:
+                        raise ValueError(f"Unknown command {command!r}")
+                    connection.send(('ok', payload))
+                except Exception as e:
+                    connection.send(('error', str(e)))
+
+    def serve_forever(self):
+        print(f"🧠 Embedding service listening on {self.listener.address}")
+        while True:
+            try:
+                connection = self.listener.accept()
+            except (EOFError, OSError, AuthenticationError) as e:
+                # A client that drops or fails the handshake must not stop the server
+                print(f"⚠️  Rejected embedding service connection: {e!r}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared micro-batching embedding service")
+    parser.add_argument('--address', default=os.getenv('EMBEDDING_SERVICE', '127.0.0.1:6100'))
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--window-ms', type=float, default=3.0)
+    args = parser.parse_args()
+
+    EmbeddingServer(args.address, args.model, args.max_batch_size, args.window_ms).serve_forever()
@@ -0,0 +1,595 @@
+"""
+On-disk embedding store for ChristopherGPT
+Keeps the fact matrix as a raw .npy file that every worker process can
+memory-map and share through the OS page cache, instead of unpickling a
+private copy at startup.
+
+Store layout (one directory):
+    header.json     format version, model name, dimension, dtype, fact count
+    embeddings.npy  L2-normalized float32 matrix, one row per fact
+    facts.bin       UTF-8 fact texts concatenated back to back
+    offsets.npy     int64 byte offsets into facts.bin (count + 1 entries)
+    hashes.npy      SHA-1 digest of each fact text, used for incremental updates
+    categories.npy  int32 category code per fact (names listed in header.json)
+    sources.npy     int32 source code per fact (names listed in header.json)
+    timestamps.npy  float64 Unix timestamp per fact, NaN if unknown
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import struct
+from collections.abc import Sequence
+from datetime import datetime
+
+import numpy as np
+
+from vector_search import normalize_rows
+
+FORMAT_VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, 3)
+HEADER_FILE = 'header.json'
+EMBEDDINGS_FILE = 'embeddings.npy'
+FACTS_FILE = 'facts.bin'
+OFFSETS_FILE = 'offsets.npy'
+HASHES_FILE = 'hashes.npy'
+CATEGORIES_FILE = 'categories.npy'
+SOURCES_FILE = 'sources.npy'
+TIMESTAMPS_FILE = 'timestamps.npy'
+HASH_BYTES = 20  # SHA-1 digest
+HASH_DTYPE = f'S{HASH_BYTES}'
+
+
+def model_fingerprint(model_name, dimension, max_seq_length):
+    """Identify an embedding model configuration; vectors from a different one are not comparable"""
+    config = f"{model_name}:{dimension}:{max_seq_length}"
+    return hashlib.sha1(config.encode('utf-8')).hexdigest()
+
+
+def fact_hash(fact):
+    """Content hash identifying a fact text across store rebuilds"""
+    return hashlib.sha1(fact.encode('utf-8')).digest()
+
+
+def fact_hashes(facts):
+    """Content hashes for a list of facts as a fixed-width bytes array"""
+    return np.array([fact_hash(fact) for fact in facts], dtype=HASH_DTYPE)
+
+
+def parse_timestamp(value):
+    """Unix seconds from a number or ISO 8601 string; NaN when missing"""
+    if value is None or value == '':
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _label_codes(values, names):
+    """Map labels to int32 codes into `names` (extended in place); None becomes -1"""
+    positions = {name: code for code, name in enumerate(names)}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None or value == '':
+            codes[i] = -1
+            continue
+        if value not in positions:
+            positions[value] = len(names)
+            names.append(value)
+        codes[i] = positions[value]
+    return codes
+
+
+class FactMetadata:
+    def __init__(self, categories, category_names, sources, source_names, timestamps):
+        """
+        Column-wise fact metadata, row-aligned with the embedding matrix
+
+        Args:
+            categories (np.ndarray): int32 code per fact into category_names, -1 if none
+            category_names (list): Category labels
+            sources (np.ndarray): int32 code per fact into source_names, -1 if none
+            source_names (list): Source labels
+            timestamps (np.ndarray): float64 Unix seconds per fact, NaN if unknown
+        """
+        self.categories = categories
+        self.category_names = list(category_names)
+        self.sources = sources
+        self.source_names = list(source_names)
+        self.timestamps = timestamps
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from one dict (category/source/timestamp, any may be missing) per fact"""
+        records = [record or {} for record in records]
+        category_names, source_names = [], []
+        return cls(
+            _label_codes([record.get('category') for record in records], category_names),
+            category_names,
+            _label_codes([record.get('source') for record in records], source_names),
+            source_names,
+            np.array([parse_timestamp(record.get('timestamp')) for record in records], dtype=np.float64)
+        )
+
+    @classmethod
+    def empty(cls, count):
+        return cls(np.full(count, -1, dtype=np.int32), [], np.full(count, -1, dtype=np.int32), [],
+                   np.full(count, np.nan, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.categories)
+
+    def get(self, row):
+        """Metadata of one fact as a dict"""
+        category, source, timestamp = self.categories[row], self.sources[row], self.timestamps[row]
+        return {
+            'category': self.category_names[category] if category >= 0 else None,
+            'source': self.source_names[source] if source >= 0 else None,
+            'timestamp': None if np.isnan(timestamp) else float(timestamp)
+        }
+
+    def to_records(self):
+        return [self.get(row) for row in range(len(self))]
+
+    def labels(self):
+        """Decoded (categories, sources) as object arrays, None where unset"""
+        return (
+            np.array(self.category_names + [None], dtype=object)[self.categories],
+            np.array(self.source_names + [None], dtype=object)[self.sources]
+        )
+
+    def equals(self, other):
+        """Same labels and timestamps row for row (label codes may differ)"""
+        if other is None or len(self) != len(other):
+            return False
+        mine, theirs = self.labels(), other.labels()
+        return (
+            np.array_equal(mine[0], theirs[0])
+            and np.array_equal(mine[1], theirs[1])
+            and np.array_equal(self.timestamps, other.timestamps, equal_nan=True)
+        )
+
+    def category_rows(self):
+        """Category name -> sorted row ids of its facts, from one stable sort"""
+        order = np.argsort(self.categories, kind='stable')
+        counts = np.bincount(self.categories + 1, minlength=len(self.category_names) + 1)[1:]
+        starts = np.cumsum(counts) - counts + np.count_nonzero(self.categories < 0)
+        return {
+            name: order[start:start + count]
+            for name, start, count in zip(self.category_names, starts, counts)
+            if count
+        }
+
+    def mask(self, rows, source=None, since=None, until=None):
+        """
+        Which of the given rows pass the non-category filters
+
+        Args:
+            rows (np.ndarray): Candidate row ids
+            source (str or list): Allowed source(s)
+            since (float): Earliest timestamp (Unix seconds, inclusive)
+            until (float): Latest timestamp (Unix seconds, inclusive)
+
+        Returns:
+            np.ndarray: Boolean mask over rows
+        """
+        keep = np.ones(len(rows), dtype=bool)
+        if source is not None:
+            wanted = [source] if isinstance(source, str) else list(source)
+            codes = [self.source_names.index(name) for name in wanted if name in self.source_names]
+            keep &= np.isin(self.sources[rows], codes)
+        if since is not None:
+            keep &= self.timestamps[rows] >= parse_timestamp(since)
+        if until is not None:
+            keep &= self.timestamps[rows] <= parse_timestamp(until)
+        return keep
+
+
+class FactList(Sequence):
+    """Read-only list of facts decoded lazily from the memory-mapped facts file"""
+
+    def __init__(self, data, offsets):
+        """
+        Args:
+            data (np.ndarray): uint8 buffer holding the concatenated UTF-8 facts
+            offsets (np.ndarray): int64 start offsets, with a final end offset
+        """
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self):
+        """Bytes of the underlying buffers"""
+        return self._data.nbytes + self._offsets.nbytes
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('fact index out of range')
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._data[start:end]).decode('utf-8')
+
+
+class EmbeddingStore:
+    def __init__(self, path):
+        """
+        Initialize a store rooted at a directory
+
+        Args:
+            path (str): Directory holding the store files
+        """
+        self.path = path
+
+    def _file(self, name, root=None):
+        return os.path.join(root or self.path, name)
+
+    def exists(self):
+        """Check whether a complete store is present on disk"""
+        return os.path.exists(self._file(HEADER_FILE))
+
+    def read_header(self):
+        """Read the store header without touching the matrix"""
+        with open(self._file(HEADER_FILE)) as f:
+            return json.load(f)
+
+    def signature(self):
+        """
+        Cheap identity of the committed store contents, or None if there is no store
+
+        header.json is replaced on every save and append commit, so its inode
+        and modification time change whenever readers could see new data.
+        """
+        try:
+            stat = os.stat(self._file(HEADER_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def save(self, embeddings, facts, model_name, model_fingerprint=None, hashes=None, metadata=None):
+        """
+        Write a store atomically: files go to a temporary directory that then
+        replaces the current one, so readers never see a half-written store
+
+        Args:
+            embeddings (np.ndarray): Fact matrix, one row per fact
+            facts (list): Fact texts in row order
+            model_name (str): Name of the model that produced the embeddings
+            model_fingerprint (str): Identifies the exact model configuration
+            hashes (np.ndarray): Precomputed fact hashes, computed if omitted
+            metadata (FactMetadata): Category/source/timestamp per fact, empty if omitted
+        """
+        matrix = normalize_rows(embeddings)
+        if matrix.shape[0] != len(facts):
+            raise ValueError(f"{matrix.shape[0]} embeddings for {len(facts)} facts")
+
+        tmp_path = self.path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        np.save(self._file(EMBEDDINGS_FILE, tmp_path), matrix)
+
+        offsets = np.zeros(len(facts) + 1, dtype=np.int64)
+        with open(self._file(FACTS_FILE, tmp_path), 'wb') as f:
+            for i, fact in enumerate(facts):
+                encoded = fact.encode('utf-8')
+                f.write(encoded)
+                offsets[i + 1] = offsets[i] + len(encoded)
+        np.save(self._file(OFFSETS_FILE, tmp_path), offsets)
+        np.save(self._file(HASHES_FILE, tmp_path), fact_hashes(facts) if hashes is None else hashes)
+        if metadata is None:
+            metadata = FactMetadata.empty(len(facts))
+        _save_metadata(self, metadata, tmp_path)
+
+        header = {
+            'format_version': FORMAT_VERSION,
+            'model_name': model_name,
+            'model_fingerprint': model_fingerprint,
+            'dimension': int(matrix.shape[1]),
+            'dtype': str(matrix.dtype),
+            'count': len(facts),
+            'normalized': True,
+            'categories': metadata.category_names,
+            'sources': metadata.source_names
+        }
+        with open(self._file(HEADER_FILE, tmp_path), 'w') as f:
+            json.dump(header, f, indent=2)
+
+        old_path = self.path + '.old'
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def load(self):
+        """
+        Memory-map the store; cost does not depend on the number of facts
+
+        Returns:
+            tuple: (embeddings, facts, header) where embeddings is a read-only
+                memory-mapped matrix and facts is a lazily decoded FactList
+        """
+        header = self.read_header()
+        if header.get('format_version') not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported embedding store version: {header.get('format_version')}")
+
+        # An interrupted StoreAppender.append() can leave uncommitted rows past
+        # the header's count; they are ignored until the append is committed
+        count = header['count']
+        embeddings = np.load(self._file(EMBEDDINGS_FILE), mmap_mode='r')[:count]
+        offsets = np.load(self._file(OFFSETS_FILE), mmap_mode='r')[:count + 1]
+
+        if embeddings.shape != (count, header['dimension']) or str(embeddings.dtype) != header['dtype']:
+            raise ValueError(f"Embedding store at {self.path} does not match its header")
+
+        if offsets[-1] > 0:
+            data = np.memmap(self._file(FACTS_FILE), dtype=np.uint8, mode='r')
+        else:
+            data = np.empty(0, dtype=np.uint8)
+
+        return embeddings, FactList(data, offsets), header
+
+    def load_metadata(self, header=None):
+        """
+        Memory-map the per-fact metadata columns
+
+        Returns:
+            FactMetadata: Metadata of every fact, or None for stores written without it
+        """
+        if not os.path.exists(self._file(CATEGORIES_FILE)):
+            return None
+        header = header or self.read_header()
+        count = header['count']
+        return FactMetadata(
+            np.load(self._file(CATEGORIES_FILE), mmap_mode='r')[:count],
+            header.get('categories', []),
+            np.load(self._file(SOURCES_FILE), mmap_mode='r')[:count],
+            header.get('sources', []),
+            np.load(self._file(TIMESTAMPS_FILE), mmap_mode='r')[:count]
+        )
+
+    def load_hashes(self, facts=None):
+        """
+        Memory-map the per-fact content hashes
+
+        Args:
+            facts (Sequence): Facts to hash when the store predates hashes.npy
+
+        Returns:
+            np.ndarray: One SHA-1 digest per fact, in row order
+        """
+        path = self._file(HASHES_FILE)
+        if os.path.exists(path):
+            return np.load(path, mmap_mode='r')[:self.read_header()['count']]
+        if facts is None:
+            facts = self.load()[1]
+        return fact_hashes(facts)
+
+
+def _save_metadata(store, metadata, root=None):
+    """Write the metadata columns of a store (names go into header.json separately)"""
+    np.save(store._file(CATEGORIES_FILE, root), np.asarray(metadata.categories, dtype=np.int32))
+    np.save(store._file(SOURCES_FILE, root), np.asarray(metadata.sources, dtype=np.int32))
+    np.save(store._file(TIMESTAMPS_FILE, root), np.asarray(metadata.timestamps, dtype=np.float64))
+
+
+def _write_header(store, header):
+    """Atomically replace header.json"""
+    tmp_header = store._file(HEADER_FILE) + '.tmp'
+    with open(tmp_header, 'w') as f:
+        json.dump(header, f, indent=2)
+    os.replace(tmp_header, store._file(HEADER_FILE))
+
+
+def _npy_header_length(f):
+    """Size in bytes of the .npy header at the start of an open file"""
+    f.seek(0)
+    prefix = f.read(12)
+    if prefix[:6] != b'\x93NUMPY':
+        raise ValueError("Not a .npy file")
+    if prefix[6] == 1:
+        return 10 + struct.unpack('<H', prefix[8:10])[0]
+    return 12 + struct.unpack('<I', prefix[8:12])[0]
+
+
+def _write_npy_header(f, dtype, shape, header_length):
+    """Overwrite a version 1.0 .npy header in place, padded to exactly header_length bytes"""
+    description = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.dtype(dtype).str, tuple(shape))
+    body_length = header_length - 10
+    if len(description) + 1 > body_length or body_length > 0xFFFF:
+        raise ValueError("New .npy header does not fit in the reserved space")
+    f.seek(0)
+    f.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', body_length))
+    f.write((description.ljust(body_length - 1) + '\n').encode('latin1'))
+
+
+GROWABLE_HEADER_LENGTH = 128  # room for a shape with a 20-digit row count
+
+
+def _make_growable(path, dtype, shape):
+    """
+    Make sure a .npy file's header can describe any row count, rewriting the
+    file once with a larger header if needed
+
+    Returns:
+        int: Byte offset of the array data
+    """
+    with open(path, 'r+b') as f:
+        header_length = _npy_header_length(f)
+        try:
+            _write_npy_header(f, dtype, (10 ** 20 - 1,) + tuple(shape[1:]), header_length)
+            _write_npy_header(f, dtype, shape, header_length)
+            return header_length
+        except ValueError:
+            pass
+
+    tmp_path = path + '.grow'
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        src.seek(_npy_header_length(src))
+        dst.write(b'\0' * GROWABLE_HEADER_LENGTH)
+        _write_npy_header(dst, dtype, shape, GROWABLE_HEADER_LENGTH)
+        dst.seek(GROWABLE_HEADER_LENGTH)
+        shutil.copyfileobj(src, dst, 16 * 1024 * 1024)
+    os.replace(tmp_path, path)
+    return GROWABLE_HEADER_LENGTH
+
+
+class StoreAppender:
+    def __init__(self, store, model_name, fingerprint, dimension):
+        """
+        Append facts to a store in place, without loading existing rows into memory
+
+        Each append() is committed by rewriting header.json last, so after a
+        crash the store is rolled back to the last committed row count the
+        next time an appender is opened on it.
+
+        Args:
+            store (EmbeddingStore): Store to append to (created if missing)
+            model_name (str): Model producing the appended embeddings
+            fingerprint (str): Model fingerprint, must match an existing store
+            dimension (int): Embedding dimension
+        """
+        self.store = store
+        if not store.exists():
+            store.save(np.empty((0, dimension), dtype=np.float32), [], model_name, fingerprint)
+
+        self.header = store.read_header()
+        if self.header.get('model_fingerprint') not in (fingerprint, None) or self.header['dimension'] != dimension:
+            raise ValueError(f"Store at {store.path} was built with a different embedding model")
+        self.header['model_fingerprint'] = fingerprint
+        self.header.setdefault('categories', [])
+        self.header.setdefault('sources', [])
+        self.dimension = dimension
+        self.count = self.header['count']
+
+        # Older stores lack some columns; give existing rows default values
+        if not os.path.exists(store._file(HASHES_FILE)):
+            np.save(store._file(HASHES_FILE), store.load_hashes())
+        if not os.path.exists(store._file(CATEGORIES_FILE)):
+            _save_metadata(store, FactMetadata.empty(self.count))
+        self._rollback()
+
+    @property
+    def state(self):
+        """Caller-defined progress saved with the last commit (e.g. input position)"""
+        return self.header.get('append_state')
+
+    def _columns(self):
+        """File -> (dtype, per-row shape, extra trailing rows) of every row-aligned array"""
+        return {
+            EMBEDDINGS_FILE: (np.float32, (self.dimension,), 0),
+            OFFSETS_FILE: (np.int64, (), 1),
+            HASHES_FILE: (np.dtype(HASH_DTYPE), (), 0),
+            CATEGORIES_FILE: (np.int32, (), 0),
+            SOURCES_FILE: (np.int32, (), 0),
+            TIMESTAMPS_FILE: (np.float64, (), 0)
+        }
+
+    def _rollback(self):
+        """Truncate every file to the last committed row count and make headers growable"""
+        n = self.count
+        self._data_offsets = {}
+        for name, (dtype, row_shape, extra_rows) in self._columns().items():
+            path = self.store._file(name)
+            self._data_offsets[name] = _make_growable(path, dtype, (n + extra_rows,) + row_shape)
+            row_size = np.dtype(dtype).itemsize * int(np.prod(row_shape, dtype=np.int64))
+            os.truncate(path, self._data_offsets[name] + (n + extra_rows) * row_size)
+
+        with open(self.store._file(OFFSETS_FILE), 'rb') as f:
+            f.seek(self._data_offsets[OFFSETS_FILE] + n * 8)
+            self._facts_end = struct.unpack('<q', f.read(8))[0]
+        os.truncate(self.store._file(FACTS_FILE), self._facts_end)
+
+    def _append_column(self, name, rows, new_count):
+        dtype, row_shape, extra_rows = self._columns()[name]
+        row_size = np.dtype(dtype).itemsize * int(np.prod(row_shape, dtype=np.int64))
+        with open(self.store._file(name), 'r+b') as f:
+            f.seek(self._data_offsets[name] + (self.count + extra_rows) * row_size)
+            f.write(np.ascontiguousarray(rows, dtype=dtype).tobytes())
+            _write_npy_header(f, dtype, (new_count + extra_rows,) + row_shape, self._data_offsets[name])
+
+    def existing_hashes(self):
+        """
+        Set of content hashes already in the store, for deduplication
+
+        Returned as full fact_hash() digests: numpy drops trailing NUL bytes
+        from 'S' values, so they are padded back to compare equal.
+        """
+        return {digest.ljust(HASH_BYTES, b'\0') for digest in self.store.load_hashes().tolist()}
+
+    def append(self, embeddings, facts, hashes=None, state=None, metadata=None):
+        """
+        Append rows and commit them
+
+        Args:
+            embeddings (np.ndarray): Normalized float32 rows
+            facts (list): Fact texts, one per row
+            hashes (np.ndarray): Content hashes, computed if omitted
+            state: JSON-serializable progress marker stored with this commit
+            metadata (list): Optional dict per fact with category/source/timestamp
+        """
+        hashes = fact_hashes(facts) if hashes is None else hashes
+        metadata = metadata or [None] * len(facts)
+        encoded = [fact.encode('utf-8') for fact in facts]
+        offsets = self._facts_end + np.cumsum([len(e) for e in encoded], dtype=np.int64)
+        new_count = self.count + len(facts)
+
+        with open(self.store._file(FACTS_FILE), 'r+b') as f:
+            f.seek(self._facts_end)
+            f.write(b''.join(encoded))
+        self._append_column(EMBEDDINGS_FILE, embeddings, new_count)
+        self._append_column(OFFSETS_FILE, offsets, new_count)
+        self._append_column(HASHES_FILE, hashes, new_count)
+        self._append_column(CATEGORIES_FILE, _label_codes(
+            [(record or {}).get('category') for record in metadata], self.header['categories']), new_count)
+        self._append_column(SOURCES_FILE, _label_codes(
+            [(record or {}).get('source') for record in metadata], self.header['sources']), new_count)
+        self._append_column(TIMESTAMPS_FILE, [
+            parse_timestamp((record or {}).get('timestamp')) for record in metadata], new_count)
+
+        # Commit point: header.json is replaced atomically
+        self.header['count'] = new_count
+        self.header['format_version'] = FORMAT_VERSION
+        self.header['append_state'] = state
+        _write_header(self.store, self.header)
+
+        self.count = new_count
+        if len(offsets):
+            self._facts_end = int(offsets[-1])
+
+
+def migrate_pickle(pickle_path, store, model_name):
+    """
+    Convert a legacy pickle ({'embeddings', 'facts'}) into an embedding store
+
+    Args:
+        pickle_path (str): Path to the old .pkl file
+        store (EmbeddingStore): Destination store
+        model_name (str): Model the pickled embeddings were created with
+    """
+    with open(pickle_path, 'rb') as f:
+        data = pickle.load(f)
+    store.save(data['embeddings'], list(data['facts']), model_name)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python embedding_store.py <legacy.pkl> <store_dir> [model_name]")
+        sys.exit(1)
+
+    model = sys.argv[3] if len(sys.argv) > 3 else 'all-MiniLM-L6-v2'
+    migrate_pickle(sys.argv[1], EmbeddingStore(sys.argv[2]), model)
+    print(f"Migrated {sys.argv[1]} to {sys.argv[2]}")
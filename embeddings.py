@@ -3,62 +3,587 @@ Text embedding system for ChristopherGPT
 This module handles converting text into numerical vectors for semantic search
 """
 
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+import hashlib
 import os
-from personal_data import get_all_facts
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from cache import LRUCache, filter_key, normalize_question
+from embedding_store import EmbeddingStore, FactMetadata, fact_hashes, migrate_pickle, model_fingerprint
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from metrics import span
+from personal_data import get_all_facts, get_fact_records
+from vector_index import BruteForceIndex, load_or_build_index
+from vector_search import normalize_rows, top_k_indices
+
+class FactSnapshot:
+    def __init__(self, version, embeddings, facts, metadata=None, index=None, partitions=None,
+                 lexical_index=None, store_signature=None):
+        """
+        One immutable generation of the searchable facts
+        
+        Everything a query reads lives here, so a query that pinned a snapshot
+        sees consistent rows even while a newer one is swapped in. Snapshots are
+        never modified; an update builds a new one.
+        
+        Args:
+            version (int): Increases by one with every swap
+            embeddings (np.ndarray): L2-normalized float32 matrix, one row per fact
+            facts (Sequence): Fact texts in row order
+            metadata (FactMetadata): Category, source and timestamp per fact
+            index: Search backend over the embeddings
+            partitions (dict): category -> (rows, exact index over just those rows)
+            lexical_index (BM25Index): BM25 over the facts, hybrid mode only
+            store_signature (tuple): EmbeddingStore.signature() of the store it was loaded from
+        """
+        self.version = version
+        self.embeddings = embeddings
+        self.facts = facts
+        self.metadata = metadata
+        self.index = index
+        self.partitions = partitions or {}
+        self.lexical_index = lexical_index
+        self.store_signature = store_signature
+        self.created_at = time.time()
+        self.nbytes = None  # see ChristopherEmbeddings.memory_usage
+        self.fingerprint = None  # see ChristopherEmbeddings.fact_fingerprint
+        self.readers = 0
+        self.retired = False
+        self.freed = False
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Register an in-flight query; False if the snapshot was already freed"""
+        with self._lock:
+            if self.freed:
+                return False
+            self.readers += 1
+            return True
+    
+    def release(self):
+        """End an in-flight query, freeing a retired snapshot after its last one"""
+        with self._lock:
+            self.readers -= 1
+            drained = self.retired and self.readers == 0 and not self.freed
+            self.freed = self.freed or drained
+        if drained:
+            self._drop_data()
+    
+    def retire(self):
+        """Mark as replaced; freed now if idle, otherwise when drained"""
+        with self._lock:
+            self.retired = True
+            drained = self.readers == 0 and not self.freed
+            self.freed = self.freed or drained
+        if drained:
+            self._drop_data()
+    
+    def _drop_data(self):
+        if self.embeddings is not None:
+            print(f"♻️  Snapshot v{self.version} drained, releasing {len(self.facts)} facts")
+        # Memory maps close once no other object references the arrays
+        self.embeddings = None
+        self.facts = []
+        self.metadata = None
+        self.index = None
+        self.partitions = {}
+        self.lexical_index = None
+
+def _snapshot_nbytes(snapshot):
+    """Bytes of a snapshot's arrays, counting views of the fact matrix only once"""
+    if snapshot.embeddings is None:
+        return 0
+    arrays = [snapshot.embeddings]
+    arrays.extend(value for value in vars(snapshot.index).values() if isinstance(value, np.ndarray))
+    arrays.extend(partition.matrix for _, partition in snapshot.partitions.values())
+    total = sum(
+        array.nbytes for i, array in enumerate(arrays)
+        if i == 0 or not np.may_share_memory(array, snapshot.embeddings)
+    )
+    facts = snapshot.facts
+    if hasattr(facts, 'nbytes'):
+        total += facts.nbytes
+    else:
+        total += sum(len(fact) for fact in facts)
+    return total
 
 class ChristopherEmbeddings:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    def __init__(self, model_name='all-MiniLM-L6-v2', store_path='christopher_embeddings',
+                 index_type='exact', index_params=None, cache_size=10000, cache_ttl=3600,
+                 encoder_address=None, batch_window_ms=0, retrieval_mode='dense',
+                 lexical_prefilter=0, fusion_depth=50, model=None, fact_source=None,
+                 legacy_embeddings_file='christopher_embeddings.pkl'):
         """
         Initialize the embedding system
         
         Args:
             model_name (str): Name of the sentence transformer model to use
+            store_path (str): Directory of the memory-mapped embedding store
+            index_type (str): Search backend, 'exact' or 'ivf' (approximate)
+            index_params (dict): Backend options such as n_lists and nprobe
+            cache_size (int): Entries kept in the question and fact-id caches
+            cache_ttl (float): Seconds a cached entry stays valid
+            encoder_address (str): Shared embedding service ('host:port' or socket
+                path) to encode through instead of loading a local model
+            batch_window_ms (float): If > 0, micro-batch concurrent local question
+                encodes within this window
+            retrieval_mode (str): 'dense' (embeddings only) or 'hybrid' (BM25 and
+                dense rankings fused with reciprocal rank fusion)
+            lexical_prefilter (int): In hybrid mode, if > 0 only this many top BM25
+                candidates are dense-scored instead of the whole matrix
+            fusion_depth (int): Results taken from each ranking before fusion
+            model: Already loaded encoder to share (e.g. another persona's), so
+                several instances don't each load their own copy
+            fact_source (callable): Returns the fact records to sync, defaults to
+                personal_data.get_fact_records
+            legacy_embeddings_file (str): Old pickle file migrated into an empty
+                store, or None
         """
+        self.model_name = model_name
+        self._model = model  # loaded on first use unless shared, see the model property
+        self._model_lock = threading.Lock()
+        self.encoder_address = encoder_address
+        self.batch_window_ms = batch_window_ms
+        # Everything queries read; replaced as a whole, never modified in place
+        self.fact_source = fact_source or get_fact_records
+        self.snapshot = FactSnapshot(0, None, get_all_facts() if fact_source is None else [])
+        self._retired = []  # replaced snapshots, kept only to report ones still draining
+        self._update_lock = threading.RLock()  # serializes builds and swaps, never taken by queries
+        self._unloadable_signature = None
+        self._watcher = None
+        self._watch_stop = threading.Event()
+        self.store = EmbeddingStore(store_path)
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        if retrieval_mode not in ('dense', 'hybrid'):
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}', expected 'dense' or 'hybrid'")
+        self.retrieval_mode = retrieval_mode
+        self.lexical_prefilter = lexical_prefilter
+        self.fusion_depth = fusion_depth
+        self.legacy_embeddings_file = legacy_embeddings_file
+        
+        # Normalized question -> embedding, and (embedding, top_k) -> fact ids
+        self.question_cache = LRUCache(cache_size, cache_ttl)
+        self.fact_cache = LRUCache(cache_size, cache_ttl)
+        self._change_listeners = []
+        
+    # Read-only views of the current snapshot
+    @property
+    def embeddings(self):
+        return self.snapshot.embeddings
+    
+    @property
+    def facts(self):
+        return self.snapshot.facts
+    
+    @property
+    def metadata(self):
+        return self.snapshot.metadata
+    
+    @property
+    def index(self):
+        return self.snapshot.index
+    
+    @property
+    def partitions(self):
+        return self.snapshot.partitions
+    
+    @property
+    def lexical_index(self):
+        return self.snapshot.lexical_index
+    
+    @property
+    def version(self):
+        return self.snapshot.version
+    
+    @contextmanager
+    def _reading(self):
+        """Pin the current snapshot for the duration of a query"""
+        snapshot = self.snapshot
+        while not snapshot.acquire():
+            snapshot = self.snapshot  # it was swapped out and freed in between
+        try:
+            yield snapshot
+        finally:
+            snapshot.release()
+    
+    @property
+    def model(self):
+        """
+        The encoder, created the first time it is needed
+        
+        This is a local SentenceTransformer (optionally wrapped in a
+        micro-batcher), or a client for the shared embedding service.
+        """
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._create_model()
+        return self._model
+    
+    def _create_model(self):
+        if self.encoder_address:
+            from embedding_service import RemoteEncoder
+            print(f"Connecting to embedding service at {self.encoder_address}...")
+            encoder = RemoteEncoder(self.encoder_address)
+            if encoder.model_name != self.model_name:
+                raise ValueError(f"Embedding service runs {encoder.model_name}, expected {self.model_name}")
+            return encoder
+        
         print("Loading embedding model...")
-        self.model = SentenceTransformer(model_name)
-        self.facts = get_all_facts()
-        self.embeddings = None
-        self.embeddings_file = 'christopher_embeddings.pkl'
+        # Deferred import: sentence_transformers pulls in torch, which is slow to import
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(self.model_name)
+        if self.batch_window_ms > 0:
+            from embedding_service import BatchingEncoder
+            model = BatchingEncoder(model, window_ms=self.batch_window_ms)
+        return model
+    
+    def encoder_stats(self):
+        """Micro-batching metrics (queue depth, batch sizes), if batching is in use"""
+        if self._model is not None and hasattr(self._model, 'stats'):
+            return self._model.stats()
+        return None
+    
+    def warm_up(self):
+        """Load the model and run one dummy encode + search so the first real query is fast"""
+        embedding = normalize_rows(self.model.encode(["warm-up"]))[0]
+        with self._reading() as snapshot:
+            if snapshot.index is not None:
+                snapshot.index.search(embedding, 1)
+    
+    def add_change_listener(self, callback):
+        """Register a callback run whenever the indexed facts change"""
+        self._change_listeners.append(callback)
+    
+    def _set_embeddings(self, embeddings, facts, store_path=None, metadata=None, store_signature=None):
+        """
+        Build a snapshot around a new fact matrix, swap it in and invalidate dependent caches
         
+        The index, partitions and lexical index are built before the swap, so
+        queries keep using the previous snapshot until the new one is complete.
+        The previous snapshot is freed once its last in-flight query finishes.
+        """
+        with self._update_lock:
+            previous = self.snapshot
+            lexical_index = None
+            if self.retrieval_mode == 'hybrid':
+                lexical_index = self._update_lexical_index(previous.lexical_index, facts, store_path)
+            snapshot = FactSnapshot(
+                previous.version + 1,
+                embeddings,
+                facts,
+                metadata,
+                index=load_or_build_index(self.index_type, store_path, embeddings, **self.index_params),
+                partitions=self._build_partitions(embeddings, metadata),
+                lexical_index=lexical_index,
+                store_signature=store_signature
+            )
+            self.snapshot = snapshot
+            self._retired = [old for old in self._retired if not old.freed] + [previous]
+            previous.retire()
+        self.fact_cache.clear()
+        for callback in self._change_listeners:
+            callback()
+    
+    def snapshot_stats(self):
+        """Version and size of the live snapshot, plus replaced ones still serving queries"""
+        snapshot = self.snapshot
+        return {
+            'version': snapshot.version,
+            'facts': len(snapshot.facts) if snapshot.embeddings is not None else 0,
+            'loaded_at': snapshot.created_at,
+            'in_flight': snapshot.readers,
+            'draining': [
+                {'version': old.version, 'in_flight': old.readers}
+                for old in self._retired if not old.freed
+            ],
+            'watching_store': self._watcher is not None
+        }
+    
+    def memory_usage(self):
+        """
+        Approximate bytes held by the live snapshot: the fact matrix (memory-mapped
+        pages count once touched, which search does), index and partition copies,
+        and the fact texts. Computed once per snapshot.
+        """
+        snapshot = self.snapshot
+        if snapshot.nbytes is None:
+            snapshot.nbytes = _snapshot_nbytes(snapshot)
+        return snapshot.nbytes
+    
+    def fact_fingerprint(self):
+        """
+        Digest of the live facts in row order (and the model that encoded them),
+        e.g. to tell whether answers computed earlier still match. Computed
+        once per snapshot.
+        
+        Returns:
+            str: Hex digest, or None before any facts are loaded
+        """
+        snapshot = self.snapshot
+        if snapshot.fingerprint is None and snapshot.embeddings is not None:
+            if snapshot.store_signature is not None and self.store.signature() == snapshot.store_signature:
+                hashes = self.store.load_hashes(snapshot.facts)
+            else:
+                hashes = fact_hashes(snapshot.facts)
+            digest = hashlib.sha1(self.model_name.encode('utf-8'))
+            digest.update(np.ascontiguousarray(hashes).tobytes())
+            snapshot.fingerprint = digest.hexdigest()
+        return snapshot.fingerprint
+    
+    def _build_partitions(self, embeddings, metadata):
+        """
+        Precompute one exact index per category so filtered queries only score that slice
+        
+        Facts of a category that are stored contiguously (as personal_data sections
+        are) share the parent matrix as a view; scattered ones are copied once.
+        """
+        if metadata is None:
+            return {}
+        partitions = {}
+        for category, rows in metadata.category_rows().items():
+            if rows[-1] - rows[0] + 1 == len(rows):
+                matrix = embeddings[rows[0]:rows[-1] + 1]
+            else:
+                matrix = np.ascontiguousarray(embeddings[rows], dtype=np.float32)
+            partitions[category] = (rows, BruteForceIndex(matrix))
+        return partitions
+    
+    def categories(self):
+        """Category names that facts can be filtered by"""
+        return list(self.partitions)
+    
+    def _update_lexical_index(self, previous, facts, store_path=None):
+        """
+        Build the BM25 index, or re-tokenize only the facts that changed since
+        the previous one (on a copy, since queries may still be searching it)
+        """
+        hashes = self.store.load_hashes(facts) if store_path is not None else None
+        if previous is None:
+            lexical_index = BM25Index.build(facts, hashes)
+            print(f"Built lexical index: {lexical_index.stats()['terms']} terms")
+            return lexical_index
+        lexical_index = previous.copy()
+        added, removed = lexical_index.update(facts, hashes)
+        if added or removed:
+            print(f"Lexical index updated: {added} added, {removed} removed")
+        return lexical_index
+    
     def create_embeddings(self):
         """Create embeddings for all facts about Christopher"""
         print("Creating embeddings for Christopher's facts...")
-        self.embeddings = self.model.encode(self.facts)
-        print(f"Created embeddings for {len(self.facts)} facts")
+        records = self.fact_source()
+        facts = [record['fact'] for record in records]
+        self._set_embeddings(normalize_rows(self.model.encode(facts)), facts,
+                             metadata=FactMetadata.from_records(records))
+        print(f"Created embeddings for {len(facts)} facts")
         
+    def model_fingerprint(self):
+        """Identify the model configuration; embeddings from a different one are stale"""
+        return model_fingerprint(
+            self.model_name,
+            self.model.get_sentence_embedding_dimension(),
+            self.model.max_seq_length
+        )
+    
     def save_embeddings(self):
-        """Save embeddings to disk for faster loading"""
-        if self.embeddings is not None:
-            with open(self.embeddings_file, 'wb') as f:
-                pickle.dump({
-                    'embeddings': self.embeddings,
-                    'facts': self.facts
-                }, f)
-            print(f"Embeddings saved to {self.embeddings_file}")
+        """Save embeddings to the on-disk store for faster loading"""
+        with self._reading() as snapshot:
+            if snapshot.embeddings is not None:
+                self.store.save(snapshot.embeddings, snapshot.facts, self.model_name, self.model_fingerprint(),
+                                metadata=snapshot.metadata)
+                print(f"Embeddings saved to {self.store.path}")
         
+    def _migrate_legacy_pickle(self):
+        """Convert an old christopher_embeddings.pkl if no store exists yet"""
+        if self.legacy_embeddings_file and not self.store.exists() and os.path.exists(self.legacy_embeddings_file):
+            print(f"Migrating {self.legacy_embeddings_file} to {self.store.path}...")
+            migrate_pickle(self.legacy_embeddings_file, self.store, self.model_name)
+    
     def load_embeddings(self):
-        """Load embeddings from disk if they exist"""
-        if os.path.exists(self.embeddings_file):
+        """
+        Memory-map embeddings from disk if they exist
+        
+        A legacy pickle file is migrated to the store format on first load.
+        """
+        with self._update_lock:
+            self._migrate_legacy_pickle()
+            
+            # Taken before reading, so a commit racing with the load is picked up by the next check
+            signature = self.store.signature()
+            if signature is None:
+                return False
+            
             print("Loading existing embeddings...")
-            with open(self.embeddings_file, 'rb') as f:
-                data = pickle.load(f)
-                self.embeddings = data['embeddings']
-                self.facts = data['facts']
+            embeddings, facts, header = self.store.load()
+            if header['model_name'] != self.model_name:
+                print(f"⚠️  Stored embeddings were created with {header['model_name']}, not {self.model_name}")
+                self._unloadable_signature = signature
+                return False
+            
+            self._set_embeddings(embeddings, facts, self.store.path, self.store.load_metadata(header), signature)
             print("Embeddings loaded successfully")
             return True
-        return False
     
-    def find_relevant_facts(self, question, top_k=3):
+    def reload_if_changed(self):
+        """
+        Swap in the on-disk store if it was committed to since the live snapshot
+        was loaded (by ingest.py, another server's sync, ...)
+        
+        Returns:
+            bool: Whether a new snapshot was swapped in
+        """
+        signature = self.store.signature()
+        if signature is None or signature in (self.snapshot.store_signature, self._unloadable_signature):
+            return False
+        with self._update_lock:
+            if self.store.signature() == self.snapshot.store_signature:
+                return False  # another thread reloaded it first
+            print("🔄 Embedding store changed on disk, swapping in a new snapshot...")
+            return self.load_embeddings()
+    
+    def watch_store(self, interval=2.0):
+        """
+        Poll the store in a background thread and hot-swap committed changes
+        
+        Args:
+            interval (float): Seconds between checks (one stat() call each)
+        """
+        if self._watcher is not None:
+            return
+        
+        def watch():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    print(f"❌ Reloading the embedding store failed: {e}")
+        
+        self._watch_stop.clear()
+        self._watcher = threading.Thread(target=watch, name="store-watcher", daemon=True)
+        self._watcher.start()
+        print(f"👀 Watching {self.store.path} for changes every {interval}s")
+    
+    def stop_watching(self):
+        """Stop the store watcher thread, if running"""
+        if self._watcher is not None:
+            self._watch_stop.set()
+            self._watcher.join()
+            self._watcher = None
+    
+    def sync_embeddings(self, facts=None):
+        """
+        Bring the store up to date with the current facts, re-encoding only what changed
+        
+        Facts are matched to stored rows by content hash. Unchanged facts keep
+        their stored vectors, new or edited facts are encoded, and deleted facts
+        are dropped. The whole store is rebuilt if the model fingerprint differs.
+        Metadata-only changes rewrite the store without encoding anything.
+        
+        Args:
+            facts (list): Fact strings or records ({'fact', 'category', 'source',
+                'timestamp'}), defaults to the fact_source records
+        """
+        with self._update_lock:
+            if facts is None:
+                facts = self.fact_source()
+            records = [fact if isinstance(fact, dict) else {'fact': fact} for fact in facts]
+            facts = [record['fact'] for record in records]
+            metadata = FactMetadata.from_records(records)
+            
+            self._migrate_legacy_pickle()
+            
+            fingerprint = self.model_fingerprint()
+            hashes = fact_hashes(facts)
+            row_by_hash = {}
+            old_embeddings = None
+            
+            if self.store.exists():
+                old_embeddings, old_facts, header = self.store.load()
+                if header.get('model_fingerprint') in (fingerprint, None) and header['model_name'] == self.model_name:
+                    old_hashes = self.store.load_hashes(old_facts)
+                    if np.array_equal(old_hashes, hashes) and metadata.equals(self.store.load_metadata(header)):
+                        print("Embeddings are up to date")
+                        if self.store.signature() == self.snapshot.store_signature:
+                            return True  # already serving exactly this store
+                        return self.load_embeddings()
+                    row_by_hash = {h: row for row, h in enumerate(old_hashes)}
+                else:
+                    print("⚠️  Embedding model changed, re-encoding all facts")
+            
+            old_rows = [row_by_hash.get(h) for h in hashes]
+            kept = [i for i, row in enumerate(old_rows) if row is not None]
+            missing = [i for i, row in enumerate(old_rows) if row is None]
+            removed = len(row_by_hash) - len(set(old_rows[i] for i in kept))
+            
+            embeddings = np.empty((len(facts), self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+            if kept:
+                embeddings[kept] = old_embeddings[[old_rows[i] for i in kept]]
+            if missing:
+                embeddings[missing] = normalize_rows(self.model.encode([facts[i] for i in missing]))
+            
+            print(f"Embeddings synced: {len(missing)} encoded, {len(kept)} reused, {removed} removed")
+            self.store.save(embeddings, facts, self.model_name, fingerprint, hashes, metadata)
+            return self.load_embeddings()
+    
+    def _encode_questions(self, questions):
+        """
+        Encode questions into unit-length float32 rows
+        
+        Previously seen questions come from the cache; the rest are encoded
+        together in one model call.
+        """
+        keys = [normalize_question(question) for question in questions]
+        embeddings = [self.question_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            encoded = normalize_rows(self.model.encode([questions[i] for i in missing]))
+            for i, embedding in zip(missing, encoded):
+                embedding.flags.writeable = False
+                embeddings[i] = embedding
+                self.question_cache.put(keys[i], embedding)
+        
+        return np.vstack(embeddings)
+    
+    def embed_question(self, question):
+        """Unit-length embedding of a single question (cached)"""
+        return self._encode_questions([question])[0]
+    
+    def embed_questions(self, questions):
+        """Unit-length embeddings of several questions (cached), uncached ones encoded in one call"""
+        return self._encode_questions(questions)
+    
+    def _format_results(self, snapshot, indices, scores):
+        """Turn search output into the result dicts returned to callers"""
+        results = []
+        for idx, score in zip(indices, scores):
+            if idx < 0:
+                continue  # padding from approximate batch search
+            result = {
+                'fact': snapshot.facts[idx],
+                'similarity': float(score),
+                'index': int(idx)
+            }
+            if snapshot.metadata is not None:
+                result.update(snapshot.metadata.get(idx))
+            results.append(result)
+        return results
+    
+    def find_relevant_facts(self, question, top_k=3, filters=None, context_embedding=None, context_weight=0.3):
         """
         Find the most relevant facts for a given question
         
         Args:
             question (str): The user's question
             top_k (int): Number of top relevant facts to return
+            filters (dict): Optional restrictions: 'category' (name or list of
+                names), 'source' (name or list), 'since'/'until' (timestamps)
+            context_embedding (np.ndarray): Unit-length conversation embedding that
+                biases the search toward earlier topics, e.g. for follow-ups
+            context_weight (float): How strongly the conversation embedding counts
             
         Returns:
             list: Top relevant facts with their similarity scores
@@ -67,24 +592,181 @@ class ChristopherEmbeddings:
             print("No embeddings found. Creating new ones...")
             self.create_embeddings()
             
-        # Create embedding for the question
-        question_embedding = self.model.encode([question])
+        # Create a unit-length embedding for the question
+        with span('encode'):
+            question_embedding = self.embed_question(question)
+        if context_embedding is not None:
+            biased = question_embedding + context_weight * context_embedding
+            question_embedding = normalize_rows(biased[np.newaxis, :])[0]
+        
+        with self._reading() as snapshot:
+            # Row ids are only meaningful within one snapshot
+            cache_key = (hashlib.blake2b(question_embedding.tobytes(), digest_size=16).digest(), top_k,
+                         snapshot.version)
+            if self.retrieval_mode == 'hybrid':
+                cache_key += (normalize_question(question),)  # lexical ranking depends on the wording
+            if filters:
+                cache_key += (filter_key(filters),)
+            cached = self.fact_cache.get(cache_key)
+            if cached is None:
+                with span('search'):
+                    cached = self._search(snapshot, question, question_embedding, top_k, filters)
+                self.fact_cache.put(cache_key, cached)
+            top_indices, top_scores = cached
+            
+            return self._format_results(snapshot, top_indices, top_scores)
+    
+    def _search(self, snapshot, question, question_embedding, top_k, filters=None):
+        """Route one query to the hybrid, filtered or plain index search"""
+        if self.retrieval_mode == 'hybrid':
+            return self._hybrid_search(snapshot, question, question_embedding, top_k, filters)
+        if filters:
+            return self._filtered_search(snapshot, question_embedding, top_k, filters)
+        # Fact rows are pre-normalized, so a dot product is the cosine similarity
+        return snapshot.index.search(question_embedding, top_k)
+    
+    def _split_filters(self, snapshot, filters):
+        """Separate the category (partition) filter from the per-row ones"""
+        if snapshot.metadata is None:
+            raise ValueError("These facts have no metadata to filter on")
+        filters = dict(filters)
+        category = filters.pop('category', None)
+        unknown = set(filters) - {'source', 'since', 'until'}
+        if unknown:
+            raise ValueError(f"Unknown fact filters: {sorted(unknown)}")
+        categories = [category] if isinstance(category, str) else category
+        return categories, filters
+    
+    def _filtered_search(self, snapshot, question_embedding, top_k, filters):
+        """
+        Search only the facts that pass the filters
         
-        # Calculate similarity scores
-        similarities = cosine_similarity(question_embedding, self.embeddings)[0]
+        A category filter selects precomputed partitions, so facts outside them
+        are never scored. Source and time filters are applied to row ids before
+        the remaining rows are scored.
+        """
+        categories, row_filters = self._split_filters(snapshot, filters)
+        if categories is None:
+            slices = [(np.arange(len(snapshot.facts)), None)]
+        else:
+            slices = [snapshot.partitions[name] for name in categories if name in snapshot.partitions]
         
-        # Get top k most similar facts
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        found_rows, found_scores = [], []
+        for rows, index in slices:
+            if row_filters or index is None:
+                rows = rows[snapshot.metadata.mask(rows, **row_filters)]
+                scores = self._dense_scores(snapshot, rows, question_embedding)
+                best = top_k_indices(scores, top_k)
+                found_rows.append(rows[best])
+                found_scores.append(scores[best])
+            else:
+                local, scores = index.search(question_embedding, top_k)
+                found_rows.append(rows[local])
+                found_scores.append(scores)
         
-        results = []
-        for idx in top_indices:
-            results.append({
-                'fact': self.facts[idx],
-                'similarity': similarities[idx],
-                'index': idx
-            })
+        if not found_rows:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+        rows, scores = np.concatenate(found_rows), np.concatenate(found_scores)
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best]
+    
+    def _filter_mask(self, snapshot, filters):
+        """Boolean mask over all rows of the facts passing the filters"""
+        categories, row_filters = self._split_filters(snapshot, filters)
+        if categories is None:
+            mask = np.ones(len(snapshot.facts), dtype=bool)
+        else:
+            mask = np.zeros(len(snapshot.facts), dtype=bool)
+            for name in categories:
+                if name in snapshot.partitions:
+                    mask[snapshot.partitions[name][0]] = True
+        if row_filters:
+            rows = np.flatnonzero(mask)
+            mask[rows] = snapshot.metadata.mask(rows, **row_filters)
+        return mask
+    
+    def _dense_scores(self, snapshot, rows, question_embedding):
+        """Exact cosine similarity of selected fact rows"""
+        order = np.argsort(rows)  # ascending rows read a memory-mapped matrix sequentially
+        scores = np.empty(len(rows), dtype=np.float32)
+        scores[order] = np.asarray(snapshot.embeddings[rows[order]], dtype=np.float32) @ question_embedding
+        return scores
+    
+    def _hybrid_search(self, snapshot, question, question_embedding, top_k, filters=None):
+        """
+        Fuse the BM25 and dense rankings with reciprocal rank fusion
+        
+        With lexical_prefilter set and enough keyword matches, the dense ranking
+        only covers the top BM25 candidates instead of scanning every fact.
+        
+        Returns:
+            tuple: (indices, scores) where scores are the dense cosine similarities,
+                ordered by fused rank
+        """
+        depth = max(self.fusion_depth, top_k)
+        prefilter = max(self.lexical_prefilter, depth) if self.lexical_prefilter else depth
+        lexical_rows, _ = snapshot.lexical_index.search(question, prefilter)
+        if filters:
+            lexical_rows = lexical_rows[self._filter_mask(snapshot, filters)[lexical_rows]]
+        
+        if self.lexical_prefilter and len(lexical_rows) >= top_k:
+            candidate_scores = self._dense_scores(snapshot, lexical_rows, question_embedding)
+            best = top_k_indices(candidate_scores, depth)
+            dense_rows = lexical_rows[best]
+        elif filters:
+            dense_rows, _ = self._filtered_search(snapshot, question_embedding, depth, filters)
+        else:
+            dense_rows, _ = snapshot.index.search(question_embedding, depth)
+            dense_rows = dense_rows[dense_rows >= 0]
+        
+        fused_rows, _ = reciprocal_rank_fusion([dense_rows, lexical_rows[:depth]])
+        fused_rows = fused_rows[:top_k]
+        return fused_rows, self._dense_scores(snapshot, fused_rows, question_embedding)
+    
+    def find_relevant_facts_batch(self, questions, top_k=3, filters=None):
+        """
+        Find the most relevant facts for many questions at once
+        
+        All questions are encoded in a single model call and scored against
+        the fact matrix as one matrix multiply.
+        
+        Args:
+            questions (list): The users' questions
+            top_k (int): Number of top relevant facts to return per question
+            filters (dict): Optional restrictions, see find_relevant_facts
             
-        return results
+        Returns:
+            list: One list of relevant facts per question, in input order
+        """
+        if not questions:
+            return []
+        
+        if self.embeddings is None:
+            print("No embeddings found. Creating new ones...")
+            self.create_embeddings()
+        
+        with span('encode'):
+            question_embeddings = self._encode_questions(list(questions))
+        
+        with self._reading() as snapshot:
+            if self.retrieval_mode == 'hybrid' or filters:
+                with span('search'):
+                    results = [
+                        self._search(snapshot, question, embedding, top_k, filters)
+                        for question, embedding in zip(questions, question_embeddings)
+                    ]
+            else:
+                with span('search'):
+                    results = zip(*snapshot.index.search_batch(question_embeddings, top_k))
+            
+            return [self._format_results(snapshot, indices, scores) for indices, scores in results]
+    
+    def cache_stats(self):
+        """Hit/miss counters of the retrieval caches"""
+        return {
+            'question_embeddings': self.question_cache.stats(),
+            'fact_ids': self.fact_cache.stats()
+        }
     
     def get_context_for_question(self, question, top_k=3):
         """
@@ -127,12 +809,12 @@ def test_embeddings():
     print("TESTING EMBEDDING SYSTEM")
     print("="*50)
     
-    for question in test_questions:
+    all_relevant_facts = embedder.find_relevant_facts_batch(test_questions, top_k=3)
+    
+    for question, relevant_facts in zip(test_questions, all_relevant_facts):
         print(f"\nQuestion: {question}")
         print("-" * 40)
         
-        relevant_facts = embedder.find_relevant_facts(question, top_k=3)
-        
         for i, result in enumerate(relevant_facts, 1):
             print(f"{i}. {result['fact']}")
             print(f"   Similarity: {result['similarity']:.3f}")
@@ -10,13 +10,12 @@ def fix_and_test_embeddings():
     print("=" * 50)
     
     # Initialize embeddings system
-    print("1. Creating new embeddings...")
+    print("1. Syncing embeddings with personal_data...")
     embedder = ChristopherEmbeddings()
     
-    # Force creation of new embeddings
-    embedder.create_embeddings()
-    embedder.save_embeddings()
-    print("✅ New embeddings created and saved")
+    # Only facts that were added or edited since the last run get re-encoded
+    embedder.sync_embeddings()
+    print("✅ Embeddings up to date")
     
     # Test the specific favorite food question
     print("\n2. Testing favorite food question...")
@@ -27,12 +26,12 @@ def fix_and_test_embeddings():
         "What is Christopher's favorite dish?"
     ]
     
-    for question in test_questions:
+    all_results = embedder.find_relevant_facts_batch(test_questions, top_k=3)
+    
+    for question, results in zip(test_questions, all_results):
         print(f"\n❓ Question: {question}")
         print("-" * 40)
         
-        results = embedder.find_relevant_facts(question, top_k=3)
-        
         for i, fact in enumerate(results, 1):
             print(f"{i}. {fact['fact']}")
             print(f"   Similarity: {fact['similarity']:.4f}")
@@ -0,0 +1,223 @@
+"""
+Bulk fact ingestion for ChristopherGPT
+Streams facts (with optional category, source and timestamp metadata) from
+a JSONL or CSV export, drops duplicates, encodes them in chunks across a
+pool of worker processes and appends the rows to an on-disk embedding
+store. Only a few chunks are ever held in memory, and an interrupted run
+picks up from its last committed chunk when restarted with the same
+arguments.
+
+Usage:
+    python ingest.py facts.jsonl --store christopher_embeddings_bulk
+    python ingest.py export.csv --format csv --field text --workers 4 --chunk-size 4096
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from embedding_store import HASH_DTYPE, EmbeddingStore, StoreAppender, fact_hash, model_fingerprint
+from vector_search import normalize_rows
+
+_worker_model = None
+
+
+METADATA_FIELDS = ('category', 'source', 'timestamp')
+
+
+def _record(fact, row):
+    """Fact text plus whichever metadata fields the input row carries"""
+    metadata = {name: row[name] for name in METADATA_FIELDS if row.get(name) not in (None, '')}
+    return fact, metadata or None
+
+
+def read_jsonl(path, field='fact'):
+    """
+    Yield (fact, metadata) from a JSONL file: each line is a string, or an
+    object with `field` and optional category/source/timestamp keys
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                yield None, None
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                yield _record(record.get(field, record.get('text')), record)
+            else:
+                yield record, None
+
+
+def read_csv(path, field='fact'):
+    """
+    Yield (fact, metadata) from a CSV file: the fact is the `field` column (or
+    the first column), metadata comes from category/source/timestamp columns
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        column = field if field in (reader.fieldnames or []) else (reader.fieldnames or [None])[0]
+        for row in reader:
+            yield _record(row.get(column), row)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def _init_worker(model_name):
+    global _worker_model
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _model_info():
+    return _worker_model.get_sentence_embedding_dimension(), _worker_model.max_seq_length
+
+
+def _encode_chunk(facts, batch_size):
+    embeddings = _worker_model.encode(facts, batch_size=batch_size, convert_to_numpy=True)
+    return normalize_rows(embeddings)
+
+
+def chunk_records(records, chunk_size, seen):
+    """
+    Group records into chunks of new, unique facts
+
+    Args:
+        records (Iterable): (fact, metadata) pairs from a reader
+        chunk_size (int): Facts per chunk
+        seen (set): fact_hash() digests to skip, updated with every new fact
+
+    Yields:
+        tuple: (facts, hashes, metadata, records_consumed) where records_consumed
+            counts every input record read so far, including skipped ones
+    """
+    facts, hashes, metadata = [], [], []
+    consumed = 0
+    for fact, fact_metadata in records:
+        consumed += 1
+        if not isinstance(fact, str) or not fact.strip():
+            continue
+        fact = fact.strip()
+        digest = fact_hash(fact)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        facts.append(fact)
+        hashes.append(digest)
+        metadata.append(fact_metadata)
+        if len(facts) >= chunk_size:
+            yield facts, hashes, metadata, consumed
+            facts, hashes, metadata = [], [], []
+    yield facts, hashes, metadata, consumed
+
+
+def ingest(source, store_path, source_format='jsonl', field='fact', model_name='all-MiniLM-L6-v2',
+           chunk_size=2048, workers=None, batch_size=64, max_pending=None):
+    """
+    Ingest a fact export into an embedding store
+
+    Args:
+        source (str): Path to the JSONL or CSV file
+        store_path (str): Embedding store directory, created if missing
+        source_format (str): 'jsonl' or 'csv'
+        field (str): JSON key or CSV column holding the fact text
+        model_name (str): Sentence transformer model used by the workers
+        chunk_size (int): Facts per worker task and per store commit
+        workers (int): Encoding processes, defaults to the CPU count
+        batch_size (int): Batch size inside each worker's encode call
+        max_pending (int): Chunks queued ahead of the writer, defaults to 2 per worker
+
+    Returns:
+        dict: Counts of records read, facts appended and duplicates skipped
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    source_id = os.path.abspath(source)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_name,)) as pool:
+        dimension, max_seq_length = pool.submit(_model_info).result()
+        appender = StoreAppender(
+            EmbeddingStore(store_path),
+            model_name,
+            model_fingerprint(model_name, dimension, max_seq_length),
+            dimension
+        )
+
+        # Resume: skip the records a previous run already committed
+        state = appender.state or {}
+        skip = state.get('records_consumed', 0) if state.get('source') == source_id else 0
+        if skip:
+            print(f"⏩ Resuming after {skip} records ({appender.count} facts in store)")
+
+        records = READERS[source_format](source, field)
+        for _ in range(skip):
+            next(records, None)
+
+        seen = appender.existing_hashes()
+        stats = {'records': skip, 'appended': 0, 'duplicates': 0, 'store_count': appender.count}
+        pending = deque()
+        start = time.perf_counter()
+        last_report = start
+
+        def commit_oldest():
+            nonlocal last_report
+            future, facts, hashes, metadata, consumed = pending.popleft()
+            embeddings = future.result() if future else np.empty((0, dimension), dtype=np.float32)
+            appender.append(embeddings, facts, np.array(hashes, dtype=HASH_DTYPE),
+                            state={'source': source_id, 'records_consumed': skip + consumed},
+                            metadata=metadata)
+            stats['appended'] += len(facts)
+            stats['records'] = skip + consumed
+            stats['store_count'] = appender.count
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                last_report = now
+                print(f"📥 {stats['records']} records | {stats['appended']} appended | "
+                      f"{stats['appended'] / (now - start):.0f} facts/sec")
+
+        unique = 0
+        for facts, hashes, metadata, consumed in chunk_records(records, chunk_size, seen):
+            unique += len(facts)
+            stats['duplicates'] = consumed - unique  # includes blank records
+            # The last chunk may be empty; it is still committed to record the final position
+            future = pool.submit(_encode_chunk, facts, batch_size) if facts else None
+            pending.append((future, facts, hashes, metadata, consumed))
+            while len(pending) > max_pending:
+                commit_oldest()
+
+        while pending:
+            commit_oldest()
+
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = round(elapsed, 2)
+    stats['facts_per_second'] = round(stats['appended'] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help="JSONL or CSV file of facts")
+    parser.add_argument('--store', default='christopher_embeddings_bulk', help="embedding store directory")
+    parser.add_argument('--format', choices=sorted(READERS), help="input format (default: from extension)")
+    parser.add_argument('--field', default='fact', help="JSON key or CSV column holding the fact")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--chunk-size', type=int, default=2048)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    source_format = args.format or ('csv' if args.source.lower().endswith('.csv') else 'jsonl')
+    print(f"🚚 Ingesting {args.source} into {args.store}...")
+    result = ingest(args.source, args.store, source_format, args.field, args.model,
+                    args.chunk_size, args.workers, args.batch_size)
+    print(f"✅ {result['records']} records read, {result['appended']} facts appended, "
+          f"{result['duplicates']} duplicates/blank skipped in {result['seconds']}s "
+          f"({result['facts_per_second']} facts/sec); store now holds {result['store_count']} facts")
@@ -0,0 +1,285 @@
+"""
+Lexical (BM25) index for ChristopherGPT
+An inverted index over the fact texts. It catches questions that hinge on a
+specific keyword ("What watch brand...") which sentence embeddings can rank
+poorly, and it cheaply narrows the candidate set for dense scoring.
+
+The index is keyed by fact content hash, so when the fact list changes only
+added and removed facts are (un)tokenized; unchanged facts just get their
+new row numbers. Every row is its own document, including rows that repeat
+another fact's text. Slots freed by removed facts are reused, and the slots
+are renumbered once more than half of them are free, so repeated updates do
+not grow the index.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from embedding_store import fact_hashes
+from vector_search import top_k_indices
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his
+how i in is it its me my of on or she so that the their them they this to was what when
+where which who why will with would you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token):
+    """Very light suffix stripping so plurals match their singular ('watches' -> 'watch')"""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith(('ches', 'shes', 'sses', 'xes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lowercased, stemmed terms of a text with stopwords removed"""
+    return [_stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1=1.5, b=0.75):
+        """
+        Args:
+            k1 (float): Term-frequency saturation
+            b (float): Strength of document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}      # term -> {doc id: term frequency}
+        self._arrays = {}       # term -> (doc ids, frequencies), rebuilt only for touched terms
+        self.doc_terms = []     # doc id -> Counter of terms, None while the slot is free
+        self.doc_hashes = []    # doc id -> fact content hash
+        self.hash_to_docs = {}  # fact content hash -> tuple of doc ids, one per row with that text
+        self._free = []         # doc ids of removed facts, reused by later additions
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.doc_to_row = np.zeros(0, dtype=np.int64)
+        self.total_length = 0
+        self.num_docs = 0
+        self._shared_terms = set()  # terms whose postings dict still belongs to the index this was copied from
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, facts, hashes=None, **params):
+        index = cls(**params)
+        index.update(facts, hashes)
+        return index
+
+    def copy(self):
+        """
+        Copy that can be updated while searches keep running on this index
+
+        Only the top-level tables are copied; a term's postings are shared until
+        an update touches that term.
+        """
+        with self._lock:
+            clone = BM25Index(self.k1, self.b)
+            clone.postings = dict(self.postings)
+            clone._arrays = dict(self._arrays)
+            clone.doc_terms = list(self.doc_terms)
+            clone.doc_hashes = list(self.doc_hashes)
+            clone.hash_to_docs = dict(self.hash_to_docs)
+            clone._free = list(self._free)
+            clone.doc_lengths = self.doc_lengths.copy()
+            clone.doc_to_row = self.doc_to_row.copy()
+            clone.total_length = self.total_length
+            clone.num_docs = self.num_docs
+            clone._shared_terms = set(self.postings)
+            return clone
+
+    def _own_postings(self, term):
+        """Postings of a term, copied first if still shared with another index"""
+        if term in self._shared_terms:
+            self._shared_terms.discard(term)
+            self.postings[term] = dict(self.postings[term])
+        return self.postings.setdefault(term, {})
+
+    def _add_doc(self, terms, digest):
+        if self._free:
+            doc = self._free.pop()
+            self.doc_terms[doc] = terms
+            self.doc_hashes[doc] = digest
+        else:
+            doc = len(self.doc_terms)
+            self.doc_terms.append(terms)
+            self.doc_hashes.append(digest)
+        self.hash_to_docs[digest] = self.hash_to_docs.get(digest, ()) + (doc,)
+        for term, count in terms.items():
+            self._own_postings(term)[doc] = count
+            self._arrays.pop(term, None)
+        length = sum(terms.values())
+        self.total_length += length
+        self.num_docs += 1
+        return doc, length
+
+    def _remove_doc(self, doc):
+        terms = self.doc_terms[doc]
+        for term in terms:
+            term_postings = self._own_postings(term)
+            del term_postings[doc]
+            if not term_postings:
+                del self.postings[term]
+            self._arrays.pop(term, None)
+        self.total_length -= sum(terms.values())
+        self.num_docs -= 1
+        self.doc_terms[doc] = None
+        digest = self.doc_hashes[doc]
+        docs = tuple(other for other in self.hash_to_docs[digest] if other != doc)
+        if docs:
+            self.hash_to_docs[digest] = docs
+        else:
+            del self.hash_to_docs[digest]
+        self.doc_lengths[doc] = 0
+        self.doc_to_row[doc] = -1
+        self._free.append(doc)
+
+    def _compact(self):
+        """Renumber the live docs 0..num_docs-1, dropping the free slots"""
+        live = [doc for doc, terms in enumerate(self.doc_terms) if terms is not None]
+        new_ids = np.full(len(self.doc_terms), -1, dtype=np.int64)
+        new_ids[live] = np.arange(len(live))
+        self.postings = {
+            term: {int(new_ids[doc]): count for doc, count in term_postings.items()}
+            for term, term_postings in self.postings.items()
+        }
+        self._shared_terms = set()
+        self._arrays = {}
+        self.doc_terms = [self.doc_terms[doc] for doc in live]
+        self.doc_hashes = [self.doc_hashes[doc] for doc in live]
+        self.hash_to_docs = {digest: tuple(int(new_ids[doc]) for doc in docs)
+                             for digest, docs in self.hash_to_docs.items()}
+        self.doc_lengths = self.doc_lengths[live]
+        self._free = []
+
+    def update(self, facts, hashes=None):
+        """
+        Bring the index in line with a new fact list, touching only changed facts
+
+        Args:
+            facts (Sequence): Facts in row order
+            hashes (Sequence): Their content hashes, computed if omitted
+
+        Returns:
+            tuple: (added, removed) fact counts
+        """
+        hashes = [bytes(digest) for digest in (fact_hashes(facts) if hashes is None else hashes)]
+        wanted = Counter(hashes)
+        first_rows = {}
+        for row, digest in enumerate(hashes):
+            first_rows.setdefault(digest, row)
+
+        with self._lock:
+            # One doc per row: drop docs whose text is gone or now repeated fewer times
+            stale = []
+            for digest, docs in self.hash_to_docs.items():
+                surplus = len(docs) - wanted.get(digest, 0)
+                if surplus > 0:
+                    stale.extend(docs[-surplus:])
+            for doc in stale:
+                self._remove_doc(doc)
+
+            added = []
+            for digest, row in first_rows.items():
+                missing = wanted[digest] - len(self.hash_to_docs.get(digest, ()))
+                if missing > 0:
+                    terms = Counter(tokenize(facts[row]))  # duplicates share one tokenization
+                    added.extend(self._add_doc(terms, digest) for _ in range(missing))
+
+            capacity = len(self.doc_terms)
+            if capacity > len(self.doc_lengths):
+                self.doc_lengths = np.concatenate([
+                    self.doc_lengths, np.zeros(capacity - len(self.doc_lengths), dtype=np.float32)
+                ])
+            for doc, length in added:
+                self.doc_lengths[doc] = length
+
+            if len(self._free) * 2 > capacity:
+                self._compact()
+                capacity = len(self.doc_terms)
+
+            self.doc_to_row = np.full(capacity, -1, dtype=np.int64)
+            seen = Counter()
+            for row, digest in enumerate(hashes):
+                self.doc_to_row[self.hash_to_docs[digest][seen[digest]]] = row
+                seen[digest] += 1
+
+        return len(added), len(stale)
+
+    def _term_arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            term_postings = self.postings[term]
+            arrays = (
+                np.fromiter(term_postings.keys(), dtype=np.int64, count=len(term_postings)),
+                np.fromiter(term_postings.values(), dtype=np.float32, count=len(term_postings))
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def _score(self, query):
+        """BM25 scores of the doc slots matching at least one query term (call with the lock held)"""
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if not terms or self.num_docs == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        average_length = self.total_length / self.num_docs
+        scores = np.zeros(len(self.doc_terms), dtype=np.float32)
+        for term in terms:
+            docs, frequencies = self._term_arrays(term)
+            df = len(docs)
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / average_length)
+            scores[docs] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+        matched = np.flatnonzero(scores)
+        return matched, scores[matched]
+
+    def search(self, query, top_k):
+        """
+        Args:
+            query (str): Question text
+            top_k (int): Number of results to return
+
+        Returns:
+            tuple: (rows, scores) of the best-matching facts, best first;
+                fewer than top_k when few facts share a term with the query
+        """
+        with self._lock:
+            docs, scores = self._score(query)
+            best = top_k_indices(scores, top_k)
+            return self.doc_to_row[docs[best]], scores[best]
+
+    def stats(self):
+        return {
+            'facts': self.num_docs,
+            'terms': len(self.postings),
+            'average_length': round(self.total_length / self.num_docs, 2) if self.num_docs else 0.0
+        }
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse several ranked lists of rows: score(row) = sum over lists of 1 / (k + rank)
+
+    Args:
+        rankings (list): Arrays of row ids, each best first
+        k (int): Damping constant; larger values flatten the rank differences
+
+    Returns:
+        tuple: (rows, fused scores), best first
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (k + rank + 1)
+    rows = sorted(fused, key=fused.get, reverse=True)
+    return np.array(rows, dtype=np.int64), np.array([fused[row] for row in rows], dtype=np.float32)
@@ -0,0 +1,272 @@
+"""
+Lightweight metrics for ChristopherGPT
+Timing spans around each stage of answering a question (question encoding,
+similarity search, prompt building, the OpenAI call, ...), latency summaries
+with p50/p95/p99 over a sliding window, counters, and a Prometheus text
+renderer for /api/metrics. No metrics library is required.
+
+Usage:
+    with span('encode'):
+        embedding = model.encode(question)
+
+    with trace() as timings:      # per-request breakdown in milliseconds
+        bot.get_response(question)
+    print(timings)                # {'retrieval_ms': 4.1, 'encode_ms': 3.2, ...}
+
+    with labelled(persona='ada'): # extra labels on everything recorded inside
+        bot.get_response(question)
+"""
+
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+STAGE_METRIC = 'christophergpt_stage_duration_seconds'
+TOKENS_METRIC = 'christophergpt_openai_tokens_total'
+OPENAI_ERRORS_METRIC = 'christophergpt_openai_errors_total'
+DEGRADED_METRIC = 'christophergpt_degraded_responses_total'
+PROMPT_TOKENS_METRIC = 'christophergpt_prompt_tokens'
+
+# Per-request stage breakdown; None when no trace() is active
+_current_trace = contextvars.ContextVar('christophergpt_trace', default=None)
+# Labels added to every observation and counter increment, see labelled()
+_current_labels = contextvars.ContextVar('christophergpt_labels', default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'NaN'
+    return repr(float(value))
+
+
+class Summary:
+    def __init__(self, window=1024):
+        """
+        Running count and sum plus a sliding window of recent observations
+
+        Args:
+            window (int): Number of recent observations the quantiles are computed from
+        """
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self):
+        """{quantile: value} over the window, NaN before the first observation"""
+        if not self.samples:
+            return {q: float('nan') for q in QUANTILES}
+        values = np.quantile(np.fromiter(self.samples, dtype=np.float64), QUANTILES)
+        return dict(zip(QUANTILES, values.tolist()))
+
+
+class MetricsRegistry:
+    def __init__(self, window=1024):
+        """
+        Thread-safe store of summaries and counters
+
+        Args:
+            window (int): Sliding window size of every summary
+        """
+        self.window = window
+        self._summaries = {}    # name -> {label key: Summary}
+        self._counters = {}     # name -> {label key: value}
+        self._help = {}         # name -> help text
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        """Set the HELP line of a metric"""
+        self._help[name] = help_text
+
+    def observe(self, name, value, **labels):
+        """Add an observation (e.g. a duration in seconds) to a summary"""
+        key = _label_key({**(_current_labels.get() or {}), **labels})
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                summary = series[key] = Summary(self.window)
+            summary.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        """Increase a counter"""
+        key = _label_key({**(_current_labels.get() or {}), **labels})
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def add_collector(self, collector):
+        """
+        Register a callable evaluated on every render, for values that live
+        elsewhere (cache sizes, hit counters, ...)
+
+        The collector returns an iterable of (name, type, help, labels dict, value).
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self):
+        """
+        Current values as plain dicts (quantiles in milliseconds), e.g. for JSON
+
+        Returns:
+            dict: {'summaries': {name: [{labels, count, p50_ms, ...}]}, 'counters': {name: [{labels, value}]}}
+        """
+        with self._lock:
+            summaries = {
+                name: [
+                    {
+                        'labels': dict(key),
+                        'count': summary.count,
+                        'sum_ms': round(summary.sum * 1000, 3),
+                        **{f'p{int(q * 100)}_ms': round(value * 1000, 3)
+                           for q, value in summary.quantiles().items()}
+                    }
+                    for key, summary in series.items()
+                ]
+                for name, series in self._summaries.items()
+            }
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+        return {'summaries': summaries, 'counters': counters}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._summaries):
+                lines.append(f'# HELP {name} {self._help.get(name, name)}')
+                lines.append(f'# TYPE {name} summary')
+                for key, summary in sorted(self._summaries[name].items()):
+                    for q, value in summary.quantiles().items():
+                        labels = _format_labels(key + (('quantile', q),))
+                        lines.append(f'{name}{labels} {_format_value(value)}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {_format_value(summary.sum)}')
+                    lines.append(f'{name}_count{_format_labels(key)} {summary.count}')
+            for name in sorted(self._counters):
+                lines.append(f'# HELP {name} {self._help.get(name, name)}')
+                lines.append(f'# TYPE {name} counter')
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+
+        collected = {}
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                print(f"⚠️  Metrics collector failed: {e}")
+                continue
+            for name, kind, help_text, labels, value in samples:
+                collected.setdefault((name, kind, help_text), []).append((labels, value))
+        for (name, kind, help_text), samples in collected.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(_label_key(labels))} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Drop every recorded value (collectors stay registered)"""
+        with self._lock:
+            self._summaries.clear()
+            self._counters.clear()
+
+
+# Process-wide registry used by the spans below and served on /api/metrics
+METRICS = MetricsRegistry()
+METRICS.describe(STAGE_METRIC, "Time spent in each stage of answering a question")
+METRICS.describe(TOKENS_METRIC, "Tokens used by OpenAI chat completions")
+METRICS.describe(OPENAI_ERRORS_METRIC, "OpenAI calls that failed and fell back to the basic answer")
+METRICS.describe(DEGRADED_METRIC, "Responses that fell back from a full OpenAI answer, by reason (circuit_open, deadline, openai_error)")
+METRICS.describe(PROMPT_TOKENS_METRIC, "Prompt tokens per OpenAI request, counted locally before sending")
+
+
+@contextmanager
+def trace():
+    """
+    Collect a per-request breakdown from every span run inside the block,
+    including spans in threads started with asyncio.to_thread
+
+    Yields:
+        dict: {'<stage>_ms': milliseconds}, filled in as the spans finish
+    """
+    timings = {}
+    token = _current_trace.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def labelled(**labels):
+    """
+    Add labels (e.g. persona='ada') to every metric recorded inside the
+    block, including in threads started with asyncio.to_thread
+    """
+    token = _current_labels.set({**(_current_labels.get() or {}), **labels})
+    try:
+        yield
+    finally:
+        _current_labels.reset(token)
+
+
+@contextmanager
+def span(stage, registry=None):
+    """
+    Time a block as one stage: recorded in the stage summary and, inside a
+    trace(), added to the request's breakdown (repeated stages accumulate)
+
+    Args:
+        stage (str): Stage name, e.g. 'encode', 'search', 'openai'
+        registry (MetricsRegistry): Defaults to the process-wide METRICS
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        (registry or METRICS).observe(STAGE_METRIC, elapsed, stage=stage)
+        timings = _current_trace.get()
+        if timings is not None:
+            key = f'{stage}_ms'
+            timings[key] = round(timings.get(key, 0.0) + elapsed * 1000, 3)
+
+
+def record_token_usage(usage, registry=None):
+    """Count the prompt/completion tokens of an OpenAI response's `usage` field"""
+    if usage is None:
+        return
+    registry = registry or METRICS
+    for kind in ('prompt', 'completion'):
+        tokens = getattr(usage, f'{kind}_tokens', None)
+        if tokens:
+            registry.inc(TOKENS_METRIC, tokens, kind=kind)
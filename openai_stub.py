@@ -0,0 +1,177 @@
+"""
+Local stand-in for the OpenAI chat completions API
+Answers POST /v1/chat/completions with a canned reply after a configurable
+delay (streamed word by word when the request sets stream=true), and can
+inject 429 rate limits and 5xx errors, so ChristopherGPT can be load-tested
+without network access or API cost.
+
+Usage:
+    python openai_stub.py --port 8001 --latency 800 --rate-limit 0.05
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=stub python app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+    def __init__(self, latency_ms=500, jitter_ms=100, rate_limit=0.0, error_rate=0.0, reply=None,
+                 token_ms=20):
+        """
+        Args:
+            latency_ms (float): Mean response delay (time to first token) in milliseconds
+            jitter_ms (float): Uniform +/- jitter added to the delay
+            rate_limit (float): Fraction of requests answered with 429
+            error_rate (float): Fraction of requests answered with 500
+            reply (str): Text returned as the assistant message
+            token_ms (float): Delay between streamed tokens in milliseconds
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.reply = reply or "Hi! I'm Christopher. I love building AI projects and learning new things."
+        self.token_ms = token_ms
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body, headers=None):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_stream(self, request):
+            """Server-sent events in the chat.completion.chunk format, one word per chunk"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+
+            completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+            words = config.reply.split(' ')
+            for i, word in enumerate(words):
+                chunk = {
+                    'id': completion_id,
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'gpt-3.5-turbo'),
+                    'choices': [{
+                        'index': 0,
+                        'delta': {'content': word if i == 0 else ' ' + word},
+                        'finish_reason': None
+                    }]
+                }
+                self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(config.token_ms / 1000)
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.wfile.flush()
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+                return
+
+            with config.lock:
+                config.requests += 1
+
+            delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+            time.sleep(max(0.0, delay) / 1000)
+
+            roll = random.random()
+            if roll < config.rate_limit:
+                self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                                {'Retry-After': '0.1'})
+                return
+            if roll < config.rate_limit + config.error_rate:
+                self._send_json(500, {'error': {'message': 'Stub server error', 'type': 'server_error'}})
+                return
+
+            if request.get('stream'):
+                self._send_stream(request)
+                return
+
+            prompt_tokens = sum(len(m.get('content', '').split()) for m in request.get('messages', []))
+            completion_tokens = len(config.reply.split())
+            self._send_json(200, {
+                'id': f'chatcmpl-{uuid.uuid4().hex}',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'gpt-3.5-turbo'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': config.reply},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': prompt_tokens + completion_tokens
+                }
+            })
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 resets bursts of concurrent clients
+
+
+def start_stub_server(port=0, **config_kwargs):
+    """
+    Start the stub in a background thread
+
+    Args:
+        port (int): Port to listen on, 0 picks a free one
+        **config_kwargs: StubConfig options
+
+    Returns:
+        tuple: (server, config, base_url) - call server.shutdown() to stop it
+    """
+    config = StubConfig(**config_kwargs)
+    server = StubServer(('127.0.0.1', port), _make_handler(config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, config, f'http://127.0.0.1:{server.server_address[1]}/v1'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI chat completions stub")
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=500, help="mean latency in ms")
+    parser.add_argument('--jitter', type=float, default=100, help="latency jitter in ms")
+    parser.add_argument('--token-ms', type=float, default=20, help="delay between streamed tokens in ms")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of 500 responses")
+    args = parser.parse_args()
+
+    stub, _, url = start_stub_server(args.port, latency_ms=args.latency, jitter_ms=args.jitter,
+                                     rate_limit=args.rate_limit, error_rate=args.error_rate,
+                                     token_ms=args.token_ms)
+    print(f"🧪 OpenAI stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.shutdown()
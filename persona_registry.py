@@ -0,0 +1,142 @@
+"""
+Multi-persona serving for ChristopherGPT
+Hosts many personas in one process. Every persona gets its own ChristopherGPT
+(fact snapshot, caches, prompt builder, sessions), but they all share the
+default persona's embedding model, OpenAI clients and OpenAI circuit breaker,
+so adding a persona costs only its facts. Personas are loaded on their first request, from their
+memory-mapped embedding store, and the least recently used ones are unloaded
+when the loaded facts exceed a memory budget.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from christophergpt import ChristopherGPT
+from personas import find_persona, list_personas
+
+
+class PersonaRegistry:
+    def __init__(self, default, personas_dir='personas', memory_budget_mb=1024):
+        """
+        Args:
+            default (ChristopherGPT): The default persona's bot; always loaded and
+                the source of the shared model, OpenAI clients and circuit breaker
+            personas_dir (str): Directory holding one subdirectory per persona
+            memory_budget_mb (float): Approximate memory for loaded personas' facts;
+                least recently used personas are unloaded beyond it
+        """
+        self.default = default
+        self.personas_dir = personas_dir
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._loaded = OrderedDict()  # name -> ChristopherGPT, least recently used first
+        self._load_locks = {}  # name -> lock held while that persona loads
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = {}
+
+    def _create(self, persona):
+        return ChristopherGPT(
+            persona=persona,
+            encoder=self.default.embedder.model,
+            openai_clients=(self.default.openai_client, self.default.async_llm),
+            circuit_breaker=self.default.circuit_breaker
+        )
+
+    def get(self, name=None):
+        """
+        The bot serving a persona, loading it on first use
+
+        Args:
+            name (str): Persona name, None for the default persona
+
+        Returns:
+            ChristopherGPT: The persona's bot, or None if there is no such persona
+        """
+        if name is None or name == self.default.persona.name:
+            return self.default
+        with self._lock:
+            bot = self._loaded.get(name)
+            if bot is not None:
+                self._loaded.move_to_end(name)
+                return bot
+
+        # Only names of existing personas get a lock, so unknown names can't grow the dict
+        persona = find_persona(self.personas_dir, name)
+        if persona is None:
+            return None
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One load per persona at a time; other personas keep being served meanwhile
+        with load_lock:
+            with self._lock:
+                bot = self._loaded.get(name)
+                if bot is not None:
+                    self._loaded.move_to_end(name)
+                    return bot
+            started = time.perf_counter()
+            bot = self._create(persona)
+            with self._lock:
+                self._loaded[name] = bot
+                self.loads += 1
+                self.load_seconds[name] = round(time.perf_counter() - started, 2)
+                evicted = self._evict_over_budget(keep=name)
+        print(f"🧩 Persona '{name}' loaded in {self.load_seconds[name]}s "
+              f"({bot.embedder.memory_usage() / 1e6:.1f} MB)")
+        for evicted_name, evicted_bot in evicted:
+            evicted_bot.close()
+            print(f"♻️  Persona '{evicted_name}' unloaded to stay within the memory budget")
+        return bot
+
+    def _memory_usage(self):
+        return self.default.embedder.memory_usage() + sum(
+            bot.embedder.memory_usage() for bot in self._loaded.values()
+        )
+
+    def _evict_over_budget(self, keep):
+        """
+        Drop least recently used personas until the loaded facts fit the budget;
+        requests already holding one finish normally. Called with the lock held.
+
+        Returns:
+            list: (name, bot) pairs that were unloaded
+        """
+        evicted = []
+        while self._memory_usage() > self.memory_budget:
+            name = next((name for name in self._loaded if name != keep), None)
+            if name is None:
+                print(f"⚠️  Persona '{keep}' alone exceeds the persona memory budget")
+                break
+            evicted.append((name, self._loaded.pop(name)))
+            self.evictions += 1
+        return evicted
+
+    def unload(self, name):
+        """Unload a persona (it is reloaded on its next request); returns whether it was loaded"""
+        with self._lock:
+            bot = self._loaded.pop(name, None)
+        if bot is None:
+            return False
+        bot.close()
+        return True
+
+    def loaded(self):
+        """(name, bot) for the default persona and every loaded persona"""
+        with self._lock:
+            return [(self.default.persona.name, self.default)] + list(self._loaded.items())
+
+    def stats(self):
+        with self._lock:
+            loaded = [self.default.persona.name] + list(self._loaded)
+            memory = self._memory_usage()
+        return {
+            'available': list_personas(self.personas_dir),
+            'loaded': loaded,
+            'memory_bytes': memory,
+            'memory_budget_bytes': self.memory_budget,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'load_seconds': dict(self.load_seconds)
+        }
@@ -3,52 +3,66 @@ Personal data and facts about Christopher for the ChristopherGPT system
 This module contains all the personal information used for embeddings
 """
 
-def get_all_facts():
-    """
-    Return all known facts about Christopher for embedding creation
-    
-    Returns:
-        list: List of facts/statements about Christopher
-    """
-    facts = [
-        # Basic Information
+FACT_SECTIONS = {
+    "Basic Information": [
         "Christopher is a student studying computer science and business",
         "Christopher is interested in AI and machine learning",
         "Christopher is working on personal AI projects",
-        "Christopher enjoys coding and programming",
-        
-        # Interests and Hobbies
+        "Christopher enjoys coding and programming"
+    ],
+    "Interests and Hobbies": [
         "Christopher likes technology and innovation",
         "Christopher is interested in entrepreneurship",
         "Christopher enjoys learning new programming languages",
-        "Christopher likes working on creative projects",
-        
-        # Skills and Experience
+        "Christopher likes working on creative projects"
+    ],
+    "Skills and Experience": [
         "Christopher has experience with Python programming",
         "Christopher knows about machine learning and AI",
         "Christopher has worked with embeddings and natural language processing",
-        "Christopher is familiar with web development",
-        
-        # Goals and Aspirations
+        "Christopher is familiar with web development"
+    ],
+    "Goals and Aspirations": [
         "Christopher wants to build innovative AI applications",
         "Christopher is interested in starting his own tech company",
         "Christopher enjoys solving complex problems with code",
-        "Christopher believes in using technology to help people",
-        
-        # Academic and Professional
+        "Christopher believes in using technology to help people"
+    ],
+    "Academic and Professional": [
         "Christopher is studying both technical and business subjects",
         "Christopher likes combining technology with business strategy",
         "Christopher is always looking to learn new skills",
-        "Christopher enjoys collaborating on interesting projects",
-        
-        # Personal Traits
+        "Christopher enjoys collaborating on interesting projects"
+    ],
+    "Personal Traits": [
         "Christopher is curious and always asking questions",
         "Christopher is passionate about building things that matter",
         "Christopher likes helping others learn about technology",
         "Christopher enjoys discussing ideas and innovations"
     ]
+}
+
+def get_fact_records():
+    """
+    Return all known facts about Christopher with their metadata
+    
+    Returns:
+        list: Dicts with 'fact', 'category' (section name), 'source' and 'timestamp'
+    """
+    return [
+        {"fact": fact, "category": category, "source": "personal_data", "timestamp": None}
+        for category, facts in FACT_SECTIONS.items()
+        for fact in facts
+    ]
+
+def get_all_facts():
+    """
+    Return all known facts about Christopher for embedding creation
     
-    return facts
+    Returns:
+        list: List of facts/statements about Christopher
+    """
+    return [record["fact"] for record in get_fact_records()]
 
 def get_personality_traits():
     """
@@ -67,7 +81,7 @@ def get_personality_traits():
 
 if __name__ == "__main__":
     facts = get_all_facts()
-    print(f"Total facts about Christopher: {len(facts)}")
+    print(f"Total facts about Christopher: {len(facts)} in {len(FACT_SECTIONS)} categories")
     print("\nSample facts:")
     for i, fact in enumerate(facts[:5], 1):
         print(f"{i}. {fact}")
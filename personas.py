@@ -0,0 +1,143 @@
+"""
+Personas served by ChristopherGPT
+A persona is who the bot answers as: a name, personality traits, the facts
+it answers from and the embedding store those facts are encoded into. The
+original Christopher persona comes from personal_data.py; others live in
+one directory each:
+
+    personas/<name>/persona.json   {"display_name": "Ada", "personality": {...},
+                                    "facts": [...], "system_message": "..."}
+    personas/<name>/facts.jsonl    optional, more facts in ingest.py's JSONL format
+    personas/<name>/embeddings/    embedding store, created on first load
+    personas/<name>/answer_index/  optional precomputed answers, see answer_index.py
+
+A persona without facts serves its store as-is, e.g. one filled with
+`python ingest.py facts.jsonl --store personas/<name>/embeddings`.
+"""
+
+import importlib
+import json
+import os
+import re
+
+import personal_data
+from ingest import read_jsonl
+from prompt_builder import SYSTEM_MESSAGE
+
+DEFAULT_PERSONA = 'christopher'
+PERSONALITY_KEYS = ('tone', 'communication_style', 'interests', 'values', 'goals')
+
+# Lowercase URL-safe names; these would collide with other /api/ routes
+_NAME_RE = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+RESERVED_NAMES = frozenset({'admin', 'chat', 'metrics', 'personas', 'sessions', 'status'})
+
+
+def valid_persona_name(name):
+    return isinstance(name, str) and bool(_NAME_RE.match(name)) and name not in RESERVED_NAMES
+
+
+class Persona:
+    """The original persona, backed by personal_data.py"""
+
+    def __init__(self):
+        self.name = DEFAULT_PERSONA
+        self.display_name = 'Christopher'
+        self.system_message = SYSTEM_MESSAGE
+        self.store_path = 'christopher_embeddings'
+        self.legacy_embeddings_file = 'christopher_embeddings.pkl'
+        self.answer_index_path = 'answer_index'
+
+    def fact_records(self):
+        """
+        Facts to sync into the store
+
+        Returns:
+            list: Fact records ({'fact', 'category', ...}), or None to serve
+                the store as-is
+        """
+        return personal_data.get_fact_records()
+
+    def personality_traits(self):
+        return personal_data.get_personality_traits()
+
+    def reload(self):
+        """Re-read the persona's definition so edits take effect"""
+        importlib.reload(personal_data)
+
+
+class DirectoryPersona(Persona):
+    def __init__(self, path):
+        """
+        Persona defined by a personas/<name>/ directory
+
+        Args:
+            path (str): The persona's directory; its name is the persona's name
+
+        Raises:
+            ValueError: If persona.json is missing required fields
+        """
+        super().__init__()
+        self.path = path
+        self.name = os.path.basename(os.path.normpath(path))
+        self.store_path = os.path.join(path, 'embeddings')
+        self.legacy_embeddings_file = None
+        self.answer_index_path = os.path.join(path, 'answer_index')
+        self.reload()
+
+    def reload(self):
+        with open(os.path.join(self.path, 'persona.json'), encoding='utf-8') as f:
+            definition = json.load(f)
+        personality = definition.get('personality') or {}
+        missing = [key for key in PERSONALITY_KEYS if key not in personality]
+        if missing:
+            raise ValueError(f"Persona '{self.name}' is missing personality traits: {missing}")
+        self.display_name = definition.get('display_name', self.name.title())
+        self.system_message = definition.get(
+            'system_message',
+            f"You are {self.display_name}. Respond as {self.display_name} would, in first person, "
+            "based on the provided context."
+        )
+        self.personality = personality
+        self.facts = definition.get('facts')
+
+    def fact_records(self):
+        records = [fact if isinstance(fact, dict) else {'fact': fact} for fact in self.facts or []]
+        facts_file = os.path.join(self.path, 'facts.jsonl')
+        if os.path.exists(facts_file):
+            records.extend(
+                {'fact': fact, **(metadata or {})}
+                for fact, metadata in read_jsonl(facts_file) if fact
+            )
+        elif self.facts is None:
+            return None
+        return records
+
+    def personality_traits(self):
+        return self.personality
+
+
+def find_persona(personas_dir, name):
+    """
+    Load a persona from the personas directory
+
+    Returns:
+        DirectoryPersona: The persona, or None if there is no such persona
+    """
+    if not valid_persona_name(name) or name == DEFAULT_PERSONA:
+        return None
+    path = os.path.join(personas_dir, name)
+    if not os.path.isfile(os.path.join(path, 'persona.json')):
+        return None
+    return DirectoryPersona(path)
+
+
+def list_personas(personas_dir):
+    """Names of the personas defined in the personas directory, plus the default one"""
+    names = [DEFAULT_PERSONA]
+    if os.path.isdir(personas_dir):
+        names.extend(sorted(
+            name for name in os.listdir(personas_dir)
+            if valid_persona_name(name) and name != DEFAULT_PERSONA
+            and os.path.isfile(os.path.join(personas_dir, name, 'persona.json'))
+        ))
+    return names
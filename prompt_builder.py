@@ -0,0 +1,205 @@
+"""
+Prompt assembly for ChristopherGPT
+Builds the chat messages sent to OpenAI. The persona block depends only on
+the personality traits, so it is rendered and token-counted once. Per
+request only the question and a selection of facts are added: facts below
+a relevance threshold or near-duplicates of an already chosen fact are
+skipped, and facts stop being added once a token budget is used up.
+
+Token counts use tiktoken when it is installed and otherwise a regex
+approximation of GPT pre-tokenization, which is close for English text.
+"""
+
+import re
+
+from cache import LRUCache
+
+SYSTEM_MESSAGE = ("You are Christopher, a computer science and business student passionate about AI and "
+                  "technology. Respond as Christopher would, in first person, based on the provided context.")
+
+# Chat format overhead: tokens around each message plus the reply priming
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_APPROX_TOKEN_RE = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[A-Za-z]+| ?\d{1,3}| ?[^\s\w]+|\s+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class TokenCounter:
+    def __init__(self, model="gpt-3.5-turbo", cache_size=10000):
+        """
+        Count tokens locally, without an API call
+
+        Args:
+            model (str): Chat model whose tokenizer tiktoken should use
+            cache_size (int): Fact texts whose counts are remembered
+        """
+        self.encoding = None
+        try:
+            # Optional dependency: exact counts when installed, the regex estimate otherwise
+            import tiktoken
+            self.encoding = tiktoken.encoding_for_model(model)
+        except ImportError:
+            pass
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.method = "tiktoken" if self.encoding is not None else "approximate"
+        self._cache = LRUCache(cache_size)
+
+    def count(self, text):
+        """Number of tokens in a piece of text"""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return len(_APPROX_TOKEN_RE.findall(text))
+
+    def count_cached(self, text):
+        """count() for texts that recur across requests, such as facts"""
+        tokens = self._cache.get(text)
+        if tokens is None:
+            tokens = self.count(text)
+            self._cache.put(text, tokens)
+        return tokens
+
+
+def _word_set(text):
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class PromptBuilder:
+    def __init__(self, personality, fact_token_budget=300, min_similarity=0.2,
+                 dedupe_threshold=0.85, history_token_budget=400, model="gpt-3.5-turbo", counter=None,
+                 name="Christopher", system_message=SYSTEM_MESSAGE):
+        """
+        Args:
+            personality (dict): Traits from personal_data.get_personality_traits()
+            fact_token_budget (int): Maximum tokens spent on context facts
+            min_similarity (float): Facts scoring below this are left out (the
+                best fact is always kept so the model has some context)
+            dedupe_threshold (float): Word-overlap (Jaccard) at which a fact counts
+                as a near-duplicate of one already chosen
+            history_token_budget (int): Maximum tokens spent on earlier turns of a conversation
+            model (str): Chat model, selects the tokenizer
+            counter (TokenCounter): Shared counter, created if omitted
+            name (str): Name of the persona answering
+            system_message (str): System message sent with every prompt
+        """
+        self.fact_token_budget = fact_token_budget
+        self.min_similarity = min_similarity
+        self.dedupe_threshold = dedupe_threshold
+        self.history_token_budget = history_token_budget
+        self.counter = counter or TokenCounter(model)
+        self.name = name
+        self.system_message = system_message
+
+        # Static part of the prompt, rendered and counted once
+        self.persona_block = f"""
+You are {name}, responding as yourself. Your personality is {personality['tone']}.
+Your communication style is {personality['communication_style']}.
+Your main interests include: {', '.join(personality['interests'])}.
+You value: {', '.join(personality['values'])}.
+Your goals include: {', '.join(personality['goals'])}.
+
+Based on the context below, answer the question as {name} would, in first person.
+Keep responses natural, personal, and engaging. Don't mention that you're an AI or that this is from a database.
+
+Context about {name}:
+"""
+        self.static_tokens = (
+            2 * TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+            + self.counter.count(system_message)
+            + self.counter.count(self.persona_block)
+            + self.counter.count(f"\nQuestion: \n\nResponse as {name}:")
+        )
+
+    def select_facts(self, relevant_facts):
+        """
+        Choose the facts that go into the prompt, most relevant first
+
+        Returns:
+            tuple: (chosen facts, tokens they use, {reason: number of facts skipped})
+        """
+        chosen, chosen_words = [], []
+        used = 0
+        skipped = {'low_similarity': 0, 'duplicate': 0, 'budget': 0}
+        for fact in sorted(relevant_facts, key=lambda fact: fact['similarity'], reverse=True):
+            if chosen and fact['similarity'] < self.min_similarity:
+                skipped['low_similarity'] += 1
+                continue
+            words = _word_set(fact['fact'])
+            if any(_jaccard(words, other) >= self.dedupe_threshold for other in chosen_words):
+                skipped['duplicate'] += 1
+                continue
+            tokens = self.counter.count_cached(f"- {fact['fact']}\n")
+            if chosen and used + tokens > self.fact_token_budget:
+                skipped['budget'] += 1
+                continue
+            chosen.append(fact)
+            chosen_words.append(words)
+            used += tokens
+        return chosen, used, skipped
+
+    def history_messages(self, history):
+        """
+        Earlier turns of a conversation as chat messages, newest kept first
+
+        Returns:
+            tuple: (messages in chronological order, tokens they use, turns included)
+        """
+        if not history:
+            return [], 0, 0
+        messages, used = [], 0
+        for turn in reversed(history['turns']):
+            tokens = turn['tokens'] + 2 * TOKENS_PER_MESSAGE
+            if used + tokens > self.history_token_budget:
+                break
+            messages[:0] = [
+                {"role": "user", "content": turn['question']},
+                {"role": "assistant", "content": turn['answer']}
+            ]
+            used += tokens
+        turns = len(messages) // 2
+        if history['summary']:
+            tokens = self.counter.count(history['summary']) + TOKENS_PER_MESSAGE
+            if used + tokens <= self.history_token_budget:
+                messages.insert(0, {"role": "system", "content": history['summary']})
+                used += tokens
+        return messages, used, turns
+
+    def build(self, question, relevant_facts, history=None):
+        """
+        Build the chat messages for a question and its retrieved facts
+
+        Args:
+            question (str): The user's question
+            relevant_facts (list): Retrieved facts with 'fact' and 'similarity'
+            history (dict): Earlier conversation from Session.history(), if any
+
+        Returns:
+            tuple: (messages, info) where info reports the prompt token count,
+                the facts used and why others were left out
+        """
+        chosen, fact_tokens, skipped = self.select_facts(relevant_facts)
+        earlier, history_tokens, turns = self.history_messages(history)
+        context = "".join(f"- {fact['fact']}\n" for fact in chosen)
+        messages = [
+            {"role": "system", "content": self.system_message},
+            *earlier,
+            {"role": "user", "content": f"{self.persona_block}{context}\nQuestion: {question}\n\nResponse as {self.name}:"}
+        ]
+        info = {
+            'prompt_tokens': self.static_tokens + fact_tokens + history_tokens + self.counter.count(question),
+            'fact_tokens': fact_tokens,
+            'facts_used': len(chosen),
+            'facts_skipped': skipped,
+            'token_count': self.counter.method
+        }
+        if history:
+            info['history_tokens'] = history_tokens
+            info['history_turns'] = turns
+        return messages, info
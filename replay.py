@@ -0,0 +1,225 @@
+"""
+Replay a recorded request log against ChristopherGPT
+Reads a request log written by app.py (logs/requests.jsonl, see
+request_log.py) and sends each question to /api/chat, either with the
+recorded spacing (optionally sped up) or at a fixed rate. Requests are
+scheduled open-loop: a slow server does not slow the arrivals down, so
+queueing shows up as latency, the way it does in production. With --serve,
+app.py is started on a free port against the local OpenAI stub, so a
+production load shape can be reproduced without network access.
+
+Usage:
+    python replay.py logs/requests.jsonl --url http://localhost:5000 --speed 2
+    python replay.py logs/requests.jsonl --rate 50 --concurrency 32 --limit 2000
+    python replay.py logs/requests.jsonl --serve --stub-latency 800 --rate 20 --output replay.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark_suite import REPO_DIR, free_port, summarize, wait_until_ready
+
+
+def read_log(path, limit=None):
+    """
+    Requests recorded in a log, oldest first
+
+    Returns:
+        list: {'message', 'ts', 'persona', 'filters', 'session_id'} dicts (missing keys omitted)
+    """
+    requests = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not record.get('message'):
+                continue
+            requests.append({key: record[key] for key in ('message', 'ts', 'persona', 'filters', 'session_id')
+                             if record.get(key) is not None})
+            if limit and len(requests) >= limit:
+                break
+    return requests
+
+
+def schedule(requests, rate=None, speed=1.0):
+    """
+    Send offsets in seconds from the start of the replay
+
+    Args:
+        requests (list): Recorded requests, oldest first
+        rate (float): Fixed requests per second; None keeps the recorded spacing
+        speed (float): Speed-up applied to the recorded spacing
+
+    Returns:
+        list: One offset per request
+    """
+    if rate:
+        return [i / rate for i in range(len(requests))]
+    timestamps = [request.get('ts') for request in requests]
+    if None in timestamps:
+        raise ValueError("The log has records without 'ts'; pass --rate to replay it")
+    start = timestamps[0]
+    return [(ts - start) / speed for ts in timestamps]
+
+
+def send(url, request, timeout=60, keep_persona=True, keep_sessions=False):
+    """
+    POST one recorded request to the chat endpoint
+
+    Returns:
+        tuple: (HTTP status or 0 on a connection error, response JSON or None)
+    """
+    persona = request.get('persona') if keep_persona else None
+    endpoint = f"{url}/api/{persona}/chat" if persona else f"{url}/api/chat"
+    body = {'message': request['message']}
+    if request.get('filters'):
+        body['filters'] = request['filters']
+    if keep_sessions and request.get('session_id'):
+        body['session_id'] = request['session_id']
+    http_request = urllib.request.Request(
+        endpoint,
+        data=json.dumps(body).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except OSError:
+        return 0, None
+
+
+def replay(url, requests, offsets, concurrency=16, timeout=60, keep_persona=True, keep_sessions=False):
+    """
+    Send the requests at their offsets with at most `concurrency` in flight
+
+    Latency is measured from when a request was scheduled to be sent, so time
+    spent waiting for a free worker counts, as it would for a real client.
+
+    Returns:
+        dict: Throughput, latency percentiles, lateness (the part of the
+            latency spent waiting for a free worker), status codes, answer
+            methods and cache hits
+    """
+    latencies = []
+    lateness = []
+    statuses = Counter()
+    methods = Counter()
+    caches = Counter()
+    lock = threading.Lock()
+
+    def one_request(request, send_at):
+        started = time.perf_counter()
+        status, payload = send(url, request, timeout, keep_persona, keep_sessions)
+        elapsed_ms = (time.perf_counter() - send_at) * 1000
+        with lock:
+            lateness.append(max(0.0, (started - send_at) * 1000))
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(elapsed_ms)
+                methods[payload.get('method')] += 1
+                caches[(payload.get('cache') or {}).get('type', 'miss')] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for request, offset in zip(requests, offsets):
+            send_at = start + offset
+            delay = send_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one_request, request, send_at)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(requests),
+        'seconds': round(elapsed, 2),
+        'offered_rate': round((len(offsets) - 1) / offsets[-1], 2) if offsets[-1] > 0 else None,
+        'achieved_rate': round(len(requests) / elapsed, 2),
+        'latency': summarize(latencies) if latencies else None,
+        'lateness': summarize(lateness) if lateness else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'methods': dict(methods),
+        'cache': dict(caches)
+    }
+
+
+def start_server(stub_latency):
+    """
+    app.py on a free port with OpenAI replaced by the local stub, run from an
+    empty directory so the real store and request log are left alone
+
+    Returns:
+        tuple: (url, stop callable)
+    """
+    from openai_stub import start_stub_server
+
+    stub, _, base_url = start_stub_server(latency_ms=stub_latency, jitter_ms=stub_latency * 0.1)
+    workdir = tempfile.mkdtemp(prefix='christophergpt_replay_')
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG='false', OPENAI_API_KEY='stub',
+               OPENAI_BASE_URL=base_url, REQUEST_LOG='')
+    server = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, 'app.py')], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def stop():
+        server.terminate()
+        server.wait()
+        stub.shutdown()
+
+    try:
+        wait_until_ready(server, port)
+    except Exception:
+        stop()
+        raise
+    return f'http://127.0.0.1:{port}', stop
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help="request log written by app.py")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="server to replay against")
+    parser.add_argument('--serve', action='store_true', help="start app.py against the OpenAI stub instead")
+    parser.add_argument('--stub-latency', type=float, default=500, help="stub OpenAI latency in ms (with --serve)")
+    parser.add_argument('--rate', type=float, default=None, help="fixed requests/sec instead of the recorded spacing")
+    parser.add_argument('--speed', type=float, default=1.0, help="speed-up of the recorded spacing")
+    parser.add_argument('--concurrency', type=int, default=16, help="maximum requests in flight")
+    parser.add_argument('--limit', type=int, default=None, help="replay only the first N requests")
+    parser.add_argument('--timeout', type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument('--no-persona', action='store_true', help="send everything to the default persona")
+    parser.add_argument('--sessions', action='store_true', help="keep recorded session ids")
+    parser.add_argument('--output', help="write results JSON here")
+    args = parser.parse_args()
+
+    requests = read_log(args.log, args.limit)
+    if not requests:
+        raise SystemExit(f"No requests with a message in {args.log}")
+    offsets = schedule(requests, args.rate, args.speed)
+
+    url, stop = start_server(args.stub_latency) if args.serve else (args.url, None)
+    try:
+        print(f"🔁 Replaying {len(requests)} requests against {url} over ~{offsets[-1]:.1f}s "
+              f"(concurrency {args.concurrency})...")
+        results = replay(url, requests, offsets, args.concurrency, args.timeout,
+                         keep_persona=not args.no_persona, keep_sessions=args.sessions)
+    finally:
+        if stop:
+            stop()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
@@ -0,0 +1,177 @@
+"""
+Structured request log for ChristopherGPT
+One JSON line per answered question: the question, the facts retrieved
+(row ids and scores), the answer method, cache hits and stage timings. The
+request path only puts a record on a bounded queue and never waits on disk.
+A background thread appends queued records in batches and rotates the file
+by size. Nothing is fsynced, so a crash can lose the last unflushed batch.
+
+The log doubles as load-test input for replay.py and as a question log for
+answer_index.py, since each line carries the request's "message".
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class RequestLogWriter:
+    def __init__(self, path='logs/requests.jsonl', max_bytes=50 * 1024 * 1024, backups=5,
+                 batch_size=256, flush_interval=0.5, max_queue=10000):
+        """
+        Args:
+            path (str): Log file; rotated files get .1, .2, ... suffixes
+            max_bytes (int): Size at which the file is rotated
+            backups (int): Rotated files kept
+            batch_size (int): Records written per append at most
+            flush_interval (float): Seconds a record may wait for a batch to fill
+            max_queue (int): Records buffered before new ones are dropped
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(max_queue)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+        self._file = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+        self._thread.start()
+
+    def log(self, record):
+        """Queue a record for writing; dropped (and counted) if the writer has fallen behind"""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            if first is _STOP:
+                stopping = True
+            else:
+                batch.append(first)
+            # Take whatever else is already queued, up to a batch
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            if batch:
+                self._write(batch)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, batch):
+        lines = "".join(json.dumps(record, separators=(',', ':'), default=str) + "\n" for record in batch)
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(lines)
+            self._file.flush()  # hand the batch to the OS; no fsync
+            self.written += len(batch)
+            self.batches += 1
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            self.errors += 1
+            print(f"⚠️  Request log write failed, {len(batch)} records lost: {e}")
+
+    def _rotate(self):
+        """requests.jsonl -> .1 -> .2 ...; the oldest beyond `backups` is deleted"""
+        self._file.close()
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def close(self, timeout=5.0):
+        """Write everything still queued and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                if time.monotonic() > deadline:
+                    return
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'written': self.written,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+            'batches': self.batches,
+            'rotations': self.rotations,
+            'errors': self.errors
+        }
+
+
+def request_record(endpoint, data, response, timings, persona=None):
+    """
+    Log record for one answered question
+
+    Args:
+        endpoint (str): Flask endpoint name, e.g. 'chat'
+        data (dict): The request body ('message', 'filters', 'session_id', ...)
+        response (dict): ChristopherGPT response, or the stream's done event
+            plus 'relevant_facts' and 'method'
+        timings (dict): Stage timings from metrics.trace(), in milliseconds
+        persona (str): Persona that answered
+
+    Returns:
+        dict: JSON-serializable record
+    """
+    record = {
+        'ts': round(time.time(), 3),
+        'endpoint': endpoint,
+        'message': data.get('message'),
+        'method': response.get('method'),
+        'cache': (response.get('cache') or {}).get('type'),
+        'fact_ids': [fact['index'] for fact in response.get('relevant_facts', [])],
+        'scores': [round(fact['similarity'], 4) for fact in response.get('relevant_facts', [])],
+        'answer_chars': len(response.get('answer') or ''),
+        'timings': timings
+    }
+    if persona:
+        record['persona'] = persona
+    for key in ('filters', 'session_id'):
+        if data.get(key) is not None:
+            record[key] = data[key]
+    if response.get('prompt'):
+        record['prompt_tokens'] = response['prompt']['prompt_tokens']
+    if response.get('degraded'):
+        record['degraded'] = response['degraded']
+    return record
@@ -0,0 +1,233 @@
+"""
+Conversation sessions for ChristopherGPT
+Server-side state for multi-turn chats, keyed by a session id. Each session
+keeps a short rolling window of turns, a summary of older turns, and a
+running conversation embedding that is updated incrementally from each
+question's (already computed) embedding, so follow-ups like "tell me more
+about that" retrieve facts about the earlier topic without re-encoding the
+history.
+
+Memory is bounded per session (turns and tokens) and overall (least
+recently used sessions are evicted, idle ones expire).
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from vector_search import normalize_rows
+
+MAX_SESSION_ID_LENGTH = 128
+SUMMARY_PREFIX = "Earlier the user asked: "
+
+
+class Session:
+    def __init__(self, session_id):
+        self.id = session_id
+        self.turns = deque()  # {'question', 'answer', 'tokens'}, oldest first
+        self.turn_tokens = 0
+        self.summary = None
+        self.summary_generation = 0  # bumped on every fold, so stale background summaries are dropped
+        self.embedding = None  # unit-length running conversation embedding
+        self.total_turns = 0
+        self.created_at = time.time()
+        self.last_active = time.monotonic()
+        self.lock = threading.Lock()
+
+    def history(self):
+        """
+        Copy of what a prompt needs: the summary of older turns and the recent turns
+
+        Returns:
+            dict: {'summary': str or None, 'turns': [turn dicts, oldest first]}
+        """
+        with self.lock:
+            return {'summary': self.summary, 'turns': list(self.turns)}
+
+    def info(self):
+        with self.lock:
+            return {
+                'session_id': self.id,
+                'turns': self.total_turns,
+                'turns_kept': len(self.turns),
+                'tokens_kept': self.turn_tokens,
+                'summarized': self.summary is not None,
+                'created_at': self.created_at
+            }
+
+
+def summarize_extractive(summary, turns, max_chars=600):
+    """
+    Cheap default summary: the earlier questions, newest kept when it gets long
+
+    Args:
+        summary (str): Previous summary, or None
+        turns (list): Turns being folded into the summary, oldest first
+        max_chars (int): Upper bound on the summary length
+
+    Returns:
+        str: The new summary
+    """
+    questions = " ".join(turn['question'].strip().rstrip('?') + '?' for turn in turns)
+    if summary is None:
+        text = SUMMARY_PREFIX + questions
+    elif summary.startswith(SUMMARY_PREFIX):
+        text = f"{summary} {questions}"
+    else:
+        text = f"{summary} Later the user asked: {questions}"  # extends a summarizer's summary
+    if len(text) > max_chars:
+        text = SUMMARY_PREFIX + "..." + text[-(max_chars - len(SUMMARY_PREFIX) - 3):]
+    return text
+
+
+class SessionStore:
+    def __init__(self, max_sessions=10000, idle_ttl=1800, max_turns=6, max_tokens=600,
+                 decay=0.5, counter=None, summarizer=None):
+        """
+        Args:
+            max_sessions (int): Sessions kept; the least recently used is evicted beyond this
+            idle_ttl (float): Seconds without activity after which a session expires
+            max_turns (int): Turns kept verbatim per session; older ones are summarized
+            max_tokens (int): Token cap on the verbatim turns of a session
+            decay (float): Weight of the previous conversation embedding at each
+                update (0 keeps only the latest question)
+            counter (TokenCounter): Counts turn tokens, a word count if omitted
+            summarizer (callable): Optional (summary, turns) -> str that produces a
+                better summary in the background, e.g. with an LLM
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.decay = decay
+        self.counter = counter
+        self.summarizer = summarizer
+        self._sessions = OrderedDict()  # id -> Session, least recently used first
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _count_tokens(self, text):
+        return self.counter.count(text) if self.counter is not None else len(text.split())
+
+    def _expire_idle(self, now):
+        """Drop expired sessions; they sit at the front since the order is by last use"""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_active < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expirations += 1
+
+    def create(self, session_id=None):
+        """
+        Start a session (or return the existing one with this id)
+
+        Returns:
+            Session: The session
+        """
+        if session_id is None:
+            session_id = uuid.uuid4().hex
+        elif not isinstance(session_id, str) or not 0 < len(session_id) <= MAX_SESSION_ID_LENGTH:
+            raise ValueError(f"session_id must be a string of 1-{MAX_SESSION_ID_LENGTH} characters")
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            self._sessions.move_to_end(session_id)
+            session.last_active = now
+            return session
+
+    def get(self, session_id):
+        """Return a live session and mark it used, or None if unknown or expired"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_active = now
+            return session
+
+    def delete(self, session_id):
+        """Forget a session; returns whether it existed"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def record_turn(self, session, question, answer, question_embedding):
+        """
+        Append a finished turn and fold in its question embedding
+
+        Args:
+            session (Session): Session the turn belongs to
+            question (str): The user's question
+            answer (str): The answer that was given
+            question_embedding (np.ndarray): Unit-length embedding of the question
+        """
+        turn = {
+            'question': question,
+            'answer': answer,
+            'tokens': self._count_tokens(question) + self._count_tokens(answer)
+        }
+        with session.lock:
+            if session.embedding is None:
+                session.embedding = np.array(question_embedding, dtype=np.float32)
+            else:
+                blended = self.decay * session.embedding + question_embedding
+                session.embedding = normalize_rows(blended[np.newaxis, :])[0]
+            session.turns.append(turn)
+            session.turn_tokens += turn['tokens']
+            session.total_turns += 1
+
+            folded = []
+            while len(session.turns) > 1 and (len(session.turns) > self.max_turns
+                                              or session.turn_tokens > self.max_tokens):
+                old = session.turns.popleft()
+                session.turn_tokens -= old['tokens']
+                folded.append(old)
+            if not folded:
+                return
+            previous_summary = session.summary
+            session.summary = summarize_extractive(previous_summary, folded)
+            session.summary_generation += 1
+            generation = session.summary_generation
+
+        if self.summarizer is not None:
+            threading.Thread(
+                target=self._summarize,
+                args=(session, previous_summary, folded, generation),
+                name="session-summary",
+                daemon=True
+            ).start()
+
+    def _summarize(self, session, previous_summary, folded, generation):
+        """Replace the extractive summary with the summarizer's, unless another fold happened meanwhile"""
+        try:
+            summary = self.summarizer(previous_summary, folded)
+        except Exception as e:
+            print(f"⚠️  Session summary failed, keeping the extractive one: {e}")
+            return
+        with session.lock:
+            if session.summary_generation == generation and summary:
+                session.summary = summary
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_ttl': self.idle_ttl,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
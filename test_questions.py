@@ -34,12 +34,12 @@ def test_specific_questions():
     print("TESTING SPECIFIC QUESTIONS ABOUT CHRISTOPHER")
     print("="*60)
     
-    for question in test_questions:
+    all_relevant_facts = embedder.find_relevant_facts_batch(test_questions, top_k=2)
+    
+    for question, relevant_facts in zip(test_questions, all_relevant_facts):
         print(f"\nQuestion: {question}")
         print("-" * 50)
         
-        relevant_facts = embedder.find_relevant_facts(question, top_k=2)
-        
         for i, result in enumerate(relevant_facts, 1):
             print(f"{i}. {result['fact']}")
             print(f"   Similarity: {result['similarity']:.3f}")
@@ -0,0 +1,142 @@
+"""
+Test crash recovery of in-place embedding store appends
+A child process commits one chunk, then is killed partway through the next
+append (after some column files and their .npy headers were rewritten, but
+before header.json commits). The store must read back as the committed rows,
+and reopening an appender must roll the files back and resume from the
+saved ingest state without ingesting committed facts again.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from embedding_store import (EMBEDDINGS_FILE, HASHES_FILE, OFFSETS_FILE, EmbeddingStore, StoreAppender, fact_hash,
+                             fact_hashes)
+from ingest import chunk_records
+
+MODEL_NAME = 'test-model'
+FINGERPRINT = 'test-fingerprint'
+DIMENSION = 8
+SOURCE = '/data/facts.jsonl'
+
+
+def nul_digest_fact():
+    """A fact whose SHA-1 ends in a NUL byte, which numpy strips from 'S20' values"""
+    return next(f"fact {i}" for i in range(100000) if fact_hash(f"fact {i}").endswith(b'\0'))
+
+
+FACTS = [f"Christopher fact number {i} ✨" for i in range(10)]
+FACTS[1] = nul_digest_fact()
+METADATA = [{'category': ['music', 'travel'][i % 2], 'source': 'test', 'timestamp': 1700000000 + i}
+            for i in range(len(FACTS))]
+COMMITTED = 4  # rows in the first chunk, committed before the crash
+
+# Kills the process right before the given step of the second append
+CHILD = """
+import os, sys
+import numpy as np
+import embedding_store
+from test_store_append_resume import DIMENSION, FACTS, FINGERPRINT, METADATA, MODEL_NAME, COMMITTED, SOURCE, embeddings_for
+
+path, crash_at = sys.argv[1], sys.argv[2]
+appender = embedding_store.StoreAppender(embedding_store.EmbeddingStore(path), MODEL_NAME, FINGERPRINT, DIMENSION)
+appender.append(embeddings_for(FACTS[:COMMITTED]), FACTS[:COMMITTED], metadata=METADATA[:COMMITTED],
+                state={'source': SOURCE, 'records_consumed': COMMITTED})
+
+if crash_at == 'header':
+    embedding_store._write_header = lambda store, header: os._exit(1)
+else:
+    append_column = embedding_store.StoreAppender._append_column
+    def crashing_append_column(self, name, rows, new_count):
+        if name == crash_at:
+            os._exit(1)
+        append_column(self, name, rows, new_count)
+    embedding_store.StoreAppender._append_column = crashing_append_column
+
+appender.append(embeddings_for(FACTS[COMMITTED:]), FACTS[COMMITTED:], metadata=METADATA[COMMITTED:],
+                state={'source': SOURCE, 'records_consumed': len(FACTS)})
+sys.exit("append finished without crashing")
+"""
+
+
+def embeddings_for(facts):
+    """Deterministic normalized rows, so every run writes the same data"""
+    rng = np.random.default_rng(len(facts[0]) + len(facts))
+    rows = rng.standard_normal((len(facts), DIMENSION)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def check_store(path, count):
+    """Assert the store reads back exactly the first `count` facts"""
+    store = EmbeddingStore(path)
+    embeddings, facts, header = store.load()
+    assert header['count'] == count, f"header count {header['count']}, expected {count}"
+    assert embeddings.shape == (count, DIMENSION), f"embeddings shape {embeddings.shape}"
+    assert list(facts) == FACTS[:count], "fact texts differ from what was committed"
+
+    expected = [embeddings_for(FACTS[:COMMITTED])]
+    if count > COMMITTED:
+        expected.append(embeddings_for(FACTS[COMMITTED:count]))
+    assert np.allclose(embeddings, np.concatenate(expected)), "embeddings differ from what was committed"
+    assert np.array_equal(store.load_hashes(), fact_hashes(FACTS[:count])), "hashes differ from the facts"
+    assert store.load_metadata(header).to_records() == [
+        {'category': record['category'], 'source': record['source'], 'timestamp': float(record['timestamp'])}
+        for record in METADATA[:count]], "metadata differs from what was committed"
+
+
+def crash_and_resume(crash_at):
+    workdir = tempfile.mkdtemp(prefix='christophergpt_append_')
+    path = os.path.join(workdir, 'store')
+    try:
+        child = subprocess.run([sys.executable, '-c', CHILD, path, crash_at],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        assert child.returncode == 1, f"child did not crash as planned: {child.returncode} {child.stderr}"
+
+        # Readers ignore rows past the committed count
+        check_store(path, COMMITTED)
+
+        # Reopening rolls the files back to the committed rows and returns the saved state
+        appender = StoreAppender(EmbeddingStore(path), MODEL_NAME, FINGERPRINT, DIMENSION)
+        assert appender.count == COMMITTED, f"reopened with {appender.count} rows, expected {COMMITTED}"
+        assert appender.state == {'source': SOURCE, 'records_consumed': COMMITTED}, f"state {appender.state}"
+        for name in (EMBEDDINGS_FILE, OFFSETS_FILE, HASHES_FILE):
+            rows = np.load(os.path.join(path, name), mmap_mode='r').shape[0]
+            extra = 1 if name == OFFSETS_FILE else 0
+            assert rows == COMMITTED + extra, f"{name} still has {rows} rows after rollback"
+        assert appender.existing_hashes() == {fact_hash(fact) for fact in FACTS[:COMMITTED]}
+        check_store(path, COMMITTED)
+
+        # A rerun over the whole input must not ingest the committed facts again
+        chunks = list(chunk_records([(fact, None) for fact in FACTS], len(FACTS), appender.existing_hashes()))
+        assert [fact for facts, _, _, _ in chunks for fact in facts] == FACTS[COMMITTED:], \
+            "committed facts would be ingested again"
+
+        # Resume from the saved position, as ingest.py does
+        skip = appender.state['records_consumed']
+        appender.append(embeddings_for(FACTS[skip:]), FACTS[skip:], metadata=METADATA[skip:],
+                        state={'source': SOURCE, 'records_consumed': len(FACTS)})
+        check_store(path, len(FACTS))
+
+        reopened = StoreAppender(EmbeddingStore(path), MODEL_NAME, FINGERPRINT, DIMENSION)
+        assert reopened.count == len(FACTS)
+        assert reopened.state == {'source': SOURCE, 'records_consumed': len(FACTS)}
+        check_store(path, len(FACTS))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_append_crash_recovery():
+    print("🧪 TESTING STORE APPEND CRASH RECOVERY")
+    print("=" * 60)
+    for crash_at in (OFFSETS_FILE, HASHES_FILE, 'header'):
+        crash_and_resume(crash_at)
+        print(f"✅ Killed before writing {crash_at}: rolled back to {COMMITTED} rows and resumed to {len(FACTS)}")
+
+
+if __name__ == "__main__":
+    test_append_crash_recovery()
@@ -23,10 +23,11 @@ def test_updated_facts():
     print("🧪 TESTING UPDATED EMBEDDINGS")
     print("=" * 60)
     
-    for question in test_questions:
+    all_facts = embedder.find_relevant_facts_batch(test_questions, top_k=3)
+    
+    for question, facts in zip(test_questions, all_facts):
         print(f'\n❓ Question: {question}')
         print('-' * 50)
-        facts = embedder.find_relevant_facts(question, top_k=3)
         for i, fact in enumerate(facts, 1):
             print(f'{i}. {fact["fact"]} (similarity: {fact["similarity"]:.3f})')
 
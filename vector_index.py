@@ -0,0 +1,494 @@
+"""
+Vector index backends for ChristopherGPT
+Every backend answers top-k inner-product queries over the normalized fact
+matrix through the same interface, so ChristopherEmbeddings can switch between
+exact and approximate search without changing its callers.
+
+Backends:
+    exact   brute-force dot product over every fact (always correct)
+    ivf     inverted file index: k-means coarse quantizer, only the
+            nprobe closest clusters are scanned per query
+    float16 half-precision copy of the matrix is scanned, the best
+            candidates are re-scored against the float32 rows
+    int8    same with int8 scalar quantization (one scale per dimension),
+            a quarter of the float32 size
+"""
+
+import json
+import os
+
+import numpy as np
+
+from vector_search import normalize_rows, search, search_batch, top_k_indices
+
+
+class BruteForceIndex:
+    kind = 'exact'
+
+    def __init__(self, matrix):
+        """
+        Args:
+            matrix (np.ndarray): Normalized float32 fact matrix
+        """
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, matrix, **params):
+        return cls(matrix)
+
+    @classmethod
+    def load(cls, path, matrix, **params):
+        return cls(matrix)
+
+    def save(self, path):
+        """Nothing to persist: the fact matrix is the index"""
+
+    def search(self, query, top_k):
+        """
+        Args:
+            query (np.ndarray): Normalized float32 query vector
+            top_k (int): Number of results to return
+
+        Returns:
+            tuple: (indices, scores) of the top_k facts, best first
+        """
+        return search(self.matrix, query, top_k)
+
+    def search_batch(self, queries, top_k):
+        return search_batch(self.matrix, queries, top_k)
+
+
+class IVFIndex:
+    kind = 'ivf'
+
+    def __init__(self, centroids, offsets, rows, vectors, nprobe=8):
+        """
+        Args:
+            centroids (np.ndarray): Normalized cluster centroids (n_lists x dim)
+            offsets (np.ndarray): Start of each cluster's slice in rows/vectors (n_lists + 1)
+            rows (np.ndarray): Fact row ids grouped by cluster
+            vectors (np.ndarray): Fact vectors in the same order as rows, so each
+                cluster is a contiguous block
+            nprobe (int): Number of closest clusters scanned per query
+        """
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.vectors = vectors
+        self.nprobe = nprobe
+
+    @property
+    def n_lists(self):
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, matrix, n_lists=None, nprobe=8, n_iter=10, sample_size=100_000, seed=0):
+        """
+        Train the coarse quantizer with spherical k-means and bucket every fact
+
+        Args:
+            matrix (np.ndarray): Normalized float32 fact matrix
+            n_lists (int): Number of clusters, defaults to about 4 * sqrt(n)
+            nprobe (int): Default number of clusters scanned per query
+            n_iter (int): k-means iterations
+            sample_size (int): Number of facts used to train the centroids
+            seed (int): Random seed for sampling and initialization
+
+        Returns:
+            IVFIndex: The built index
+        """
+        n = matrix.shape[0]
+        if n_lists is None:
+            n_lists = int(4 * np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+
+        rng = np.random.default_rng(seed)
+        sample = matrix
+        if n > sample_size:
+            sample = matrix[np.sort(rng.choice(n, sample_size, replace=False))]
+        sample = np.ascontiguousarray(sample, dtype=np.float32)
+
+        centroids = sample[rng.choice(sample.shape[0], n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = _assign(sample, centroids)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            # Per-cluster sums via one sort + reduceat (much faster than np.add.at)
+            sums = np.zeros_like(centroids)
+            nonempty = counts > 0
+            starts = np.cumsum(counts) - counts
+            grouped = sample[np.argsort(assignments, kind='stable')]
+            sums[nonempty] = np.add.reduceat(grouped, starts[nonempty], axis=0)
+
+            # Re-seed empty clusters with random sample points
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample.shape[0], len(empty), replace=False)]
+            centroids = normalize_rows(sums)
+
+        assignments = _assign(matrix, centroids)
+        rows = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=n_lists)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        vectors = np.ascontiguousarray(matrix[rows], dtype=np.float32)
+
+        return cls(centroids, offsets, rows.astype(np.int64), vectors, nprobe)
+
+    def save(self, path):
+        """Persist the index as .npy files plus a small JSON header"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(path, 'offsets.npy'), self.offsets)
+        np.save(os.path.join(path, 'rows.npy'), self.rows)
+        np.save(os.path.join(path, 'vectors.npy'), self.vectors)
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({'kind': self.kind, 'n_lists': self.n_lists,
+                       'count': int(self.rows.shape[0]), 'nprobe': self.nprobe}, f, indent=2)
+
+    @classmethod
+    def load(cls, path, matrix, nprobe=None, **params):
+        """
+        Memory-map a saved index
+
+        Args:
+            path (str): Directory the index was saved to
+            matrix (np.ndarray): Fact matrix the index must cover
+            nprobe (int): Override the saved nprobe
+            **params: Build-only options, ignored
+
+        Returns:
+            IVFIndex: The loaded index, or None if it is missing or stale
+        """
+        header_file = os.path.join(path, 'index.json')
+        if not os.path.exists(header_file):
+            return None
+        with open(header_file) as f:
+            header = json.load(f)
+        if header['count'] != matrix.shape[0]:
+            return None
+
+        return cls(
+            np.load(os.path.join(path, 'centroids.npy')),
+            np.load(os.path.join(path, 'offsets.npy')),
+            np.load(os.path.join(path, 'rows.npy'), mmap_mode='r'),
+            np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r'),
+            nprobe or header['nprobe']
+        )
+
+    def search(self, query, top_k, nprobe=None):
+        """
+        Args:
+            query (np.ndarray): Normalized float32 query vector
+            top_k (int): Number of results to return
+            nprobe (int): Clusters to scan, defaults to self.nprobe
+
+        Returns:
+            tuple: (indices, scores) of the approximate top_k facts, best first
+        """
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        probes = top_k_indices(self.centroids @ query, nprobe)
+
+        candidate_rows = []
+        candidate_scores = []
+        for probe in probes:
+            start, end = self.offsets[probe], self.offsets[probe + 1]
+            if start == end:
+                continue
+            candidate_scores.append(self.vectors[start:end] @ query)
+            candidate_rows.append(self.rows[start:end])
+
+        if not candidate_scores:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        scores = np.concatenate(candidate_scores)
+        best = top_k_indices(scores, top_k)
+        return np.concatenate(candidate_rows)[best], scores[best]
+
+    def search_batch(self, queries, top_k, nprobe=None):
+        results = [self.search(query, top_k, nprobe) for query in queries]
+        width = max((len(indices) for indices, _ in results), default=0)
+        all_indices = np.full((len(results), width), -1, dtype=np.intp)
+        all_scores = np.full((len(results), width), -np.inf, dtype=np.float32)
+        for i, (indices, scores) in enumerate(results):
+            all_indices[i, :len(indices)] = indices
+            all_scores[i, :len(scores)] = scores
+        return all_indices, all_scores
+
+
+class Float16Index:
+    kind = 'float16'
+
+    def __init__(self, matrix, compact, rescore_factor=10, chunk_size=1024):
+        """
+        Scan a compact copy of the fact matrix, then re-score the best
+        candidates exactly against the full-precision rows
+
+        Only the compact copy is read in full on every query; the float32
+        matrix (usually memory-mapped from the store) is touched for the
+        handful of candidate rows, so it does not need to stay resident.
+
+        Args:
+            matrix (np.ndarray): Normalized float32 fact matrix
+            compact (np.ndarray): Quantized copy of the matrix, same row order
+            rescore_factor (int): Candidates re-scored per requested result,
+                0 returns the approximate scores as they are
+            chunk_size (int): Rows converted to float32 at a time while scanning;
+                small blocks stay in cache between the conversion and the multiply
+        """
+        self.matrix = matrix
+        self.compact = compact
+        self.rescore_factor = rescore_factor
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def quantize(cls, matrix):
+        """Return the arrays persisted for this encoding"""
+        return {'compact': np.asarray(matrix, dtype=np.float16)}
+
+    @classmethod
+    def build(cls, matrix, rescore_factor=10, **params):
+        """
+        Args:
+            matrix (np.ndarray): Normalized float32 fact matrix
+            rescore_factor (int): Candidates re-scored per requested result
+
+        Returns:
+            The built index
+        """
+        return cls(matrix, rescore_factor=rescore_factor, **cls.quantize(matrix))
+
+    def save(self, path):
+        """Persist the compact arrays as .npy files plus a small JSON header"""
+        os.makedirs(path, exist_ok=True)
+        for name, array in self._arrays().items():
+            np.save(os.path.join(path, f'{name}.npy'), array)
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({'kind': self.kind, 'count': int(self.compact.shape[0]),
+                       'rescore_factor': self.rescore_factor}, f, indent=2)
+
+    def _arrays(self):
+        return {'compact': self.compact}
+
+    @classmethod
+    def load(cls, path, matrix, rescore_factor=None, **params):
+        """
+        Memory-map a saved index
+
+        Args:
+            path (str): Directory the index was saved to
+            matrix (np.ndarray): Fact matrix the index must cover
+            rescore_factor (int): Override the saved rescore factor
+            **params: Build-only options, ignored
+
+        Returns:
+            The loaded index, or None if it is missing or stale
+        """
+        header_file = os.path.join(path, 'index.json')
+        if not os.path.exists(header_file):
+            return None
+        with open(header_file) as f:
+            header = json.load(f)
+        if header['count'] != matrix.shape[0]:
+            return None
+
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in cls._array_names()
+        }
+        if rescore_factor is None:
+            rescore_factor = header['rescore_factor']
+        return cls(matrix, rescore_factor=rescore_factor, **arrays)
+
+    @classmethod
+    def _array_names(cls):
+        return ('compact',)
+
+    @property
+    def nbytes(self):
+        """Bytes of the compact arrays scanned on every query"""
+        return sum(array.nbytes for array in self._arrays().values())
+
+    def _prepare_queries(self, queries):
+        """Map float32 queries into the space the compact matrix is scored in"""
+        return queries
+
+    def _approximate_scores(self, queries):
+        """Score a (num_queries x dim) block against the compact matrix, chunk by chunk"""
+        queries = self._prepare_queries(queries)
+        n = self.compact.shape[0]
+        scores = np.empty((queries.shape[0], n), dtype=np.float32)
+        for start in range(0, n, self.chunk_size):
+            block = np.asarray(self.compact[start:start + self.chunk_size], dtype=np.float32)
+            scores[:, start:start + block.shape[0]] = queries @ block.T
+        return scores
+
+    def _rescore(self, query, candidates, top_k):
+        """Exact float32 scores for the candidate rows, best top_k first"""
+        candidates = np.sort(candidates)  # ascending rows read the memory map sequentially
+        scores = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+
+    def search(self, query, top_k, rescore_factor=None):
+        """
+        Args:
+            query (np.ndarray): Normalized float32 query vector
+            top_k (int): Number of results to return
+            rescore_factor (int): Override self.rescore_factor
+
+        Returns:
+            tuple: (indices, scores) of the top_k facts, best first
+        """
+        rescore_factor = self.rescore_factor if rescore_factor is None else rescore_factor
+        scores = self._approximate_scores(query.reshape(1, -1))[0]
+        if not rescore_factor:
+            indices = top_k_indices(scores, top_k)
+            return indices, scores[indices]
+        return self._rescore(query, top_k_indices(scores, top_k * rescore_factor), top_k)
+
+    def search_batch(self, queries, top_k, rescore_factor=None, chunk_size=256):
+        rescore_factor = self.rescore_factor if rescore_factor is None else rescore_factor
+        num_queries = queries.shape[0]
+        top_k = max(0, min(top_k, self.compact.shape[0]))
+        all_indices = np.empty((num_queries, top_k), dtype=np.intp)
+        all_scores = np.empty((num_queries, top_k), dtype=np.float32)
+
+        for start in range(0, num_queries, chunk_size):
+            block = queries[start:start + chunk_size]
+            scores = self._approximate_scores(block)
+            for i, query in enumerate(block):
+                if rescore_factor:
+                    candidates = top_k_indices(scores[i], top_k * rescore_factor)
+                    indices, best_scores = self._rescore(query, candidates, top_k)
+                else:
+                    indices = top_k_indices(scores[i], top_k)
+                    best_scores = scores[i][indices]
+                all_indices[start + i] = indices
+                all_scores[start + i] = best_scores
+        return all_indices, all_scores
+
+
+class Int8Index(Float16Index):
+    kind = 'int8'
+
+    def __init__(self, matrix, compact, scale, rescore_factor=10, chunk_size=1024):
+        """
+        Args:
+            matrix (np.ndarray): Normalized float32 fact matrix
+            compact (np.ndarray): int8 codes, value = code * scale per dimension
+            scale (np.ndarray): float32 scale of each dimension
+            rescore_factor (int): Candidates re-scored per requested result
+            chunk_size (int): Rows converted to float32 at a time while scanning
+        """
+        super().__init__(matrix, compact, rescore_factor, chunk_size)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def quantize(cls, matrix, chunk_size=65_536):
+        """Symmetric per-dimension scalar quantization to int8"""
+        max_abs = np.zeros(matrix.shape[1], dtype=np.float32)
+        for start in range(0, matrix.shape[0], chunk_size):
+            np.maximum(max_abs, np.abs(matrix[start:start + chunk_size]).max(axis=0), out=max_abs)
+        scale = max_abs / 127
+        scale[scale == 0] = 1.0
+
+        compact = np.empty(matrix.shape, dtype=np.int8)
+        for start in range(0, matrix.shape[0], chunk_size):
+            block = np.asarray(matrix[start:start + chunk_size], dtype=np.float32) / scale
+            compact[start:start + chunk_size] = np.clip(np.rint(block), -127, 127)
+        return {'compact': compact, 'scale': scale}
+
+    def _arrays(self):
+        return {'compact': self.compact, 'scale': self.scale}
+
+    @classmethod
+    def _array_names(cls):
+        return ('compact', 'scale')
+
+    def _prepare_queries(self, queries):
+        # (code * scale) . q == code . (scale * q), so scale the query once instead of every row
+        return queries * self.scale
+
+
+def _assign(matrix, centroids, chunk_size=65_536):
+    """Assign each row to its most similar centroid, in bounded-memory chunks"""
+    assignments = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], chunk_size):
+        block = matrix[start:start + chunk_size] @ centroids.T
+        assignments[start:start + chunk_size] = np.argmax(block, axis=1)
+    return assignments
+
+
+INDEX_TYPES = {
+    BruteForceIndex.kind: BruteForceIndex,
+    IVFIndex.kind: IVFIndex,
+    Float16Index.kind: Float16Index,
+    Int8Index.kind: Int8Index
+}
+
+
+def index_path(store_path, kind):
+    """Directory an index of the given kind is persisted to inside a store"""
+    return os.path.join(store_path, f'index_{kind}')
+
+
+def load_or_build_index(kind, store_path, matrix, **params):
+    """
+    Load a persisted index for the store, building and saving it if missing
+
+    Args:
+        kind (str): One of INDEX_TYPES
+        store_path (str): Embedding store directory, or None for in-memory facts
+        matrix (np.ndarray): Normalized float32 fact matrix
+        **params: Build/search parameters for the backend (e.g. n_lists, nprobe, rescore_factor)
+
+    Returns:
+        Index backend instance
+    """
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{kind}', expected one of {sorted(INDEX_TYPES)}")
+    index_cls = INDEX_TYPES[kind]
+
+    if kind == BruteForceIndex.kind:
+        return index_cls(matrix)
+
+    if store_path is not None:
+        index = index_cls.load(index_path(store_path, kind), matrix, **params)
+        if index is not None:
+            return index
+
+    print(f"Building {kind} index for {matrix.shape[0]} facts...")
+    index = index_cls.build(matrix, **params)
+    if store_path is not None:
+        index.save(index_path(store_path, kind))
+    return index
+
+
+if __name__ == "__main__":
+    import sys
+    from embedding_store import EmbeddingStore
+
+    if len(sys.argv) < 2:
+        print("Usage: python vector_index.py <store_dir> [n_lists] [nprobe]")
+        print("       python vector_index.py <store_dir> float16|int8")
+        sys.exit(1)
+
+    store = EmbeddingStore(sys.argv[1])
+    embeddings, _, _ = store.load()
+
+    if len(sys.argv) > 2 and sys.argv[2] in (Float16Index.kind, Int8Index.kind):
+        quantized = INDEX_TYPES[sys.argv[2]].build(embeddings)
+        quantized.save(index_path(store.path, quantized.kind))
+        print(f"Built {quantized.kind} index ({quantized.nbytes / 2**20:.1f} MiB, "
+              f"float32 matrix {embeddings.nbytes / 2**20:.1f} MiB) in {index_path(store.path, quantized.kind)}")
+        sys.exit(0)
+
+    build_params = {}
+    if len(sys.argv) > 2:
+        build_params['n_lists'] = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        build_params['nprobe'] = int(sys.argv[3])
+
+    built = IVFIndex.build(embeddings, **build_params)
+    built.save(index_path(store.path, IVFIndex.kind))
+    print(f"Built IVF index with {built.n_lists} lists in {index_path(store.path, IVFIndex.kind)}")
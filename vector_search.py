@@ -0,0 +1,103 @@
+"""
+Vector search helpers for ChristopherGPT
+Pure NumPy routines used to score questions against the fact matrix
+"""
+
+import numpy as np
+
+
+def normalize_rows(matrix):
+    """
+    L2-normalize every row of a matrix into a contiguous float32 array
+
+    Args:
+        matrix (array-like): 2D array of embeddings (one row per fact)
+
+    Returns:
+        np.ndarray: C-contiguous float32 matrix with unit-length rows
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def top_k_indices(scores, top_k):
+    """
+    Return the indices of the top_k highest scores, best first
+
+    Uses argpartition so only the selected candidates are sorted,
+    which keeps the cost linear in the number of scores.
+
+    Args:
+        scores (np.ndarray): 1D array of similarity scores
+        top_k (int): Number of indices to return
+
+    Returns:
+        np.ndarray: Indices of the best scores in descending order
+    """
+    n = scores.shape[0]
+    if top_k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k >= n:
+        return np.argsort(scores)[::-1]
+
+    candidates = np.argpartition(scores, n - top_k)[n - top_k:]
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def search(matrix, query, top_k):
+    """
+    Exact inner-product search of one normalized query against a normalized matrix
+
+    Args:
+        matrix (np.ndarray): Normalized float32 fact matrix
+        query (np.ndarray): Normalized float32 query vector
+        top_k (int): Number of results to return
+
+    Returns:
+        tuple: (indices, scores) of the top_k facts, best first
+    """
+    scores = matrix @ query
+    indices = top_k_indices(scores, top_k)
+    return indices, scores[indices]
+
+
+def search_batch(matrix, queries, top_k, chunk_size=256):
+    """
+    Exact inner-product search of many normalized queries as matrix multiplies
+
+    Queries are processed in chunks so the score block stays bounded
+    (chunk_size x number of facts) on large corpora.
+
+    Args:
+        matrix (np.ndarray): Normalized float32 fact matrix
+        queries (np.ndarray): Normalized float32 query matrix, one row per question
+        top_k (int): Number of results to return per query
+        chunk_size (int): Number of queries scored per matrix multiply
+
+    Returns:
+        tuple: (indices, scores) arrays of shape (num_queries, top_k), best first
+    """
+    num_queries = queries.shape[0]
+    top_k = max(0, min(top_k, matrix.shape[0]))
+    all_indices = np.empty((num_queries, top_k), dtype=np.intp)
+    all_scores = np.empty((num_queries, top_k), dtype=np.float32)
+    if top_k == 0:
+        return all_indices, all_scores
+
+    n = matrix.shape[0]
+    for start in range(0, num_queries, chunk_size):
+        scores = queries[start:start + chunk_size] @ matrix.T
+        if top_k < n:
+            candidates = np.argpartition(scores, n - top_k, axis=1)[:, n - top_k:]
+        else:
+            candidates = np.broadcast_to(np.arange(n), scores.shape)
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(candidate_scores, axis=1)[:, ::-1]
+        all_indices[start:start + chunk_size] = np.take_along_axis(candidates, order, axis=1)
+        all_scores[start:start + chunk_size] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    return all_indices, all_scores